@@ -1,6 +1,7 @@
 #!python
 
 from typing import List
+from article_store import ArticleStore
 import utils
 
 
@@ -25,6 +26,8 @@ def main(keywords: List[str], force_redo: bool = False) -> None:
         search_result = utils.search(url, keyword, ID, SECRET, num_of_pages)
 
         utils.write_json_on_file(fname, {"keyword": keyword, "items": search_result})
+        with ArticleStore() as store:
+            store.upsert_articles(utils.FileType.KIN, keyword, search_result)
 
 
 if __name__ == "__main__":
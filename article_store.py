@@ -0,0 +1,550 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional, Iterable, Any
+from email.utils import parsedate_to_datetime
+import datetime as dt
+import sqlite3
+import json
+import sys
+import utils
+
+# 기본 데이터베이스 파일.
+DEFAULT_DB = utils.RESULTS + "/" + "articles.sqlite3"
+
+# 본문 수집 실패를 나타내는 값(get_news_maintext.py, get_kin_maintext.py 참조).
+FETCH_ERRORS = ("request_error", "encoding_error")
+
+# 테이블과 인덱스 정의.
+# articles: (수집 방법, 키워드, url)마다 한 행. 같은 url이 여러 키워드로 수집되면 여러 행이 된다.
+# bodies, tokens: articles의 행마다 최대 한 행.
+# verdicts: 유관 데이터 판정 결과. get_relevant_articles의 journal과 같이 url로 식별한다.
+# fetch_errors: 본문 수집에 실패한 요청의 기록.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    url TEXT NOT NULL,
+    host TEXT,
+    title TEXT,
+    url_original TEXT,
+    description TEXT,
+    date TEXT,
+    UNIQUE (source, keyword, url)
+);
+CREATE INDEX IF NOT EXISTS articles_url ON articles (url);
+CREATE INDEX IF NOT EXISTS articles_host ON articles (host);
+CREATE INDEX IF NOT EXISTS articles_keyword ON articles (keyword);
+CREATE INDEX IF NOT EXISTS articles_date ON articles (date);
+
+CREATE TABLE IF NOT EXISTS bodies (
+    article_id INTEGER PRIMARY KEY REFERENCES articles (id) ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    text TEXT,
+    question TEXT,
+    answers TEXT,
+    dates TEXT
+);
+CREATE INDEX IF NOT EXISTS bodies_status ON bodies (status);
+
+CREATE TABLE IF NOT EXISTS tokens (
+    article_id INTEGER PRIMARY KEY REFERENCES articles (id) ON DELETE CASCADE,
+    tokens TEXT NOT NULL,
+    tokens_answer TEXT
+);
+
+CREATE TABLE IF NOT EXISTS verdicts (
+    url TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    related INTEGER NOT NULL,
+    reason TEXT,
+    PRIMARY KEY (url, keyword)
+);
+
+CREATE TABLE IF NOT EXISTS fetch_errors (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    host TEXT,
+    stage TEXT NOT NULL,
+    error TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fetch_errors_host ON fetch_errors (host);
+CREATE INDEX IF NOT EXISTS fetch_errors_url ON fetch_errors (url);
+"""
+
+
+def get_source(filetype: utils.FileType) -> str:
+    """
+    FileType에서 수집 방법을 나타내는 문자열을 구한다.
+    본문이 있는 파일(_WT)은 원래 검색 결과 파일과 같은 수집 방법으로 본다.
+
+    Args:
+        filetype (utils.FileType): 데이터 파일의 FileType.
+
+    Returns:
+        str: 수집 방법 문자열. "NEWS" | "CRAWL_NEWS" | "KIN" | "CRAWL_KIN".
+
+    Usage:
+        get_source(utils.FileType.CRAWL_NEWS_WT) -> "CRAWL_NEWS"
+    """
+    return filetype.name.removesuffix("_WT")
+
+
+def get_date_iso(date: Optional[str | List[str]]) -> Optional[str]:
+    """
+    수집 결과의 날짜를 YYYY-MM-DD 문자열로 바꾼다.
+    검색 api의 RFC 2822 날짜("Mon, 01 Jan 2024 09:00:00 +0900"),
+    크롤링과 지식IN의 "YYYY.MM.DD." 날짜를 지원하며, 리스트면 첫 번째(지식IN 질문 날짜)를 쓴다.
+
+    Args:
+        date (Optional[str | List[str]]): 아티클의 date 값.
+
+    Returns:
+        Optional[str]: YYYY-MM-DD 문자열. 알 수 없는 형식이면 None.
+    """
+    if isinstance(date, list):
+        date = date[0] if date else None
+    if not date:
+        return None
+    date = date.strip()
+    try:
+        return dt.datetime.strptime(date.rstrip("."), "%Y.%m.%d").date().isoformat()
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(date).date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def get_host(url: str) -> Optional[str]:
+    """
+    utils.get_host_from_url()과 같지만, 호스트가 없는 url이면 None을 반환한다.
+
+    Args:
+        url (str): 전체 url 문자열.
+
+    Returns:
+        Optional[str]: 맨 앞의 "www."을 제외한 호스트.
+    """
+    try:
+        return utils.get_host_from_url(url)
+    except (AttributeError, ValueError):
+        return None
+
+
+class ArticleStore:
+    """
+    수집 결과를 담는 SQLite 저장소와 그 조회, 갱신 함수들.
+    각 단계는 json 결과 파일을 쓸 때 같은 내용을 이 저장소에도 쓰고,
+    키워드를 가로지르는 조회나 호스트별 집계는 파일 전체를 읽는 대신 인덱스를 탄 쿼리로 한다.
+
+    pipeline.py는 단계들을 여러 스레드에서 동시에 실행하므로, 저장소 객체는 스레드마다 따로 만든다.
+    WAL 모드와 busy_timeout으로 여러 연결이 동시에 써도 잠금 에러 없이 기다린다.
+
+    Usage:
+        with ArticleStore() as store:
+            store.upsert_articles(utils.FileType.NEWS, "환자 권리", articles)
+            store.get_articles(host="hani.co.kr", date_from="2020-01-01")
+    """
+
+    def __init__(self, fname: str = DEFAULT_DB) -> None:
+        """
+        Args:
+            fname (str, optional): 데이터베이스 파일. 기본값 DEFAULT_DB.
+        """
+        self.conn = sqlite3.connect(fname, timeout=60)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        연결을 닫는다.
+        """
+        self.conn.close()
+
+    def __enter__(self) -> "ArticleStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def get_ids(self, source: str, keyword: str) -> Dict[str, int]:
+        """
+        수집 방법과 키워드에 해당하는 아티클들의 url -> id 딕셔너리를 반환한다.
+
+        Args:
+            source (str): 수집 방법 문자열. get_source() 참조.
+            keyword (str): 검색 키워드.
+
+        Returns:
+            Dict[str, int]: url -> 아티클 id.
+        """
+        rows = self.conn.execute(
+            "SELECT url, id FROM articles WHERE source = ? AND keyword = ?",
+            (source, keyword),
+        )
+        return {url: i for url, i in rows}
+
+    def upsert_articles(
+        self,
+        filetype: utils.FileType,
+        keyword: str,
+        articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+    ) -> List[int]:
+        """
+        검색 결과 아티클들을 저장한다. 이미 있는 (수집 방법, 키워드, url)은 내용을 갱신한다.
+
+        Args:
+            filetype (utils.FileType): 데이터 파일의 FileType.
+            keyword (str): 검색 키워드.
+            articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 아티클 딕셔너리들.
+
+        Returns:
+            List[int]: articles 순서대로의 아티클 id.
+        """
+        source = get_source(filetype)
+        keyword = keyword or ""
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO articles
+                    (source, keyword, url, host, title, url_original, description, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source, keyword, url) DO UPDATE SET
+                    title = excluded.title,
+                    url_original = excluded.url_original,
+                    description = excluded.description,
+                    date = COALESCE(excluded.date, articles.date)
+                """,
+                (
+                    (
+                        source,
+                        keyword,
+                        e["url_naver"],
+                        get_host(e["url_naver"]),
+                        e.get("title"),
+                        e.get("url_original"),
+                        e.get("description"),
+                        get_date_iso(e.get("date")),
+                    )
+                    for e in articles
+                ),
+            )
+        ids = self.get_ids(source, keyword)
+        return [ids[e["url_naver"]] for e in articles]
+
+    def set_bodies(
+        self,
+        filetype: utils.FileType,
+        keyword: str,
+        articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+        stage: str,
+    ) -> None:
+        """
+        본문 수집 결과를 저장한다. 아티클이 없으면 먼저 upsert_articles()로 만든다.
+        본문 수집에 실패한 아티클(FETCH_ERRORS)은 fetch_errors에도 기록한다.
+
+        Args:
+            filetype (utils.FileType): 데이터 파일의 FileType.
+            keyword (str): 검색 키워드.
+            articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 본문이 있는 아티클 딕셔너리들.
+            stage (str): 수집한 단계(모듈) 이름. fetch_errors에 기록된다.
+        """
+        ids = self.upsert_articles(filetype, keyword, articles)
+        rows, errors = [], []
+        now = dt.datetime.now().isoformat(timespec="seconds")
+        for i, e in zip(ids, articles):
+            body = e["text"] if "text" in e else e.get("question")
+            status = body if body in FETCH_ERRORS else "ok"
+            rows.append(
+                (
+                    i,
+                    status,
+                    e.get("text"),
+                    e.get("question"),
+                    json.dumps(e["answers"], ensure_ascii=False) if "answers" in e else None,
+                    json.dumps(e["date"], ensure_ascii=False) if isinstance(e.get("date"), list) else None,
+                )
+            )
+            if status != "ok":
+                errors.append((e["url_naver"], get_host(e["url_naver"]), stage, status, now))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO bodies VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            self.conn.executemany(
+                "INSERT INTO fetch_errors (url, host, stage, error, created_at) VALUES (?, ?, ?, ?, ?)",
+                errors,
+            )
+
+    def set_tokens(
+        self,
+        filetype: utils.FileType,
+        keyword: str,
+        articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+    ) -> None:
+        """
+        토큰화 결과를 저장한다. 아티클이 없으면 먼저 upsert_articles()로 만든다.
+
+        Args:
+            filetype (utils.FileType): 토큰화 전 데이터 파일의 FileType.
+            keyword (str): 검색 키워드.
+            articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 토큰이 있는 아티클 딕셔너리들.
+        """
+        ids = self.upsert_articles(filetype, keyword, articles)
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)",
+                (
+                    (
+                        i,
+                        json.dumps(e["tokens"], ensure_ascii=False),
+                        json.dumps(e["tokens_answer"], ensure_ascii=False)
+                        if "tokens_answer" in e
+                        else None,
+                    )
+                    for i, e in zip(ids, articles)
+                ),
+            )
+
+    def set_verdicts(self, keyword: str, verdicts: Iterable[Tuple[str, bool, str]]) -> None:
+        """
+        유관 데이터 판정 결과를 저장한다.
+
+        Args:
+            keyword (str): 판정 기준인 상위 키워드.
+            verdicts (Iterable[Tuple[str, bool, str]]): (url, 연관 여부, 이유)들.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?)",
+                ((url, keyword, int(tf), reason) for url, tf, reason in verdicts),
+            )
+
+    def add_fetch_error(self, url: str, stage: str, error: str) -> None:
+        """
+        본문 수집 실패를 하나 기록한다.
+
+        Args:
+            url (str): 요청한 url.
+            stage (str): 단계(모듈) 이름.
+            error (str): 에러 종류.
+        """
+        now = dt.datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO fetch_errors (url, host, stage, error, created_at) VALUES (?, ?, ?, ?, ?)",
+                (url, get_host(url), stage, error, now),
+            )
+
+    def get_articles(
+        self,
+        source: Optional[str] = None,
+        keyword: Optional[str] = None,
+        host: Optional[str] = None,
+        url: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        조건에 맞는 아티클들을 본문과 함께 반환한다. 조건은 모두 AND로 묶이며, None인 조건은 무시한다.
+
+        Args:
+            source (Optional[str], optional): 수집 방법. get_source() 참조.
+            keyword (Optional[str], optional): 검색 키워드.
+            host (Optional[str], optional): 호스트.
+            url (Optional[str], optional): url.
+            date_from (Optional[str], optional): 이 날짜(YYYY-MM-DD) 이후.
+            date_to (Optional[str], optional): 이 날짜(YYYY-MM-DD) 이전.
+            status (Optional[str], optional): 본문 수집 상태("ok" | "request_error" | "encoding_error").
+
+        Returns:
+            List[Dict[str, Any]]: articles와 bodies의 열을 합친 딕셔너리들(answers, dates는 리스트로 변환).
+        """
+        conditions = {
+            "a.source = ?": source,
+            "a.keyword = ?": keyword,
+            "a.host = ?": host,
+            "a.url = ?": url,
+            "a.date >= ?": date_from,
+            "a.date <= ?": date_to,
+            "b.status = ?": status,
+        }
+        conditions = {k: v for k, v in conditions.items() if v is not None}
+        where = " AND ".join(conditions) or "1"
+        rows = self.conn.execute(
+            f"""
+            SELECT a.*, b.status, b.text, b.question, b.answers, b.dates
+            FROM articles a LEFT JOIN bodies b ON b.article_id = a.id
+            WHERE {where}
+            ORDER BY a.id
+            """,
+            tuple(conditions.values()),
+        )
+        ret = []
+        for row in rows:
+            e = dict(row)
+            for k in ("answers", "dates"):
+                if e[k] is not None:
+                    e[k] = json.loads(e[k])
+            ret.append(e)
+        return ret
+
+    def get_keywords_for_url(self, url: str) -> List[Tuple[str, str]]:
+        """
+        url이 어떤 수집 방법과 키워드로 수집되었는지 반환한다.
+
+        Args:
+            url (str): 아티클 url.
+
+        Returns:
+            List[Tuple[str, str]]: (수집 방법, 키워드)들.
+        """
+        rows = self.conn.execute(
+            "SELECT source, keyword FROM articles WHERE url = ? ORDER BY source, keyword",
+            (url,),
+        )
+        return [tuple(e) for e in rows]
+
+    def get_host_stats(
+        self, source: Optional[str] = None, keyword: Optional[str] = None
+    ) -> Dict[str, Tuple[int, int]]:
+        """
+        호스트별 (아티클 수, 본문을 수집한 아티클 수)를 반환한다.
+
+        Args:
+            source (Optional[str], optional): 수집 방법. None이면 전부.
+            keyword (Optional[str], optional): 검색 키워드. None이면 전부.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: 호스트 -> (아티클 수, 본문 수집 성공 수).
+        """
+        rows = self.conn.execute(
+            """
+            SELECT a.host, COUNT(*), COALESCE(SUM(b.status = 'ok'), 0)
+            FROM articles a LEFT JOIN bodies b ON b.article_id = a.id
+            WHERE a.host IS NOT NULL
+                AND (:source IS NULL OR a.source = :source)
+                AND (:keyword IS NULL OR a.keyword = :keyword)
+            GROUP BY a.host
+            """,
+            {"source": source, "keyword": keyword},
+        )
+        return {host: (total, ok) for host, total, ok in rows}
+
+    def get_fetch_errors(
+        self, host: Optional[str] = None, stage: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        본문 수집 실패 기록을 반환한다.
+
+        Args:
+            host (Optional[str], optional): 호스트. None이면 전부.
+            stage (Optional[str], optional): 단계(모듈) 이름. None이면 전부.
+
+        Returns:
+            List[Dict[str, str]]: fetch_errors의 행 딕셔너리들(오래된 것부터).
+        """
+        rows = self.conn.execute(
+            """
+            SELECT * FROM fetch_errors
+            WHERE (:host IS NULL OR host = :host) AND (:stage IS NULL OR stage = :stage)
+            ORDER BY id
+            """,
+            {"host": host, "stage": stage},
+        )
+        return [dict(e) for e in rows]
+
+    def get_verdicts(self, keyword: str) -> Dict[str, Tuple[bool, str]]:
+        """
+        상위 키워드에 대한 판정 결과를 반환한다.
+
+        Args:
+            keyword (str): 판정 기준인 상위 키워드.
+
+        Returns:
+            Dict[str, Tuple[bool, str]]: url -> (연관 여부, 이유).
+        """
+        rows = self.conn.execute(
+            "SELECT url, related, reason FROM verdicts WHERE keyword = ?", (keyword,)
+        )
+        return {url: (bool(related), reason) for url, related, reason in rows}
+
+    def import_json_file(self, fname: str, filetype: utils.FileType, stage: str = "import") -> int:
+        """
+        기존 json 데이터 파일 하나를 저장소로 가져온다.
+        본문이나 토큰이 있으면 함께 가져온다. 저장소 도입 전의 결과를 옮길 때 사용한다.
+
+        Args:
+            fname (str): json 데이터 파일명.
+            filetype (utils.FileType): 그 파일의 FileType.
+            stage (str, optional): fetch_errors에 기록할 단계 이름. 기본값 "import".
+
+        Returns:
+            int: 가져온 아티클 수.
+        """
+        data = utils.get_json_from_file(fname)
+        articles = data["items"]
+        if not articles:
+            return 0
+        keyword = data.get("keyword")
+        if keyword is None:
+            # 병합된 파일(tokenize_and_merge_data)은 아티클마다 키워드와 원래 파일이 기록되어 있다.
+            groups: Dict[Tuple[str, str], list] = {}
+            for e in articles:
+                groups.setdefault((e["source"], e["keyword"]), []).append(e)
+            for (source, keyword), group in groups.items():
+                self.import_articles(utils.FileType(source), keyword, group, stage)
+        else:
+            self.import_articles(filetype, keyword, articles, stage)
+        return len(articles)
+
+    def import_articles(
+        self,
+        filetype: utils.FileType,
+        keyword: str,
+        articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+        stage: str,
+    ) -> None:
+        """
+        아티클들을 가진 정보(본문, 토큰)에 따라 알맞은 함수로 저장한다.
+
+        Args:
+            filetype (utils.FileType): 데이터 파일의 FileType.
+            keyword (str): 검색 키워드.
+            articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 아티클 딕셔너리들.
+            stage (str): fetch_errors에 기록할 단계 이름.
+        """
+        if "text" in articles[0] or "question" in articles[0]:
+            self.set_bodies(filetype, keyword, articles, stage)
+        else:
+            self.upsert_articles(filetype, keyword, articles)
+        if "tokens" in articles[0]:
+            self.set_tokens(filetype, keyword, articles)
+
+
+def main(fnames: List[Tuple[str, utils.FileType]]) -> None:
+    """
+    기존 json 데이터 파일들을 저장소로 가져온다.
+
+    Args:
+        fnames (List[Tuple[str, utils.FileType]]): (파일명, FileType)들.
+    """
+    with ArticleStore() as store:
+        for fname, filetype in fnames:
+            n = store.import_json_file(fname, filetype)
+            print(f"{fname}: {n} articles imported")
+
+
+if __name__ == "__main__":
+    main(
+        [
+            (f"{utils.FileType.KIN_WT.value}_{keyword}.txt", utils.FileType.KIN_WT)
+            for keyword in sys.argv[1:] or ["환자 의견", "환자 권리", "환자 요구"]
+        ]
+    )
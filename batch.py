@@ -1,36 +1,8 @@
 #!python
 
 from typing import List, Tuple
-from types import ModuleType
-from collections import defaultdict
-from itertools import product
-import re
 import utils
-import api_naver_news
-import api_naver_kin
-import crawl_naver_news
-import get_news_maintext
-import get_kin_maintext
-import tokenize_and_merge_data
-import remove_similar_articles
-import get_relevant_articles
-
-
-def get_module_name(module: ModuleType) -> str:
-    """
-    모듈의 이름을 문자열로 반환
-    이때, 모듈은 임포트되어 있어야 함
-
-    Args:
-        module (ModuleType): 모듈 객체
-
-    Returns:
-        str: 모듈의 이름
-
-    Usage:
-        get_module_name(re) -> "re"
-    """
-    return re.findall(r"'(.+?)'", repr(module))[0]
+import pipeline
 
 
 def get_keyword_conversational() -> List[str]:
@@ -97,9 +69,12 @@ def confirm_conversational(
 
 def main():
     """
-    SDM 데이터 수집 과정 전체를 실행
+    SDM 데이터 수집 과정 전체를 대화식으로 설정하고 실행.
+    실제 실행은 pipeline.run_pipeline()이 의존성 DAG에 따라 수행하므로,
+    서로 독립인 뉴스 단계와 지식IN 단계는 동시에 진행됨.
+    무인 실행이 필요하면 마지막에 설정을 파일로 저장하고 pipeline.py로 실행할 것.
 
-    현재 과정:
+    현재 과정(단계 정의는 pipeline.DEFAULT_STAGES 참조):
         1. api_naver_news.py: 네이버 뉴스 검색 api로 뉴스 관련 데이터 수집.
         2. crawl_naver_news.py: 네이버 뉴스 검색결과 크롤링으로 뉴스 관련 데이터 수집.
         3. get_news_maintext.py: 뉴스 본문 스크래핑.
@@ -117,93 +92,43 @@ def main():
     print(
         " 검색 키워드를 설정합니다.\n한 줄에 하나씩 키워드를 입력하고,\n설정이 완료되면 아무것도 입력하지 말고 엔터를 누르십시오."
     )
-    keywords = {}
+    config = {"keywords": {}, "stages": {}}
     print("<뉴스 키워드 설정>")
-    keywords["news"] = get_keyword_conversational()
+    config["keywords"]["news"] = get_keyword_conversational()
     print("<지식IN 키워드 설정>")
-    keywords["kin"] = get_keyword_conversational()
+    config["keywords"]["kin"] = get_keyword_conversational()
 
-    parent_keyword = input(
+    config["keyword"] = input(
         "마지막으로, 이 데이터 전체를 아우르는 단 하나의 키워드는 무엇입니까?: "
     )
-    parent_description = input(
+    config["description"] = input(
         "그 키워드에 대해 가능한 자세히 한 줄로 설명해 주십시오: "
     )
 
-    modules = [
-        api_naver_news,
-        crawl_naver_news,
-        get_news_maintext,
-        api_naver_kin,
-        get_kin_maintext,
-        tokenize_and_merge_data,
-        remove_similar_articles,
-        get_relevant_articles,
-    ]
-    module_iter_nums = defaultdict(lambda: 1)
-
-    module_iter_nums[get_news_maintext] = 2
-    module_iter_nums[tokenize_and_merge_data] = 2
-    module_iter_nums[remove_similar_articles] = 2
-    module_iter_nums[get_relevant_articles] = 2
-
-    steps_list = ["news"] * 4 + ["kin"] * 2 + ["news", "kin"] * 3
-    steps = {
-        module: [None for _ in range(module_iter_nums[module])] for module in modules
-    }
-    temp = 0
-    for module in steps:
-        for i, _ in enumerate(steps[module]):
-            steps[module][i] = steps_list[temp]
-            temp += 1
-
-    kwargs = {e: [{} for _ in range(module_iter_nums[e])] for e in modules}
-    kwargs[api_naver_news][0]["keywords"] = keywords["news"]
-    kwargs[crawl_naver_news][0]["keywords"] = keywords["news"]
-    kwargs[get_news_maintext][0]["keywords"] = keywords["news"]
-    kwargs[api_naver_kin][0]["keywords"] = keywords["kin"]
-    kwargs[get_kin_maintext][0]["keywords"] = keywords["kin"]
-
-    kwargs[get_news_maintext][0]["filetype"] = utils.FileType.NEWS
-    kwargs[get_news_maintext][1]["filetype"] = utils.FileType.CRAWL_NEWS
-
-    kwargs[tokenize_and_merge_data][0]["files"] = list(
-        product([utils.FileType.NEWS, utils.FileType.CRAWL_NEWS], keywords["news"])
-    )
-    kwargs[tokenize_and_merge_data][0]["save_file"] = utils.FileType.NEWS_PROCESSED
-    kwargs[tokenize_and_merge_data][1]["files"] = list(
-        product([utils.FileType.KIN], keywords["kin"])
-    )
-    kwargs[tokenize_and_merge_data][1]["save_file"] = utils.FileType.KIN_PROCESSED
-
-    kwargs[remove_similar_articles][0]["filetype"] = utils.FileType.NEWS_PROCESSED
-    kwargs[remove_similar_articles][0]["method"] = "jaccard"
-    kwargs[remove_similar_articles][1]["filetype"] = utils.FileType.KIN_PROCESSED
-    kwargs[remove_similar_articles][1]["method"] = "url"
-
-    kwargs[get_relevant_articles][0]["keyword"] = parent_keyword
-    kwargs[get_relevant_articles][0]["description"] = parent_description
-    kwargs[get_relevant_articles][0]["filetype"] = utils.FileType.NEWS_PROCESSED_UNIQUE
-    kwargs[get_relevant_articles][1]["keyword"] = parent_keyword
-    kwargs[get_relevant_articles][1]["description"] = parent_description
-    kwargs[get_relevant_articles][1]["filetype"] = utils.FileType.KIN_PROCESSED_UNIQUE
-
-    for module in modules:
-        for i in range(module_iter_nums[module]):
-            print(
-                f"""'{get_module_name(module)}'의 {i + 1}번째 과정이 아래 키워드를 기반으로 수행됩니다.
+    stages = pipeline.get_stages(config)
+    for name in pipeline.get_execution_order(stages):
+        stage = stages[name]
+        print(
+            f"""'{name}' 과정({stage["module"]})이 아래 키워드를 기반으로 수행됩니다.
 동의하면 T, 이 과정을 생략하고 싶으면 F를 선택하십시오.
 이 과정이 이미 수행되어 파일이 존재할 때, 재시도하고 싶으면 FORCE를 입력하십시오.
 그렇게 하지 않으면 이미 있는 파일을 재사용합니다. [T/F/FORCE]"""
-            )
-            print(*keywords[steps[module][i]], sep="\n")
-            procced = input()
-            if procced.lower() not in ("t", "y"):
-                continue
-
-            force_redo = procced.lower() == "force"
-
-            module.main(**kwargs[module][i], force_redo=force_redo)
+        )
+        typestring = "kin" if "kin" in name else "news"
+        print(*config["keywords"][typestring], sep="\n")
+        procced = input().lower()
+        config["stages"][name] = {
+            "skip": procced not in ("t", "y", "force"),
+            "force_redo": procced == "force",
+        }
+
+    if confirm_conversational("이 설정을 파일로 저장할까요? (pipeline.py로 무인 실행 가능)"):
+        fname = input("저장할 파일명: ").strip() or f"{utils.MATERIALS}/pipeline.json"
+        utils.write_json_on_file(fname, config)
+
+    status = pipeline.run_pipeline(config)
+    for name, result in status.items():
+        print(f"{name}: {result}")
 
 
 if __name__ == "__main__":
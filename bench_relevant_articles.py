@@ -0,0 +1,151 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional
+import time
+import json
+import asyncio
+import get_relevant_articles
+from mock_openai_server import MockOpenAIServer
+
+
+def get_percentile(values: List[float], p: float) -> float:
+    """
+    값들의 p 백분위수를 최근접 순위(nearest-rank) 방식으로 구한다.
+
+    Args:
+        values (List[float]): 값들의 리스트.
+        p (float): 백분위(0 ~ 100).
+
+    Returns:
+        float: p 백분위수. 값이 없으면 0.
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+def get_fake_articles(n: int) -> List[Dict[str, str]]:
+    """
+    벤치마크용 가짜 뉴스 아티클을 만든다.
+
+    Args:
+        n (int): 아티클 개수.
+
+    Returns:
+        List[Dict[str, str]]: 제목, url, 본문이 있는 아티클 딕셔너리의 리스트.
+    """
+    return [
+        {
+            "title": f"벤치마크 기사 {i}",
+            "url_naver": f"https://bench.example.com/{i}",
+            "text": f"환자와 의사가 치료 방법을 함께 결정했다. {i} " * 20,
+        }
+        for i in range(n)
+    ]
+
+
+async def run_once(
+    n: int, concurrency: int, backoff: float, server_kwargs: Dict[str, float]
+) -> Dict[str, float]:
+    """
+    모의 서버를 새로 띄우고 get_relatedness_list()를 한 번 실행해서 측정한다.
+
+    Args:
+        n (int): 판정할 아티클 개수.
+        concurrency (int): get_relatedness_list()의 동시 요청 수.
+        backoff (float): get_relatedness_list()의 재시도 대기 지수.
+        server_kwargs (Dict[str, float]): MockOpenAIServer 설정.
+
+    Returns:
+        Dict[str, float]: 측정 결과 딕셔너리.
+            ["articles_per_s"]: 초당 판정한 아티클 수.
+            ["client_retries"]: get_nth_answer_async()의 재시도 횟수(openai 클라이언트 안의 재시도는 끔).
+            ["server_requests"]: 서버가 받은 요청 수. 아티클 수 + client_retries와 같다.
+            ["p50_latency"], ["p99_latency"]: 아티클별 판정 소요 시간(초)의 백분위수.
+    """
+    articles = get_fake_articles(n)
+    with MockOpenAIServer(**server_kwargs) as server:
+        start = time.perf_counter()
+        await get_relevant_articles.get_relatedness_list(
+            articles,
+            "환자 의사 공유의사결정",
+            "벤치마크용 설명.",
+            "mock",
+            "mock",
+            base_url=server.base_url,
+            concurrency=concurrency,
+            backoff=backoff,
+            # 클라이언트 안의 재시도를 끄고 모든 재시도를 get_nth_answer_async()가 하게 해서 client_retries를 정확히 센다.
+            client_retries=0,
+        )
+        elapsed = time.perf_counter() - start
+        stats = dict(server.stats)
+
+    latencies = get_relevant_articles.latencies
+    return {
+        "concurrency": concurrency,
+        "articles": n,
+        "seconds": round(elapsed, 3),
+        "articles_per_s": round(n / elapsed, 2),
+        "client_retries": get_relevant_articles.retried_articles,
+        "server_requests": stats["requests"],
+        "server_errors": stats["errors"],
+        "server_rate_limited": stats["rate_limited"],
+        "p50_latency": round(get_percentile(latencies, 50), 4),
+        "p99_latency": round(get_percentile(latencies, 99), 4),
+    }
+
+
+async def main(
+    n: int = 300,
+    concurrencies: Tuple[int, ...] = (1, 5, 10, 30, 60),
+    backoff: float = -3,
+    latency: float = 0.2,
+    latency_jitter: float = 0.1,
+    error_rate: float = 0.01,
+    rate_limit_rate: float = 0.02,
+    max_concurrent: Optional[int] = 40,
+    fname: Optional[str] = None,
+) -> List[Dict[str, float]]:
+    """
+    로컬 모의 서버를 대상으로 get_relatedness_list()의 처리량을 동시성 설정별로 측정한다.
+    실제 API 비용 없이 관련도 판정 단계의 성능 회귀를 확인할 수 있다.
+
+    Args:
+        n (int, optional): 동시성 설정별로 판정할 아티클 개수. 기본값 300.
+        concurrencies (Tuple[int, ...], optional): 측정할 동시 요청 수들. 기본값 (1, 5, 10, 30, 60).
+        backoff (float, optional): 재시도 대기 지수. 기본값 -3(약 0.125초 + 0 ~ 2초).
+        latency (float, optional): 모의 서버의 응답 지연 시간(초). 기본값 0.2.
+        latency_jitter (float, optional): 모의 서버의 응답 지연 시간에 더해지는 무작위 값의 최대치(초). 기본값 0.1.
+        error_rate (float, optional): 모의 서버의 500 에러 확률. 기본값 0.01.
+        rate_limit_rate (float, optional): 모의 서버의 429 에러 확률. 기본값 0.02.
+        max_concurrent (Optional[int], optional): 모의 서버가 429 없이 동시에 처리하는 요청 수. 기본값 40.
+        fname (Optional[str], optional): 결과를 json으로 저장할 파일명. 기본값 None(저장하지 않음).
+
+    Returns:
+        List[Dict[str, float]]: 동시성 설정별 측정 결과 딕셔너리의 리스트. run_once() 참조.
+    """
+    server_kwargs = {
+        "latency": latency,
+        "latency_jitter": latency_jitter,
+        "error_rate": error_rate,
+        "rate_limit_rate": rate_limit_rate,
+        "max_concurrent": max_concurrent,
+        "retry_after": 0,
+        "seed": 0,
+    }
+    ret = []
+    for concurrency in concurrencies:
+        result = await run_once(n, concurrency, backoff, server_kwargs)
+        print(json.dumps(result))
+        ret.append(result)
+    if fname is not None:
+        with open(fname, "wt", encoding="utf-8") as f:
+            json.dump({"server": server_kwargs, "results": ret}, f, indent=4)
+    return ret
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,2 @@
+# 합성 코퍼스와 로컬 HTTP 서버를 이용한 오프라인 벤치마크.
+# 실행: python -m benchmarks.run (README 참조)
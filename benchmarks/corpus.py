@@ -0,0 +1,357 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional
+from random import Random
+from html import escape
+import re
+import zlib
+
+# materials의 셀렉터 파일이 없을 때 사용하는 호스트별 본문 셀렉터 예시.
+# 실제 셀렉터 파일과 같은 형식(호스트 -> 셀렉터 리스트)이다.
+SAMPLE_SELECTORS = {
+    "n.news.naver.com": ["#dic_area", "#newsct_article"],
+    "hani.co.kr": ["div.article-text"],
+    "khan.co.kr": ["div#articleBody"],
+    "donga.com": ["section.news_view"],
+    "chosun.com": ["section.article-body"],
+    "yna.co.kr": ["article.story-news div.article"],
+    "mk.co.kr": ["div.news_cnt_detail_wrap"],
+    "medicaltimes.com": ["div.view_cont"],
+    "doctorsnews.co.kr": ["#article-view-content-div"],
+    "kormedi.com": ["div.entry-content > div.post-body"],
+}
+
+# 본문 문장을 만들 때 쓰는 단어들.
+WORDS = (
+    "환자 의사 치료 결정 병원 의료진 설명 동의 선택 정보 상담 진료 수술 약물 부작용 "
+    "가족 보호자 권리 요구 의견 참여 공유 신뢰 소통 제도 정책 연구 결과 조사 건강 "
+    "보험 비용 시간 대기 검사 진단 처방 입원 퇴원 재활 관리 만성 질환 암 당뇨 고혈압"
+).split()
+
+# 드물게 나오는 단어들(두 단어의 합성어).
+# 서로 다른 아티클의 자카드 유사도가 실제처럼 낮게 나오도록 어휘를 넓힌다.
+RARE_WORDS = [a + b for a in WORDS for b in WORDS if a != b]
+
+# 간단한 css 셀렉터의 한 단계(태그, id, 클래스)를 나타내는 정규식.
+COMPOUND_PATTERN = re.compile(r"^([a-zA-Z][\w-]*)?((?:[#.][\w-]+)*)$")
+
+
+def get_rng(*keys: object) -> Random:
+    """
+    키들로 시드를 정한 난수 생성기를 반환한다.
+    같은 키에는 항상 같은 페이지가 만들어지므로 벤치마크를 반복해도 같은 코퍼스가 된다.
+
+    Args:
+        *keys (object): 시드를 정할 값들.
+
+    Returns:
+        Random: 난수 생성기.
+    """
+    return Random(zlib.crc32("\x00".join(map(str, keys)).encode("utf-8")))
+
+
+def get_sentences(rng: Random, n: int) -> List[str]:
+    """
+    무작위 문장 n개를 만든다. 단어의 절반은 WORDS, 절반은 RARE_WORDS에서 고른다.
+
+    Args:
+        rng (Random): 난수 생성기.
+        n (int): 문장 개수.
+
+    Returns:
+        List[str]: 문장들의 리스트.
+    """
+    return [
+        " ".join(
+            rng.choice(WORDS if rng.random() < 0.5 else RARE_WORDS)
+            for _ in range(rng.randint(8, 16))
+        )
+        + "."
+        for _ in range(n)
+    ]
+
+
+def parse_selector(selector: str) -> Optional[List[Tuple[str, str, List[str]]]]:
+    """
+    css 셀렉터를 바깥 요소부터 (태그, id, 클래스들)의 리스트로 나눈다.
+    태그, id, 클래스와 자손(공백), 자식(>) 결합자만 지원한다.
+
+    Args:
+        selector (str): css 셀렉터.
+
+    Returns:
+        Optional[List[Tuple[str, str, List[str]]]]: (태그, id, 클래스들)의 리스트. 지원하지 않는 셀렉터면 None.
+    """
+    ret = []
+    for compound in selector.replace(">", " ").split():
+        match = COMPOUND_PATTERN.match(compound)
+        if match is None:
+            return None
+        tag, rest = match.group(1) or "div", match.group(2)
+        parts = re.findall(r"[#.][\w-]+", rest)
+        ids = [e[1:] for e in parts if e[0] == "#"]
+        classes = [e[1:] for e in parts if e[0] == "."]
+        ret.append((tag, ids[0] if ids else "", classes))
+    return ret or None
+
+
+def get_element_html(
+    path: List[Tuple[str, str, List[str]]], inner: str, attribute: str = ""
+) -> str:
+    """
+    parse_selector()의 결과대로 요소들을 중첩해서 inner를 감싼다.
+    attribute가 있으면 본문을 가장 안쪽 요소의 그 속성 값으로 넣는다.
+
+    Args:
+        path (List[Tuple[str, str, List[str]]]): parse_selector()의 결과.
+        inner (str): 가장 안쪽 요소의 내용(html).
+        attribute (str, optional): 본문을 넣을 속성 이름. 기본값 ""(내용으로 넣음).
+
+    Returns:
+        str: 요소 html 문자열.
+    """
+    html = inner
+    for i, (tag, id_, classes) in enumerate(reversed(path)):
+        attrs = ""
+        if id_:
+            attrs += f' id="{id_}"'
+        if classes:
+            attrs += f' class="{" ".join(classes)}"'
+        if i == 0 and attribute:
+            attrs += f' {attribute}="{escape(re.sub(r"<[^>]+>", "", html))}"'
+            html = ""
+        html = f"<{tag}{attrs}>{html}</{tag}>"
+    return html
+
+
+def get_news_hosts(
+    selectors: Dict[str, List[str]], redirect: Dict[str, list]
+) -> Dict[str, str]:
+    """
+    셀렉터 파일에서 합성 기사를 만들 수 있는 호스트와 그 셀렉터를 고른다.
+    리디렉션이 있는 호스트는 url이 바뀌므로 제외하고, 호스트마다 지원하는 첫 셀렉터를 쓴다.
+
+    Args:
+        selectors (Dict[str, List[str]]): 호스트 -> 셀렉터 리스트.
+        redirect (Dict[str, list]): 호스트 -> 리디렉션 규칙.
+
+    Returns:
+        Dict[str, str]: 호스트 -> 셀렉터.
+    """
+    ret = {}
+    for host, host_selectors in sorted(selectors.items()):
+        if host in redirect:
+            continue
+        for selector in host_selectors:
+            if parse_selector(selector) is not None:
+                ret[host] = selector
+                break
+    return ret
+
+
+def get_news_page(
+    host: str, selector: str, i: int, paragraphs: int = 12, attribute: str = ""
+) -> str:
+    """
+    host의 i번째 합성 기사 페이지를 만든다.
+    본문 앞뒤로 메뉴, 스크립트, 관련 기사 목록 등을 넣어 실제 페이지와 비슷한 크기로 만든다.
+
+    Args:
+        host (str): 기사 사이트 호스트.
+        selector (str): 본문 셀렉터.
+        i (int): 기사 번호.
+        paragraphs (int, optional): 본문 문단 수. 기본값 12.
+        attribute (str, optional): 본문을 넣을 속성 이름. 기본값 ""(내용으로 넣음).
+
+    Returns:
+        str: html 문자열.
+    """
+    rng = get_rng("news", host, i)
+    body = "".join(
+        f"<p>{' '.join(get_sentences(rng, 4))}</p>" for _ in range(paragraphs)
+    )
+    article = get_element_html(parse_selector(selector), body, attribute)
+    menu = "".join(f'<li><a href="/section/{k}">{rng.choice(WORDS)}</a></li>' for k in range(30))
+    related = "".join(
+        f'<li><a href="/article/{rng.randint(0, 10**6)}">{" ".join(get_sentences(rng, 1))}</a></li>'
+        for _ in range(20)
+    )
+    script = "var data = " + repr([rng.random() for _ in range(200)]) + ";"
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{host} {i}</title>"
+        f"<script>{script}</script></head><body>"
+        f'<header><ul class="gnb">{menu}</ul></header>'
+        f'<main><h1 class="headline">{get_sentences(rng, 1)[0]}</h1>{article}</main>'
+        f'<aside class="related"><ul>{related}</ul></aside>'
+        f"<footer>{' '.join(get_sentences(rng, 3))}</footer></body></html>"
+    )
+
+
+def get_kin_page(doc_id: int, answers: int = 3) -> str:
+    """
+    지식IN 질문 페이지와 같은 구조(get_kin_maintext.py의 셀렉터)의 합성 페이지를 만든다.
+
+    Args:
+        doc_id (int): 질문 번호.
+        answers (int, optional): 답변 수. 기본값 3.
+
+    Returns:
+        str: html 문자열.
+    """
+    rng = get_rng("kin", doc_id)
+    answer_html = "".join(
+        '<div class="_endContents">'
+        f'<div class="_endContentsText">{" ".join(get_sentences(rng, 6))}</div>'
+        f'<p class="c-heading-answer__content-date">2023.0{rng.randint(1, 9)}.1{rng.randint(0, 9)}.</p>'
+        "</div>"
+        for _ in range(answers)
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>'
+        f'<div class="c-heading__title">{get_sentences(rng, 1)[0]}</div>'
+        f'<div class="c-heading__content">{" ".join(get_sentences(rng, 5))}</div>'
+        f'<span class="c-userinfo__info">작성일2023.01.0{rng.randint(1, 9)}.</span>'
+        f"{answer_html}</body></html>"
+    )
+
+
+def get_search_page(hosts: List[str], start: int, total: int) -> str:
+    """
+    네이버 뉴스 검색 결과 페이지와 같은 구조(utils.search_crawl()의 셀렉터)의 합성 페이지를 만든다.
+    start번째부터 10개의 결과를 넣고, total을 넘으면 결과가 없는 페이지를 만든다.
+
+    Args:
+        hosts (List[str]): 결과 링크에 쓸 기사 호스트들.
+        start (int): 첫 결과의 번호(1부터).
+        total (int): 전체 결과 수.
+
+    Returns:
+        str: html 문자열.
+    """
+    rng = get_rng("search", start)
+    items = "".join(
+        "<li>"
+        f'<a class="news_tit" href="http://{hosts[k % len(hosts)]}/article/{k}">{get_sentences(rng, 1)[0]}</a>'
+        f'<span class="info">2020.0{k % 9 + 1}.1{k % 10}.</span>'
+        "</li>"
+        for k in range(start - 1, min(start + 9, total))
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>'
+        f'<ul class="list_news">{items}</ul></body></html>'
+    )
+
+
+def get_news_articles(n: int, hosts: List[str]) -> List[Dict[str, Optional[str]]]:
+    """
+    합성 기사 n개의 검색 결과(api_naver_news.py의 결과와 같은 형식)를 만든다.
+    url은 http이므로 로컬 서버를 HTTP 프록시로 쓰면 모든 요청이 그 서버로 간다.
+
+    Args:
+        n (int): 기사 수.
+        hosts (List[str]): 기사 호스트들(번갈아 사용).
+
+    Returns:
+        List[Dict[str, Optional[str]]]: 아티클 딕셔너리의 리스트.
+    """
+    return [
+        {
+            "title": f"합성 기사 {i}",
+            "url_naver": f"http://{hosts[i % len(hosts)]}/article/{i}",
+            "url_original": None,
+            "description": None,
+            "date": "2020.01.01.",
+        }
+        for i in range(n)
+    ]
+
+
+def get_kin_articles(n: int) -> List[Dict[str, Optional[str]]]:
+    """
+    합성 지식IN 질문 n개의 검색 결과(api_naver_kin.py의 결과와 같은 형식)를 만든다.
+
+    Args:
+        n (int): 질문 수.
+
+    Returns:
+        List[Dict[str, Optional[str]]]: 아티클 딕셔너리의 리스트.
+    """
+    return [
+        {
+            "title": f"합성 질문 {i}",
+            "url_naver": f"http://kin.naver.com/qna/detail.naver?d1id=7&dirId=70201&docId={i}",
+            "url_original": None,
+            "description": None,
+            "date": None,
+        }
+        for i in range(n)
+    ]
+
+
+def get_text_articles(
+    n: int, typestring: str, duplicate_ratio: float = 0.2
+) -> List[Dict[str, Optional[str | List[str] | List[List[str]]]]]:
+    """
+    본문이 있는(토큰화 전) 합성 아티클 n개를 만든다.
+    중복 제거 벤치마크를 위해 약 duplicate_ratio만큼은 앞의 아티클을 조금 바꾼 것(같은 지식IN 스레드)으로 만든다.
+
+    Args:
+        n (int): 아티클 수.
+        typestring (str): "news" | "kin".
+        duplicate_ratio (float, optional): 중복 아티클의 비율. 기본값 0.2.
+
+    Returns:
+        List[Dict[str, Optional[str | List[str] | List[List[str]]]]]: 아티클 딕셔너리의 리스트.
+    """
+    rng = get_rng("text", typestring, n)
+    ret = []
+    for i in range(n):
+        source = rng.randrange(i) if i and rng.random() < duplicate_ratio else i
+        srng = get_rng("text", typestring, source)
+        if typestring == "news":
+            sentences = get_sentences(srng, 30)
+            sentences[rng.randrange(len(sentences))] = get_sentences(rng, 1)[0]
+            ret.append(
+                {
+                    "title": f"합성 기사 {i}",
+                    "url_naver": f"http://bench.example.com/article/{i}",
+                    "text": " ".join(sentences),
+                }
+            )
+        else:
+            ret.append(
+                {
+                    "title": f"합성 질문 {i}",
+                    "url_naver": f"http://kin.naver.com/qna/detail.naver?dirId=1&docId={source}",
+                    "question": " ".join(get_sentences(srng, 4)),
+                    "answers": [" ".join(get_sentences(srng, 6)) for _ in range(3)],
+                }
+            )
+    return ret
+
+
+def get_tokenized_articles(
+    n: int, typestring: str, duplicate_ratio: float = 0.2
+) -> List[Dict[str, Optional[str | List[str] | List[List[str]]]]]:
+    """
+    토큰화가 끝난(tokenize_and_merge_data.py의 결과와 같은 형식) 합성 아티클 n개를 만든다.
+    형태소 분석기 없이 공백으로 나눈 단어를 명사 토큰으로 쓴다.
+
+    Args:
+        n (int): 아티클 수.
+        typestring (str): "news" | "kin".
+        duplicate_ratio (float, optional): 중복 아티클의 비율. 기본값 0.2.
+
+    Returns:
+        List[Dict[str, Optional[str | List[str] | List[List[str]]]]]: 아티클 딕셔너리의 리스트.
+    """
+    articles = get_text_articles(n, typestring, duplicate_ratio)
+    for article in articles:
+        if typestring == "news":
+            article["tokens"] = article["text"].replace(".", "").split()
+        else:
+            article["tokens"] = article["question"].replace(".", "").split()
+            article["tokens_answer"] = [
+                e.replace(".", "").split() for e in article["answers"]
+            ]
+    return articles
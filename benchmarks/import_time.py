@@ -0,0 +1,126 @@
+#!python
+
+from typing import List, Dict, Any, Optional
+from os import path
+import sys
+import json
+import argparse
+import subprocess
+
+# 리포지토리 최상위 폴더(모듈을 임포트할 작업 폴더).
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+# 임포트 시간 예산(초)을 확인할 진입점 모듈들.
+# batch.py, pipeline.py는 대화 시작 전, 작업자 프로세스는 작업을 받기 전에 이 모듈들을 임포트한다.
+DEFAULT_MODULES = ("utils", "metrics", "pipeline", "batch", "profiling")
+
+# 진입점 모듈을 임포트했을 때 함께 임포트되면 안 되는 무거운 의존성들.
+# 이 의존성들은 실제로 요청, 파싱, 토큰화, 판정하는 단계에서만 임포트되어야 한다.
+HEAVY_MODULES = (
+    "openai",
+    "httpx",
+    "mecab",
+    "numpy",
+    "pandas",
+    "bs4",
+    "lxml",
+    "requests",
+    "urllib3",
+    "asyncio",
+)
+
+# 기본 임포트 시간 예산(초).
+DEFAULT_BUDGET = 0.25
+
+# 파서 프로세스 풀의 작업자가 임포트하는 모듈 -> 함께 임포트해도 되는 HEAVY_MODULES.
+# 작업자는 HTML을 파싱하므로 파서(bs4, lxml)는 임포트하지만, 요청(requests)이나 판정(openai)은 하지 않으며
+# 프로세스마다 임포트하므로 진입점과 따로 WORKER_BUDGET으로 확인한다.
+WORKER_MODULES = {
+    "get_news_maintext": ("bs4", "lxml"),
+    "get_kin_maintext": ("bs4", "lxml"),
+}
+
+# 작업자 모듈의 임포트 시간 예산(초).
+WORKER_BUDGET = 0.5
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """
+    새 파이썬 프로세스에서 module을 임포트하고, 걸린 시간과 함께 임포트된 무거운 의존성을 구한다.
+    이미 임포트된 모듈의 영향을 받지 않도록 매번 새 프로세스를 띄우고, -X importtime의 누적 시간을 쓴다.
+
+    Args:
+        module (str): 모듈 이름.
+
+    Returns:
+        Dict[str, Any]: 측정 결과.
+            ["seconds"]: module의 누적 임포트 시간(초). 임포트에 실패했으면 None.
+            ["heavy"]: 함께 임포트된 HEAVY_MODULES의 리스트. 임포트에 실패했으면 None.
+            ["stderr"]: 임포트에 실패했을 때만 있는, 실패한 프로세스의 stderr(-X importtime 줄 제외).
+    """
+    code = (
+        f"import sys, json\nimport {module}\n"
+        f"print(json.dumps(sorted(set(sys.modules) & set({list(HEAVY_MODULES)!r}))))"
+    )
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if res.returncode != 0:
+        stderr = "\n".join(e for e in res.stderr.splitlines() if not e.startswith("import time:"))
+        return {"seconds": None, "heavy": None, "stderr": stderr}
+    seconds = 0.0
+    for line in res.stderr.splitlines():
+        parts = [e.strip() for e in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            seconds = int(parts[1]) / 1e6
+    return {"seconds": seconds, "heavy": json.loads(res.stdout.strip().splitlines()[-1])}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    진입점 모듈들의 임포트 시간이 예산 안인지, 무거운 의존성을 임포트하지 않는지 확인한다.
+    WORKER_MODULES의 모듈은 WORKER_BUDGET과, 허용된 의존성을 뺀 HEAVY_MODULES로 확인한다.
+    임포트에 실패한 모듈은 실패(ok: false)로 기록하고 나머지 모듈을 계속 확인한다.
+    결과는 모듈마다 한 줄의 json으로 출력한다.
+
+    Usage:
+        python -m benchmarks.import_time
+        python -m benchmarks.import_time --budget 0.1 pipeline batch
+
+    Args:
+        argv (Optional[List[str]], optional): 명령행 인자. None이면 sys.argv를 사용.
+
+    Returns:
+        int: 종료 코드. 모든 모듈이 통과하면 0, 아니면 1.
+    """
+    parser = argparse.ArgumentParser(description="진입점 모듈의 임포트 시간 예산을 확인합니다.")
+    parser.add_argument(
+        "modules", nargs="*", default=[*DEFAULT_MODULES, *WORKER_MODULES], help="확인할 모듈들"
+    )
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="진입점 모듈의 임포트 시간 예산(초)")
+    parser.add_argument(
+        "--worker-budget", type=float, default=WORKER_BUDGET, help="작업자 모듈의 임포트 시간 예산(초)"
+    )
+    args = parser.parse_args(argv)
+
+    status = 0
+    for module in args.modules:
+        allowed = WORKER_MODULES.get(module, ())
+        budget = args.worker_budget if module in WORKER_MODULES else args.budget
+        result = {"module": module, "budget": budget, "allowed": list(allowed), **measure(module)}
+        if "stderr" in result:
+            result["ok"] = False
+        else:
+            result["heavy"] = [e for e in result["heavy"] if e not in allowed]
+            result["ok"] = result["seconds"] <= budget and not result["heavy"]
+        if not result["ok"]:
+            status = 1
+        print(json.dumps(result))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
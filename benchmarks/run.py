@@ -0,0 +1,480 @@
+#!python
+
+from typing import List, Dict, Tuple, Callable, Optional, Any
+from os import makedirs, path, chdir, getcwd, environ
+import sys
+import time
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import utils
+import get_news_maintext
+from news_rules import NewsRules
+import get_kin_maintext
+import remove_similar_articles
+from benchmarks import corpus
+from benchmarks.server import SyntheticWebServer
+
+# 기본 코퍼스 크기들.
+DEFAULT_SIZES = (20, 100, 500)
+
+# 합성 데이터 파일에 쓰는 키워드.
+KEYWORD = "벤치마크"
+
+# 기본으로 실행하는 벤치마크들. get_benchmarks() 참조.
+DEFAULT_BENCHMARKS = (
+    "news_maintext",
+    "news_parse_bs4",
+    "news_parse_lxml",
+    "news_parse_unmapped",
+    "kin_maintext",
+    "kin_maintext_serial",
+    "search_crawl",
+    "tokenize",
+    "dedup_jaccard",
+    "dedup_url",
+)
+
+
+def prepare_materials(root: str, news_hosts: Dict[str, str]) -> None:
+    """
+    작업 폴더에 수집 단계가 읽는 MATERIALS 파일들을 만든다.
+    셀렉터는 합성 페이지를 만든 호스트의 것만 남기고, 쿠키는 빈 값으로 둔다.
+
+    Args:
+        root (str): 원래 폴더(materials의 리디렉션, 속성 파일이 있으면 복사).
+        news_hosts (Dict[str, str]): 호스트 -> 본문 셀렉터.
+    """
+    makedirs(utils.MATERIALS, exist_ok=True)
+    makedirs(utils.RESULTS, exist_ok=True)
+    utils.write_json_on_file(
+        f"{utils.MATERIALS}/news_maintext_selectors.txt",
+        {host: [selector] for host, selector in news_hosts.items()},
+    )
+    for name in ("redirections", "attributes"):
+        fname = f"{utils.MATERIALS}/news_maintext_{name}.txt"
+        original = path.join(root, fname)
+        if path.exists(original):
+            shutil.copy(original, fname)
+        else:
+            utils.write_json_on_file(fname, {})
+    with open(f"{utils.MATERIALS}/config.ini", "wt", encoding="utf8") as f:
+        f.write("[browser]\ncookie = \n")
+
+
+def get_source_maps(root: str) -> Tuple[Dict[str, List[str]], Dict[str, list], Dict[str, str]]:
+    """
+    원래 폴더의 셀렉터, 리디렉션, 속성 파일을 읽는다.
+    셀렉터 파일이 없으면 corpus.SAMPLE_SELECTORS를 쓴다.
+
+    Args:
+        root (str): 원래 폴더.
+
+    Returns:
+        Tuple[Dict[str, List[str]], Dict[str, list], Dict[str, str]]: (셀렉터, 리디렉션, 속성) 딕셔너리들.
+    """
+    ret = []
+    for name, default in (
+        ("selectors", corpus.SAMPLE_SELECTORS),
+        ("redirections", {}),
+        ("attributes", {}),
+    ):
+        fname = path.join(root, utils.MATERIALS, f"news_maintext_{name}.txt")
+        ret.append(utils.get_json_from_file(fname) if path.exists(fname) else default)
+    return tuple(ret)
+
+
+def bench_news_maintext(size: int, news_hosts: Dict[str, str]) -> Dict[str, Any]:
+    """
+    get_news_maintext의 기사별 본문 추출(요청 + 파싱)을 합성 기사 size개에 대해 측정한다.
+    main()은 본문 파일과 규칙 파일까지 쓰므로, main()의 기사별 처리 부분만 측정한다.
+
+    Args:
+        size (int): 기사 수.
+        news_hosts (Dict[str, str]): 호스트 -> 본문 셀렉터.
+
+    Returns:
+        Dict[str, Any]: 측정 결과. ["extracted"]는 본문을 추출한 기사 수.
+    """
+    rules = NewsRules.load()
+    articles = corpus.get_news_articles(size, list(news_hosts))
+    start = time.perf_counter()
+    texts = [
+        get_news_maintext.get_news_text_from_url(e["url_naver"], rules) for e in articles
+    ]
+    elapsed = time.perf_counter() - start
+    extracted = sum(e not in ("request_error", "encoding_error") for e in texts)
+    return {"seconds": elapsed, "items": size, "extracted": extracted}
+
+
+def bench_news_parse(parser: str, unmapped: bool = False) -> Callable[[int, Dict[str, str]], Dict[str, Any]]:
+    """
+    get_news_maintext.get_news_text_from_html()의 파싱과 본문 추출만(요청 없이) 주어진 파서 백엔드로 측정하는 벤치마크 함수를 만든다.
+    결과의 ["same_as_bs4"]는 기준 구현(parser_backend.Bs4Backend)과 같은 본문을 추출한 기사 수이다.
+    unmapped면 기사마다 셀렉터가 등록되지 않은 호스트로 추출해서, 모든 호스트의 셀렉터(selector_set)로 찾는 경우를 측정한다.
+
+    Args:
+        parser (str): 파서 백엔드 이름. "bs4" | "lxml".
+        unmapped (bool, optional): 등록되지 않은 호스트로 추출할지의 여부. 기본값 False.
+
+    Returns:
+        Callable[[int, Dict[str, str]], Dict[str, Any]]: 벤치마크 함수.
+    """
+
+    def bench(size: int, news_hosts: Dict[str, str]) -> Dict[str, Any]:
+        rules = NewsRules.load()
+        hosts = list(news_hosts)
+        pages = []
+        for i in range(size):
+            host = hosts[i % len(hosts)]
+            attribute = rules.get_attribute(host)
+            page = corpus.get_news_page(host, news_hosts[host], i, attribute=attribute)
+            pages.append((f"unmapped{i}.example" if unmapped else host, page))
+        start = time.perf_counter()
+        texts = [
+            get_news_maintext.get_news_text_from_html(page, host, rules, parser)[0]
+            for host, page in pages
+        ]
+        elapsed = time.perf_counter() - start
+        reference = texts
+        if parser != "bs4":
+            reference = [
+                get_news_maintext.get_news_text_from_html(page, host, rules, "bs4")[0]
+                for host, page in pages
+            ]
+        return {
+            "seconds": elapsed,
+            "items": size,
+            "extracted": sum(bool(e) for e in texts),
+            "same_as_bs4": sum(a == b for a, b in zip(texts, reference)),
+        }
+
+    return bench
+
+
+def bench_kin_maintext(
+    fetch_workers: int = 8, parse_workers: Optional[int] = None
+) -> Callable[[int, Dict[str, str]], Dict[str, Any]]:
+    """
+    get_kin_maintext.main()을 합성 지식IN 질문 size개에 대해 주어진 동시성 설정으로 측정하는 벤치마크 함수를 만든다.
+    요청 스레드 1개, 파서 프로세스 0개(현재 스레드에서 파싱)는 순차 수집과 같다.
+
+    Args:
+        fetch_workers (int, optional): 요청 스레드 수. 기본값 8.
+        parse_workers (Optional[int], optional): 파서 프로세스 수. 기본값 None(CPU 수).
+
+    Returns:
+        Callable[[int, Dict[str, str]], Dict[str, Any]]: 벤치마크 함수. ["extracted"]는 질문을 추출한 게시글 수.
+    """
+
+    def bench(size: int, news_hosts: Dict[str, str]) -> Dict[str, Any]:
+        utils.write_json_on_file(
+            f"{utils.FileType.KIN.value}_{KEYWORD}.txt",
+            {"keyword": KEYWORD, "items": corpus.get_kin_articles(size)},
+        )
+        start = time.perf_counter()
+        get_kin_maintext.main(
+            [KEYWORD], True, fetch_workers=fetch_workers, parse_workers=parse_workers
+        )
+        elapsed = time.perf_counter() - start
+        articles = utils.get_json_from_file(f"{utils.FileType.KIN_WT.value}_{KEYWORD}.txt")
+        extracted = sum(
+            e["question"] not in ("request_error", "encoding_error") for e in articles["items"]
+        )
+        return {"seconds": elapsed, "items": size, "extracted": extracted}
+
+    return bench
+
+
+def bench_search_crawl(size: int, news_hosts: Dict[str, str]) -> Dict[str, Any]:
+    """
+    utils.search_crawl()로 검색 결과 size개(한 해, 페이지당 10개)를 수집하는 시간을 측정한다.
+    페이지 사이의 대기 시간은 0으로 둔다.
+
+    Args:
+        size (int): 검색 결과 수. 서버의 search_results와 같아야 한다.
+        news_hosts (Dict[str, str]): 사용하지 않음(다른 벤치마크와 인자를 맞추기 위함).
+
+    Returns:
+        Dict[str, Any]: 측정 결과. ["extracted"]는 수집한 검색 결과 수.
+    """
+    start = time.perf_counter()
+    results = utils.search_crawl(
+        KEYWORD,
+        "news",
+        count=size + 1,
+        base_url="http://search.naver.com/search.naver",
+        years=[2020],
+        delay=0,
+    )
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "items": size, "extracted": len(results)}
+
+
+def bench_tokenize(size: int, news_hosts: Dict[str, str]) -> Dict[str, Any]:
+    """
+    tokenize_and_merge_data.main()을 본문이 있는 합성 기사 size개에 대해 측정한다.
+    형태소 분석기(python-mecab-ko)가 필요하며, 없으면 ImportError가 결과의 ["error"]에 기록된다.
+
+    Args:
+        size (int): 기사 수.
+        news_hosts (Dict[str, str]): 사용하지 않음(다른 벤치마크와 인자를 맞추기 위함).
+
+    Returns:
+        Dict[str, Any]: 측정 결과.
+    """
+    import tokenize_and_merge_data
+
+    utils.write_json_on_file(
+        f"{utils.FileType.NEWS_WT.value}_{KEYWORD}.txt",
+        {"keyword": KEYWORD, "items": corpus.get_text_articles(size, "news")},
+    )
+    start = time.perf_counter()
+    tokenize_and_merge_data.main(
+        [(utils.FileType.NEWS_WT, KEYWORD)], utils.FileType.NEWS_PROCESSED, True
+    )
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "items": size}
+
+
+def bench_dedup(method: str) -> Callable[[int, Dict[str, str]], Dict[str, Any]]:
+    """
+    remove_similar_articles.main()을 주어진 유사도 계산 방법으로 측정하는 벤치마크 함수를 만든다.
+    "jaccard"는 합성 뉴스, "url"은 합성 지식IN 데이터를 사용한다.
+
+    Args:
+        method (str): 유사도 계산 방법. "jaccard" | "url".
+
+    Returns:
+        Callable[[int, Dict[str, str]], Dict[str, Any]]: 벤치마크 함수.
+    """
+    typestring = "news" if method == "jaccard" else "kin"
+    filetype = utils.get_filetype_from_typestring(typestring, "p")
+
+    def bench(size: int, news_hosts: Dict[str, str]) -> Dict[str, Any]:
+        utils.write_json_on_file(
+            f"{filetype.value}.txt",
+            {"keyword": None, "items": corpus.get_tokenized_articles(size, typestring)},
+        )
+        start = time.perf_counter()
+        remove_similar_articles.main(filetype, method, True)
+        elapsed = time.perf_counter() - start
+        unique = utils.get_filetype_from_typestring(typestring, "u")
+        kept = len(utils.get_json_from_file(f"{unique.value}.txt")["items"])
+        return {
+            "seconds": elapsed,
+            "items": size,
+            "pairs": size * (size - 1) // 2,
+            "pairs_per_s": size * (size - 1) / 2 / elapsed if elapsed else 0.0,
+            "kept": kept,
+        }
+
+    return bench
+
+
+def get_benchmarks() -> Dict[str, Callable[[int, Dict[str, str]], Dict[str, Any]]]:
+    """
+    벤치마크 이름 -> 벤치마크 함수 딕셔너리를 반환한다.
+    벤치마크 함수는 (코퍼스 크기, 뉴스 호스트 -> 셀렉터)를 받아 측정 결과 딕셔너리를 반환한다.
+
+    Returns:
+        Dict[str, Callable[[int, Dict[str, str]], Dict[str, Any]]]: 벤치마크 함수들.
+    """
+    return {
+        "news_maintext": bench_news_maintext,
+        "news_parse_bs4": bench_news_parse("bs4"),
+        "news_parse_lxml": bench_news_parse("lxml"),
+        "news_parse_unmapped": bench_news_parse("lxml", unmapped=True),
+        "kin_maintext": bench_kin_maintext(),
+        "kin_maintext_serial": bench_kin_maintext(1, 0),
+        "search_crawl": bench_search_crawl,
+        "tokenize": bench_tokenize,
+        "dedup_jaccard": bench_dedup("jaccard"),
+        "dedup_url": bench_dedup("url"),
+    }
+
+
+def get_environment() -> Dict[str, Optional[str]]:
+    """
+    결과를 비교할 때 참고할 실행 환경 정보를 반환한다.
+
+    Returns:
+        Dict[str, Optional[str]]: 파이썬 버전, 플랫폼, git 커밋(알 수 없으면 None), 실행 시각.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run(
+    sizes: Tuple[int, ...] = DEFAULT_SIZES,
+    benchmarks: Tuple[str, ...] = DEFAULT_BENCHMARKS,
+    latency: float = 0.0,
+    latency_jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    임시 작업 폴더와 합성 웹 서버를 준비하고, 벤치마크들을 코퍼스 크기별로 실행한다.
+    합성 웹 서버는 HTTP_PROXY로 설정되므로 수집 코드는 실제 사이트 대신 이 서버에 요청한다.
+
+    Args:
+        sizes (Tuple[int, ...], optional): 코퍼스 크기들. 기본값 DEFAULT_SIZES.
+        benchmarks (Tuple[str, ...], optional): 실행할 벤치마크 이름들. 기본값 DEFAULT_BENCHMARKS.
+        latency (float, optional): 서버의 응답 지연 시간(초). 기본값 0.
+        latency_jitter (float, optional): 응답 지연 시간에 더해지는 무작위 값의 최대치(초). 기본값 0.
+        failure_rate (float, optional): 서버의 500 에러 확률. 기본값 0.
+        seed (int, optional): 서버의 난수 시드. 기본값 0.
+
+    Returns:
+        Dict[str, Any]: 결과 보고서.
+            ["environment"]: get_environment() 참조.
+            ["server"]: 서버 설정.
+            ["results"]: [{"benchmark", "size", "seconds", "items_per_s", ...}, ...].
+                실패한 벤치마크는 ["error"]에 예외가 기록된다.
+    """
+    root = getcwd()
+    selectors, redirect, attributes = get_source_maps(root)
+    news_hosts = corpus.get_news_hosts(selectors, redirect)
+    all_benchmarks = get_benchmarks()
+    server_kwargs = {
+        "latency": latency,
+        "latency_jitter": latency_jitter,
+        "failure_rate": failure_rate,
+        "seed": seed,
+    }
+    report = {
+        "environment": get_environment(),
+        "server": {**server_kwargs, "news_hosts": len(news_hosts)},
+        "results": [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    saved_env = {k: environ.get(k) for k in ("HTTP_PROXY", "http_proxy", "NO_PROXY", "no_proxy")}
+    chdir(workdir)
+    try:
+        prepare_materials(root, news_hosts)
+        for size in sizes:
+            with SyntheticWebServer(
+                news_hosts, attributes, search_results=size, **server_kwargs
+            ) as server:
+                for k in ("HTTP_PROXY", "http_proxy"):
+                    environ[k] = server.proxy_url
+                for k in ("NO_PROXY", "no_proxy"):
+                    environ.pop(k, None)
+                for name in benchmarks:
+                    result = {"benchmark": name, "size": size}
+                    try:
+                        result.update(all_benchmarks[name](size, news_hosts))
+                        result["items_per_s"] = (
+                            result["items"] / result["seconds"] if result["seconds"] else 0.0
+                        )
+                    except Exception as err:
+                        result["error"] = repr(err)
+                    print(json.dumps(result, ensure_ascii=False), flush=True)
+                    report["results"].append(result)
+    finally:
+        chdir(root)
+        for k, v in saved_env.items():
+            if v is None:
+                environ.pop(k, None)
+            else:
+                environ[k] = v
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    두 보고서의 (벤치마크, 크기)별 처리량을 비교한다.
+
+    Args:
+        old (Dict[str, Any]): 기준 보고서.
+        new (Dict[str, Any]): 비교할 보고서.
+
+    Returns:
+        List[Dict[str, Any]]: [{"benchmark", "size", "old_items_per_s", "new_items_per_s", "speedup"}, ...].
+            양쪽에 모두 성공한 결과가 있는 항목만 포함한다.
+    """
+    olds = {
+        (e["benchmark"], e["size"]): e["items_per_s"]
+        for e in old["results"]
+        if "items_per_s" in e
+    }
+    ret = []
+    for e in new["results"]:
+        key = (e["benchmark"], e["size"])
+        if key not in olds or "items_per_s" not in e:
+            continue
+        ret.append(
+            {
+                "benchmark": key[0],
+                "size": key[1],
+                "old_items_per_s": olds[key],
+                "new_items_per_s": e["items_per_s"],
+                "speedup": e["items_per_s"] / olds[key] if olds[key] else None,
+            }
+        )
+    return ret
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    오프라인 벤치마크를 실행하고 결과를 json으로 저장하거나, 두 결과를 비교한다.
+
+    Usage:
+        python -m benchmarks.run
+        python -m benchmarks.run --sizes 100 1000 --latency 0.01 --failure-rate 0.02 -o before.json
+        python -m benchmarks.run --only dedup_jaccard dedup_url
+        python -m benchmarks.run --compare before.json after.json
+
+    Args:
+        argv (Optional[List[str]], optional): 명령행 인자. None이면 sys.argv를 사용.
+
+    Returns:
+        int: 종료 코드. 실패한 벤치마크가 없으면 0, 있으면 1.
+    """
+    parser = argparse.ArgumentParser(description="합성 코퍼스와 로컬 서버로 수집, 전처리 단계의 처리량을 측정합니다.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="코퍼스 크기들")
+    parser.add_argument("--only", nargs="+", default=list(DEFAULT_BENCHMARKS), choices=DEFAULT_BENCHMARKS, help="실행할 벤치마크들")
+    parser.add_argument("--latency", type=float, default=0.0, help="서버 응답 지연 시간(초)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="응답 지연 시간에 더할 무작위 값의 최대치(초)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="서버의 500 에러 확률")
+    parser.add_argument("--seed", type=int, default=0, help="서버의 난수 시드")
+    parser.add_argument("-o", "--output", default=None, help="결과를 저장할 json 파일")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), default=None, help="두 결과 파일의 처리량 비교")
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        old, new = map(utils.get_json_from_file, args.compare)
+        for e in compare(old, new):
+            print(json.dumps(e, ensure_ascii=False))
+        return 0
+
+    report = run(
+        tuple(args.sizes),
+        tuple(args.only),
+        args.latency,
+        args.latency_jitter,
+        args.failure_rate,
+        args.seed,
+    )
+    if args.output is not None:
+        utils.write_json_on_file(args.output, report)
+    return 1 if any("error" in e for e in report["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!python
+
+from typing import Dict, Tuple, Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from random import Random
+import threading
+import time
+from benchmarks import corpus
+
+
+class BenchHTTPServer(ThreadingHTTPServer):
+    """
+    동시 연결이 몰려도 연결이 거부되지 않도록 대기열을 늘린 ThreadingHTTPServer.
+    """
+
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class SyntheticWebServer:
+    """
+    합성 뉴스 기사, 지식IN, 네이버 뉴스 검색 페이지를 돌려주는 로컬 HTTP 서버.
+    HTTP 프록시로 동작하므로, HTTP_PROXY 환경변수를 이 서버로 정하면
+    수집 코드를 고치지 않고도 http://{기사 호스트}/... 요청이 모두 이 서버로 온다.
+    페이지는 url로부터 매번 같은 내용으로 만들어지므로 코퍼스 크기에 제한이 없다.
+
+    - http://{뉴스 호스트}/article/{i}: corpus.get_news_page().
+    - http://kin.naver.com/qna/detail.naver?docId={i}: corpus.get_kin_page().
+    - http://search.naver.com/search.naver?start={i}: corpus.get_search_page().
+
+    Usage:
+        with SyntheticWebServer(news_hosts, latency=0.01, failure_rate=0.05) as server:
+            os.environ["HTTP_PROXY"] = server.proxy_url
+            ...
+    """
+
+    def __init__(
+        self,
+        news_hosts: Dict[str, str],
+        attributes: Optional[Dict[str, str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        search_results: int = 100,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            news_hosts (Dict[str, str]): 호스트 -> 본문 셀렉터. corpus.get_news_hosts() 참조.
+            attributes (Optional[Dict[str, str]], optional): 호스트 -> 본문을 넣을 속성 이름. 기본값 None.
+            host (str, optional): 서버 주소. 기본값 "127.0.0.1".
+            port (int, optional): 서버 포트. 기본값 0(빈 포트 자동 선택).
+            latency (float, optional): 모든 응답 전에 기다리는 시간(초). 기본값 0.
+            latency_jitter (float, optional): latency에 더해지는 무작위 시간의 최대치(초). 기본값 0.
+            failure_rate (float, optional): 500 에러를 돌려줄 확률. 기본값 0.
+            search_results (int, optional): 검색 결과 페이지의 전체 결과 수. 기본값 100.
+            seed (Optional[int], optional): 지연 시간과 에러의 난수 시드. 기본값 None.
+        """
+        self.news_hosts = news_hosts
+        self.attributes = attributes or {}
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.search_results = search_results
+        self.random = Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "not_found": 0, "bytes": 0}
+        self.server = BenchHTTPServer((host, port), self.get_handler())
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def proxy_url(self) -> str:
+        """
+        HTTP_PROXY 환경변수에 넣을 서버 주소.
+        """
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "SyntheticWebServer":
+        """
+        서버를 백그라운드 스레드에서 시작한다.
+
+        Returns:
+            SyntheticWebServer: 자기 자신.
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        서버를 멈추고 소켓을 닫는다.
+        """
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "SyntheticWebServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_page(self, url: str) -> Tuple[int, str]:
+        """
+        요청 url에 해당하는 페이지를 만든다.
+        지연 시간과 에러는 여기서 주입한다.
+
+        Args:
+            url (str): 요청 url(프록시 요청이므로 절대 url).
+
+        Returns:
+            Tuple[int, str]: (상태 코드, html 문자열).
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = self.latency + self.random.random() * self.latency_jitter
+            failed = self.random.random() < self.failure_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            with self.lock:
+                self.stats["errors"] += 1
+            return 500, "<html><body>internal server error</body></html>"
+
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+        if host.startswith("www."):
+            host = host[4:]
+        query = parse_qs(parts.query)
+
+        if host == "kin.naver.com" and "docId" in query:
+            return 200, corpus.get_kin_page(int(query["docId"][0]))
+        if host == "search.naver.com":
+            start = int(query.get("start", ["1"])[0])
+            return 200, corpus.get_search_page(
+                list(self.news_hosts), start, self.search_results
+            )
+        if host in self.news_hosts and parts.path.startswith("/article/"):
+            i = int(parts.path.rsplit("/", 1)[1])
+            page = corpus.get_news_page(
+                host, self.news_hosts[host], i, attribute=self.attributes.get(host, "")
+            )
+            return 200, page
+
+        with self.lock:
+            self.stats["not_found"] += 1
+        return 404, "<html><body>not found</body></html>"
+
+    def get_handler(self) -> type:
+        """
+        이 서버 객체를 참조하는 요청 핸들러 클래스를 만든다.
+
+        Returns:
+            type: BaseHTTPRequestHandler의 서브클래스.
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                url = self.path
+                if not url.startswith("http"):
+                    url = f"http://{self.headers.get('Host', '')}{url}"
+                status, html = server.get_page(url)
+                body = html.encode("utf-8")
+                with server.lock:
+                    server.stats["bytes"] += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import requests
+
+    hosts = corpus.get_news_hosts(corpus.SAMPLE_SELECTORS, {})
+    with SyntheticWebServer(hosts) as server:
+        proxies = {"http": server.proxy_url}
+        for article in corpus.get_news_articles(3, list(hosts)):
+            res = requests.get(article["url_naver"], proxies=proxies, timeout=5)
+            print(res.status_code, len(res.content), article["url_naver"])
+        print(server.stats)
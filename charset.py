@@ -0,0 +1,165 @@
+#!python
+
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+import codecs
+import gzip
+import re
+import metrics
+import utils
+
+# requests와 ArchivedResponse는 타입 힌트에만 쓰인다.
+if TYPE_CHECKING:
+    import requests
+    from html_archive import ArchivedResponse
+
+# 응답 본문이 gzip으로 한 번 더 압축되어 있는지 확인하는 매직 바이트.
+GZIP_MAGIC = b"\x1f\x8b\x08"
+
+# <meta charset>을 찾을 본문 앞부분의 크기(바이트). HTML 표준의 prescan과 같은 크기다.
+PRESCAN_SIZE = 1024
+
+# 통계적 감지(charset_normalizer)에 넘길 본문 앞부분의 크기(바이트).
+DETECT_SIZE = 64 << 10
+
+# BOM과 그 인코딩. 코덱이 디코딩할 때 BOM을 뺀다.
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+CONTENT_TYPE_CHARSET = re.compile(r"charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+META_CHARSET = re.compile(rb"<meta[^>]+?charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+
+# 호스트 -> 마지막으로 <meta> 또는 감지(아스키가 아닌 본문)로 알아낸 인코딩.
+# 헤더, BOM, <meta>가 모두 없는 페이지는 같은 호스트의 다른 페이지와 인코딩이 같다고 보고 감지를 건너뛴다.
+HOST_CHARSETS: Dict[str, str] = {}
+
+
+def normalize_charset(name: Optional[str]) -> Optional[str]:
+    """
+    인코딩 이름을 파이썬 코덱 이름으로 바꾼다. EUC-KR은 그 상위 집합인 CP949로 바꾼다
+    (EUC-KR이라고 선언하고 CP949 확장 문자를 쓰는 한국어 사이트가 많음).
+
+    Args:
+        name (Optional[str]): 인코딩 이름.
+
+    Returns:
+        Optional[str]: 코덱 이름. 알 수 없는 이름이면 None.
+    """
+    if not name:
+        return None
+    try:
+        name = codecs.lookup(name).name
+    except LookupError:
+        return None
+    if utils.compare_encoding(name, "euc_kr"):
+        return "cp949"
+    return name
+
+
+def get_header_charset(headers: Dict[str, str]) -> Optional[str]:
+    """
+    Content-Type 헤더에 명시된 charset을 구한다.
+    requests의 res.encoding은 charset이 없는 text/html에도 ISO-8859-1을 주므로 쓰지 않는다.
+
+    Args:
+        headers (Dict[str, str]): 응답 헤더.
+
+    Returns:
+        Optional[str]: 코덱 이름. 없으면 None.
+    """
+    content_type = next((v for k, v in headers.items() if k.lower() == "content-type"), "")
+    match = CONTENT_TYPE_CHARSET.search(content_type)
+    return normalize_charset(match.group(1)) if match else None
+
+
+def get_body(res: "requests.models.Response | ArchivedResponse") -> bytes:
+    """
+    응답 본문(바이트)을 꺼낸다. 본문이 gzip으로 한 번 더 압축되어 있으면(Content-Encoding 없이) 여기서 한 번만 푼다.
+
+    Args:
+        res (requests.models.Response | ArchivedResponse): 응답 객체.
+
+    Returns:
+        bytes: 본문.
+    """
+    content = res.content
+    if content.startswith(GZIP_MAGIC):
+        return gzip.decompress(content)
+    return content
+
+
+def detect_charset(body: bytes) -> str:
+    """
+    인코딩 정보가 없는 본문의 인코딩을 추정한다.
+    utf-8과 cp949로 엄격하게 디코딩되는지를 먼저 확인하고(C에서 한 번 훑음), 둘 다 아니면 통계적 감지를 쓴다.
+
+    Args:
+        body (bytes): 본문.
+
+    Returns:
+        str: 코덱 이름. 추정하지 못하면 "utf-8".
+    """
+    for name in ("utf-8", "cp949"):
+        try:
+            body.decode(name)
+            return name
+        except UnicodeDecodeError:
+            pass
+    from charset_normalizer import from_bytes
+
+    best = from_bytes(body[:DETECT_SIZE]).best()
+    return normalize_charset(best.encoding if best is not None else None) or "utf-8"
+
+
+def get_charset(body: bytes, headers: Dict[str, str], host: str) -> Tuple[str, str]:
+    """
+    본문의 인코딩을 헤더, BOM, 앞부분의 <meta charset>, 호스트별 캐시, 감지(detect_charset()) 순서로 정한다.
+    <meta>나 감지로 알아낸 인코딩은 호스트별 캐시에 넣는다.
+
+    Args:
+        body (bytes): 본문.
+        headers (Dict[str, str]): 응답 헤더.
+        host (str): 응답 url의 호스트.
+
+    Returns:
+        Tuple[str, str]: (코덱 이름, 출처). 출처는 "header" | "bom" | "meta" | "host" | "detect".
+    """
+    charset = get_header_charset(headers)
+    if charset is not None:
+        return charset, "header"
+    for bom, name in BOMS:
+        if body.startswith(bom):
+            return name, "bom"
+    match = META_CHARSET.search(body[:PRESCAN_SIZE])
+    charset = normalize_charset(match.group(1).decode("ascii")) if match else None
+    if charset is not None:
+        HOST_CHARSETS[host] = charset
+        return charset, "meta"
+    if host in HOST_CHARSETS:
+        return HOST_CHARSETS[host], "host"
+    if body.isascii():
+        # 아스키 문자만 있으면 인코딩을 알 수 없으므로(어느 인코딩으로도 같음) 캐시하지 않는다.
+        return "utf-8", "detect"
+    charset = detect_charset(body)
+    HOST_CHARSETS[host] = charset
+    return charset, "detect"
+
+
+def decode_html(res: "requests.models.Response | ArchivedResponse", host: str) -> str:
+    """
+    응답을 html 문자열로 디코딩한다. res.text의 느린 통계적 감지 대신 get_charset()으로 인코딩을 정한다.
+    인코딩을 정한 출처는 charset_source_total 지표에 기록한다.
+
+    Args:
+        res (requests.models.Response | ArchivedResponse): 응답 객체.
+        host (str): 응답 url의 호스트.
+
+    Returns:
+        str: html 문자열. 인코딩에 맞지 않는 바이트는 대체 문자로 바뀐다.
+    """
+    body = get_body(res)
+    charset, source = get_charset(body, res.headers, host)
+    metrics.inc("charset_source_total", source=source)
+    return body.decode(charset, errors="replace")
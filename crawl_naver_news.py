@@ -1,6 +1,7 @@
 #!python
 
 from typing import List
+from article_store import ArticleStore
 import utils
 
 
@@ -20,6 +21,8 @@ def main(keywords: List[str], force_redo: bool = False) -> None:
         search_result = utils.search_crawl(keyword, "news")
 
         utils.write_json_on_file(fname, {"keyword": keyword, "items": search_result})
+        with ArticleStore() as store:
+            store.upsert_articles(utils.FileType.CRAWL_NEWS, keyword, search_result)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,24 @@
 #!python
 
-from typing import List, Tuple
-import requests
+from typing import List, Dict, Set, Tuple, Optional, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from queue import Queue
+from os import makedirs, path
+import os
+import time
 from bs4 import BeautifulSoup
+from article_store import ArticleStore
+from html_archive import HtmlArchive, ArchivedResponse, get_archive, get_response
+import charset
+import metrics
+from retry_queue import get_breaker_key
 import utils
 
+# requests는 타입 힌트에만 쓰인다(요청은 utils가 필요할 때 임포트해서 보냄).
+if TYPE_CHECKING:
+    import requests
+
 
 def get_answer_and_date(answer: BeautifulSoup) -> Tuple[str, str]:
     """
@@ -28,22 +42,17 @@ def get_answer_and_date(answer: BeautifulSoup) -> Tuple[str, str]:
     )
 
 
-def get_kin_text_from_res(
-    res: requests.models.Response,
-) -> Tuple[Tuple[str, str], Tuple[List[str], List[str]]]:
+def get_kin_text_from_html(text: str) -> Tuple[Tuple[str, str], Tuple[List[str], List[str]]]:
     """
-    requests의 응답(response) 객체에서 지식IN 텍스트를 추출.
+    지식IN 질문 페이지의 html 문자열에서 지식IN 텍스트를 추출.
 
     Args:
-        res (requests.models.Response): 지식IN 질문 링크로의 get 응답.
+        text (str): 지식IN 질문 페이지의 html 문자열.
 
     Returns:
         Tuple[str, str, Tuple[List[str], List[str]]]: (질문 본문, 질문 날짜, [응답 본문들], [응답 날짜들]).
     """
-    soup = BeautifulSoup(res.text, "html.parser")
-
-    with open("temp.txt", "wt", encoding="utf8") as f:
-        f.write(res.text)
+    soup = BeautifulSoup(text, "html.parser")
 
     question_selector = "div.c-heading__content"
     answers_selector = "div._endContents"
@@ -63,34 +72,200 @@ def get_kin_text_from_res(
     )
 
 
-def get_kin_text_from_url(url: str) -> Tuple[str, List[str], List[str]]:
+def get_kin_text_from_res(
+    res: "requests.models.Response | ArchivedResponse",
+) -> Tuple[Tuple[str, str], Tuple[List[str], List[str]]]:
+    """
+    requests의 응답(response) 객체에서 지식IN 텍스트를 추출.
+    응답은 charset.decode_html()로 디코딩함.
+
+    Args:
+        res (requests.models.Response | ArchivedResponse): 지식IN 질문 링크로의 get 응답 또는 보관된 응답.
+
+    Returns:
+        Tuple[str, str, Tuple[List[str], List[str]]]: (질문 본문, 질문 날짜, [응답 본문들], [응답 날짜들]).
+    """
+    return get_kin_text_from_html(charset.decode_html(res, utils.get_host_from_url(res.url)))
+
+
+def get_kin_result(text: str) -> Tuple[str, List[str], List[str]]:
+    """
+    html 문자열에서 추출한 지식IN 텍스트를 기사 데이터에 넣는 형태로 바꿈.
+
+    Args:
+        text (str): 지식IN 질문 페이지의 html 문자열.
+
+    Returns:
+        Tuple[str, List[str], List[str]]: (질문 본문, [답변 본문들], [질문 날짜, 답변 날짜들]).
+            질문을 찾지 못하면 ("encoding_error", [], []).
+    """
+    (q, q_d), (a, a_d) = get_kin_text_from_html(text)
+    if not q:
+        return "encoding_error", [], []
+    return q, list(a), [q_d] + list(a_d)
+
+
+def get_kin_text_from_url(
+    url: str,
+    archive: Optional[HtmlArchive] = None,
+    replay: bool = False,
+    cookie: Optional[str] = None,
+) -> Tuple[str, List[str], List[str]]:
     """
     지식인 질문답변 url에서 질문, 답변, 날짜들의 리스트 반환.
+    archive가 주어지면 받은 응답을 보관하고, replay면 요청 대신 보관된 응답에서 추출함(html_archive.py 참조).
+    여러 게시글을 처리할 때는 extract_kin_texts()를 사용할 것.
 
     Args:
         url (str): 지식인 질문 url.
+        archive (Optional[HtmlArchive], optional): 원본 응답 보관소. 기본값 None(보관하지 않음).
+        replay (bool, optional): 네트워크 없이 보관된 응답만 쓸지의 여부. 보관되지 않은 게시글은 "request_error". 기본값 False.
+        cookie (Optional[str], optional): 요청에 넣을 쿠키. None이면 config.ini에서 읽음. 기본값 None.
 
     Returns:
         Tuple[str, List[str], List[str]]: (질문 본문, [답변 본문들], [질문 날짜, 답변 날짜들]).
     """
-    res = utils.get_response_from_url(url, cookie=utils.get_request_cookie())
+    if cookie is None and not replay:
+        cookie = utils.get_request_cookie()
+    res = get_response(url, archive, replay, cookie=cookie)
     if res is None:
         return "request_error", [], []
-    (q, q_d), (a, a_d) = get_kin_text_from_res(res)
-    if not q:
-        return "encoding_error", [], []
-    return q, list(a), [q_d] + list(a_d)
+    text = charset.decode_html(res, utils.get_host_from_url(res.url))
+    with metrics.timer("parse_seconds", stage="kin", host=utils.get_host_from_url(url)):
+        return get_kin_result(text)
+
+
+def parse_kin_html(text: str) -> Tuple[Tuple[str, List[str], List[str]], float]:
+    """
+    파서 프로세스에서 get_kin_result()를 실행함.
+    프로세스의 metrics는 부모에 합쳐지지 않으므로 파싱 시간을 반환해서 부모가 기록하게 함.
 
+    Args:
+        text (str): 지식IN 질문 페이지의 html 문자열.
 
-def main(keywords: List[str], force_redo: bool = False) -> None:
+    Returns:
+        Tuple[Tuple[str, List[str], List[str]], float]: (get_kin_result()의 결과, 파싱 시간(초)).
+    """
+    start = time.perf_counter()
+    result = get_kin_result(text)
+    return result, time.perf_counter() - start
+
+
+def extract_kin_texts(
+    urls: List[str],
+    archive: Optional[HtmlArchive] = None,
+    replay: bool = False,
+    fetch_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    queue_size: int = 64,
+    debug_dir: Optional[str] = None,
+) -> List[Tuple[str, List[str], List[str]]]:
+    """
+    여러 지식IN 게시글의 텍스트를 요청과 파싱을 나눈 두 단계로 추출함(get_news_maintext.extract_texts()와 같은 구조).
+    쿠키는 config.ini에서 한 번만 읽고, fetch_workers개의 스레드가 스레드별 세션(utils.get_session())으로
+    연결을 재사용하며 응답을 받아 크기가 queue_size인 큐에 넣음. bs4 파싱은 parse_workers개의 프로세스가 함.
+    큐가 차면 요청 스레드가 기다리고, 처리 중인 파싱 작업도 parse_workers의 두 배까지만 둠.
+
+    Args:
+        urls (List[str]): 지식IN 질문 url들.
+        archive (Optional[HtmlArchive], optional): 원본 응답 보관소. 기본값 None(보관하지 않음).
+        replay (bool, optional): 네트워크 없이 보관된 응답만 쓸지의 여부. 기본값 False.
+        fetch_workers (int, optional): 요청 스레드 수. 기본값 8.
+        parse_workers (Optional[int], optional): 파서 프로세스 수. None이면 CPU 수, 0이면 프로세스 없이 현재 스레드에서 파싱. 기본값 None.
+        queue_size (int, optional): 요청과 파싱 사이 큐의 크기. 기본값 64.
+        debug_dir (Optional[str], optional): 주어지면 받은 html을 이 폴더에 "{urls의 번호}.html"로 저장함(디버깅용). 기본값 None.
+
+    Returns:
+        List[Tuple[str, List[str], List[str]]]: urls 순서대로의 (질문 본문, [답변 본문들], [질문 날짜, 답변 날짜들]).
+            요청 실패는 질문 본문이 "request_error", 추출 실패는 "encoding_error".
+    """
+    if not urls:
+        return []
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    if debug_dir is not None:
+        makedirs(debug_dir, exist_ok=True)
+    n = len(urls)
+    results: List[Tuple[str, List[str], List[str]]] = [("", [], [])] * n
+    queue: Queue = Queue(queue_size)
+    cookie = None if replay else utils.get_request_cookie()
+
+    def fetch(i: int) -> None:
+        text = None
+        try:
+            session = None if replay else utils.get_session()
+            res = get_response(urls[i], archive, replay, cookie=cookie, session=session)
+            if res is not None:
+                text = charset.decode_html(res, utils.get_host_from_url(res.url))
+                if debug_dir is not None:
+                    with open(path.join(debug_dir, f"{i}.html"), "wt", encoding="utf8") as f:
+                        f.write(text)
+        except Exception as err:
+            # 잘린 gzip 본문(charset.get_body()), requests.exceptions.ContentDecodingError, 디버그 파일 저장 실패 등.
+            # 본문을 받기 전의 오류는 요청 실패로 처리함.
+            print(f"{urls[i]}: {type(err).__name__}: {err}")
+            metrics.inc("fetch_errors_total", host=get_breaker_key(urls[i]), error=type(err).__name__)
+        finally:
+            queue.put((i, text))
+
+    def done(i: int, host: str, result: Tuple[str, List[str], List[str]], elapsed: float) -> None:
+        metrics.observe("parse_seconds", elapsed, stage="kin", host=host)
+        results[i] = result
+
+    pool = ProcessPoolExecutor(parse_workers) if parse_workers else nullcontext()
+    pending: Dict[Future, Tuple[int, str]] = {}
+
+    def collect(futures: Set[Future]) -> None:
+        for future in futures:
+            i, host = pending.pop(future)
+            done(i, host, *future.result())
+
+    with ThreadPoolExecutor(fetch_workers) as fetchers, pool:
+        for i in range(n):
+            fetchers.submit(fetch, i)
+        for count in range(n):
+            if count % 100 == 0:
+                print(f"{count}'th article completed")
+            i, text = queue.get()
+            if text is None:
+                results[i] = ("request_error", [], [])
+                continue
+            host = utils.get_host_from_url(urls[i])
+            if not parse_workers:
+                done(i, host, *parse_kin_html(text))
+                continue
+            while len(pending) >= 2 * parse_workers:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending[pool.submit(parse_kin_html, text)] = (i, host)
+        collect(set(pending))
+    return results
+
+
+def main(
+    keywords: List[str],
+    force_redo: bool = False,
+    replay: bool = False,
+    fetch_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    queue_size: int = 64,
+    debug_dir: Optional[str] = None,
+) -> None:
     """
     키워드들을 가지고 지식IN 링크들에서 본문 추출.
     먼저 검색 api(api_naver_kin.py)를 통해 검색 결과를 수집해야 함.
+    받은 원본 응답은 모두 html_archive의 "kin" 보관소에 보관함.
+    요청과 파싱은 extract_kin_texts()로 나누어 동시에 처리함.
 
     Args:
         keywords (List[str]): 키워드들의 리스트.
         force_redo (bool, optional): 이미 파일이 존재하는 경우에도 다시 수집할지의 여부. 기본적으로는 하지 않음.
+        replay (bool, optional): 네트워크 없이 보관된 응답에서만 본문을 추출할지의 여부. 기본값 False.
+        fetch_workers (int, optional): 요청 스레드 수. 기본값 8.
+        parse_workers (Optional[int], optional): 파서 프로세스 수. None이면 CPU 수, 0이면 프로세스 없이 파싱. 기본값 None.
+        queue_size (int, optional): 요청과 파싱 사이 큐의 크기. 기본값 64.
+        debug_dir (Optional[str], optional): 주어지면 받은 html을 "{debug_dir}/{키워드}/"에 저장함(디버깅용). 기본값 None.
     """
+    archive = get_archive("kin")
     for keyword in keywords:
         fname = f"{utils.FileType.KIN_WT.value}_{keyword}.txt"
         if not force_redo and utils.already(fname):
@@ -99,17 +274,26 @@ def main(keywords: List[str], force_redo: bool = False) -> None:
         articles = utils.get_json_from_file(
             f"{utils.FileType.KIN.value}_{keyword}.txt"
         )["items"]
-        for i, article in enumerate(articles):
-            if i % 100 == 0:
-                print(f"{i}'th article completed")
-            url = article["url_naver"]
-            q, a, d = get_kin_text_from_url(url)
-
+        keyword_debug_dir = None
+        if debug_dir is not None:
+            keyword_debug_dir = path.join(debug_dir, utils.validify_fname(keyword))
+        results = extract_kin_texts(
+            [e["url_naver"] for e in articles],
+            archive,
+            replay,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+            queue_size=queue_size,
+            debug_dir=keyword_debug_dir,
+        )
+        for article, (q, a, d) in zip(articles, results):
             article["question"] = q
             article["answers"] = a
             article["date"] = d
 
         utils.write_json_on_file(fname, {"keyword": keyword, "items": articles})
+        with ArticleStore() as store:
+            store.set_bodies(utils.FileType.KIN, keyword, articles, "get_kin_maintext")
 
 
 if __name__ == "__main__":
@@ -1,220 +1,449 @@
 #!python
 
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Tuple, Optional, TYPE_CHECKING
 
-import gzip
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from queue import Queue, Empty
+import os
 import time
-import re
-from collections import defaultdict
-import requests
-from bs4 import BeautifulSoup
+from article_store import ArticleStore
+from html_archive import HtmlArchive, ArchivedResponse, get_archive, get_response
+import charset
+import metrics
+import parser_backend
+from news_rules import NewsRules, get_host
+from retry_queue import CircuitBreaker, RetryQueue, get_breaker_key
 import utils
 
+# requests는 타입 힌트에만 쓰인다(요청은 utils가 필요할 때 임포트해서 보냄).
+if TYPE_CHECKING:
+    import requests
+
+# 파서 프로세스가 쓰는 규칙과 파서 백엔드 이름. init_parser()로 프로세스마다 한 번 설정된다.
+PARSER_RULES: Optional[NewsRules] = None
+PARSER_BACKEND = parser_backend.DEFAULT_BACKEND
+
+# 스트리밍으로 받을 때(stream=True) 기사 페이지 본문의 최대 크기(바이트).
+MAX_BODY_SIZE = 4 << 20
+
 
 def get_news_text_from_res(
-    res: requests.models.Response, maps: Dict[str, Dict[str, str] | Set[str]]
+    res: "requests.models.Response | ArchivedResponse",
+    rules: NewsRules,
+    parser: str = parser_backend.DEFAULT_BACKEND,
 ) -> str:
     """
     requests 모듈의 응답 객체(Response)를 이용해서 뉴스 본문을 추출.
-    응답이 gzip으로 압축되어 있는 경우가 있어 확인한 후 압축을 해제함.
+    응답은 charset.decode_html()로 디코딩함(gzip 해제, 인코딩 판별).
+    호스트별 파싱 시간과 셀렉터 적중 여부를 metrics에 기록함.
 
     Args:
-        res (requests.models.Response): requests 모듈의 응답 객체.
-        maps (Dict[str, Dict[str, str] | Set[str]]): css 셀렉터, 리디렉션, 본문이 들어있는 태그 속성 딕셔너리들.
+        res (requests.models.Response | ArchivedResponse): requests 모듈의 응답 객체 또는 보관된 응답.
+        rules (NewsRules): 본문 추출 규칙(news_rules.py 참조).
+        parser (str, optional): 파서 백엔드 이름(parser_backend.py 참조). 기본값 "lxml".
 
     Returns:
         str: 뉴스 기사 본문.
     """
-    text = (
-        gzip.decompress(res.content).decode("utf-8")
-        if res.content.startswith(b"\x1f\x8b\x08")
-        else res.text
-    )
+    host = get_host(res.url)
+    text = charset.decode_html(res, host)
+    attempts = []
+    with metrics.timer("parse_seconds", stage="news", host=host):
+        text, source = get_news_text_from_html(text, host, rules, parser, attempts)
+    metrics.inc("selector_hits_total", host=host, source=source)
+    metrics.observe("selector_attempts", len(attempts), stage="news")
+    rules.selector_stats.update(host, attempts)
+    return text
 
-    url = res.url
-    host = utils.get_host_from_url(url)
-    selectors = get_news_selector_from_host(host, maps["selector"])
 
-    soup = BeautifulSoup(text, "html.parser")
-    for selector in selectors:
-        result = soup.select_one(selector)
-        if result is None:
-            continue
-        ret = get_text_from_soup(result, host, maps["attribute"])
-        if len(ret) < utils.NEWS_MAINTEXT_LOWER_BOUND:
-            continue
-        return get_text_from_soup(result, host, maps["attribute"])
+def get_news_text_from_html(
+    text: str,
+    host: str,
+    rules: NewsRules,
+    parser: str = parser_backend.DEFAULT_BACKEND,
+    attempts: Optional[List[Tuple[str, bool]]] = None,
+) -> Tuple[str, str]:
+    """
+    html 문자열에서 뉴스 본문을 추출하고, 어느 셀렉터로 찾았는지를 함께 반환.
+    호스트에 등록된 셀렉터를 성공률 순서(selector_stats.py)로 먼저 시도하고, 실패하면 모든 호스트의 셀렉터(selector_set)를 순서대로 시도함.
+    selector_set은 셀렉터마다 트리를 탐색하지 않고, 컴파일된 매처(rules.selector_matcher)로 문서를 한 번만 순회해서 후보 요소들을 찾음.
+    selector_set에서 찾은 셀렉터는 해당 호스트의 셀렉터로 등록함.
+    찾은 요소의 본문은 한 번만 추출해서 길이 확인과 반환에 함께 씀.
+
+    Args:
+        text (str): 기사 페이지의 html 문자열.
+        host (str): 기사 사이트 호스트(news_rules.get_host()).
+        rules (NewsRules): 본문 추출 규칙(news_rules.py 참조).
+        parser (str, optional): 파서 백엔드 이름. "lxml"(기본값) | "bs4"(원래 구현, 결과 비교의 기준).
+        attempts (Optional[List[Tuple[str, bool]]], optional): 주어지면 시도한 셀렉터와 성공 여부를 순서대로 덧붙임.
+            호스트의 셀렉터와, selector_set에서 새로 찾은 셀렉터(성공)가 기록됨. SelectorStats.update()에 넘김.
+
+    Returns:
+        Tuple[str, str]: (뉴스 기사 본문, 셀렉터 출처).
+            셀렉터 출처는 "host"(호스트에 등록된 셀렉터), "fallback"(selector_set), "miss"(찾지 못함) 중 하나.
+    """
+    selectors = rules.get_selectors(host)
+    if attempts is None:
+        attempts = []
 
-    for selector in maps["selector_set"]:
-        result = soup.select_one(selector)
+    backend = parser_backend.get_backend(parser)
+    attribute = rules.get_attribute(host)
+
+    root = backend.parse(text)
+    for selector in selectors:
+        result = backend.select_one(root, selector)
+        ret = "" if result is None else backend.get_text(result, attribute)
+        hit = len(ret) >= utils.NEWS_MAINTEXT_LOWER_BOUND
+        attempts.append((selector, hit))
+        if hit:
+            return ret, "host"
+
+    # 여러 셀렉터가 같은 요소를 찾는 경우가 많으므로 요소별 본문은 한 번만 추출함.
+    texts = {}
+    candidates = rules.selector_matcher.select_first(backend, root)
+    for selector, result in zip(rules.selector_set, candidates):
         if result is None:
             continue
-        ret = get_text_from_soup(result, host, maps["attribute"])
+        if id(result) not in texts:
+            texts[id(result)] = backend.get_text(result, attribute)
+        ret = texts[id(result)]
         if len(ret) < utils.NEWS_MAINTEXT_LOWER_BOUND:
             continue
-        maps["selector"][host].append(selector)
-        return ret
+        rules.learn(host, selector)
+        attempts.append((selector, True))
+        return ret, "fallback"
 
-    return ""
+    return "", "miss"
 
 
-def get_redirection_link(url: str, redirect_dict: Dict[str, str]) -> str:
+def get_news_text_from_url(
+    url: str,
+    rules: NewsRules,
+    archive: Optional[HtmlArchive] = None,
+    replay: bool = False,
+    parser: str = parser_backend.DEFAULT_BACKEND,
+) -> str:
     """
-    많은 리디렉션이 일어나 일반적으로 수집할 수 없거나, 감지할 수 없는 리디렉션이 있거나(주로 js를 이용한),
-    기타 다른 링크를 활용해야 하는 상황에서 현재 url을 리디렉션이 완료된 url로 바꿈.
-    이 과정은 redirect_dict의 매핑에 의해 이루어짐.
+    url에서 뉴스 기사 본문을 추출함.
+    사이트에서 제대로 된 응답을 받지 못하면 "request error"를,
+    파싱이나 기사 본문 추출을 제대로 하지 못하면 "encoding error"를 반환.
+    archive가 주어지면 받은 응답을 보관하고, replay면 요청 대신 보관된 응답에서 추출함(html_archive.py 참조).
 
     Args:
-        url (str): 원래 기사 url.
+        url (str): 기사 url.
+        rules (NewsRules): 본문 추출 규칙(news_rules.py 참조).
+        archive (Optional[HtmlArchive], optional): 원본 응답 보관소. 기본값 None(보관하지 않음).
+        replay (bool, optional): 네트워크 없이 보관된 응답만 쓸지의 여부. 보관되지 않은 기사는 "request_error". 기본값 False.
+        parser (str, optional): 파서 백엔드 이름(parser_backend.py 참조). 기본값 "lxml".
 
     Returns:
-        str: 리디렉션 결과로 변환된 기사 url.
+        str: 기사 본문 문자열.
     """
+    url = rules.get_redirection_link(url)
+    res = get_response(url, archive, replay)
+    if res is None:
+        return "request_error"
+    text = get_news_text_from_res(res, rules, parser)
+    if not text:
+        return "encoding_error"
+    return text
 
-    host = utils.get_host_from_url(url)
-    if host not in redirect_dict:
-        return url
 
-    pats, pre, post = redirect_dict[host]
-    for pat in pats:
-        key = re.search(pat, url)
-        if key is None:
-            continue
-        key = key.group(1)
-        return pre + key + post
-    return url
+def init_parser(rules: NewsRules, parser: str) -> None:
+    """
+    파서 프로세스의 초기화 함수. 규칙을 작업마다 보내지 않도록 프로세스마다 한 번 받아 둠.
 
+    Args:
+        rules (NewsRules): 본문 추출 규칙.
+        parser (str): 파서 백엔드 이름.
+    """
+    global PARSER_RULES, PARSER_BACKEND
+    PARSER_RULES = rules
+    PARSER_BACKEND = parser
 
-def get_text_from_soup(
-    soup: BeautifulSoup, host: str, attr_dict: Dict[str, str]
-) -> str:
+
+def parse_html(
+    text: str, host: str
+) -> Tuple[str, str, Optional[str], List[Tuple[str, bool]], float]:
     """
-    css 셀렉터를 이용해 추출된 bs 객체에서, 기사 텍스트만 추출하고 스트립함.
-    기본 동작은 soup.get_text()를 이용해 태그가 없는 텍스트만 추출.
-    다만, 일부 기사는 태그 내부 속성(attribute)에 기사 본문이 있는 경우가 있음.
-    이 경우 attr_dict의 매핑에 기반해서 해당 속성의 값 추출.
+    파서 프로세스에서 get_news_text_from_html()을 실행함.
+    프로세스의 metrics와 셀렉터 통계는 부모에 합쳐지지 않으므로,
+    파싱 시간, 새로 찾은 셀렉터, 시도한 셀렉터들을 반환해서 부모가 기록하게 함.
 
     Args:
-        soup (BeautifulSoup): 셀렉터를 이용해 필터링이 완료된 bs 객체.
+        text (str): 기사 페이지의 html 문자열.
         host (str): 기사 사이트 호스트.
-        attr_dict (Dict[str, str]): 호스트별 본문이 들어있는 태그 속성 매핑 딕셔너리.
 
     Returns:
-        str: 기사 본문 문자열.
+        Tuple[str, str, Optional[str], List[Tuple[str, bool]], float]:
+            (본문, 셀렉터 출처, selector_set에서 새로 찾은 셀렉터, 시도한 셀렉터와 성공 여부들, 파싱 시간(초)).
     """
-
-    key = attr_dict.get(host, "")
-    if not key:
-        return soup.get_text().strip()
-    return soup[key].strip()
-
-
-def get_news_selector_from_host(host: str, selector_dict: Dict[str, str]) -> List[str]:
+    start = time.perf_counter()
+    attempts = []
+    text, source = get_news_text_from_html(text, host, PARSER_RULES, PARSER_BACKEND, attempts)
+    learned = PARSER_RULES.selector[host][-1] if source == "fallback" else None
+    return text, source, learned, attempts, time.perf_counter() - start
+
+
+def extract_texts(
+    urls: List[str],
+    rules: NewsRules,
+    archive: Optional[HtmlArchive] = None,
+    replay: bool = False,
+    prefer_archive: bool = False,
+    fetch_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    queue_size: int = 64,
+    parser: str = parser_backend.DEFAULT_BACKEND,
+    stream: bool = False,
+    max_bytes: int = MAX_BODY_SIZE,
+    max_retries: int = 3,
+    breaker: Optional[CircuitBreaker] = None,
+) -> List[str]:
     """
-    selector_dict의 매핑과 기사 호스트를 통해 해당하는 css 셀렉터 리스트를 추출함.
-    결과는 셀렉터 문자열의 리스트인데, 일부 사이트는 기사마다 셀렉터가 달라서 그럼.
-    만약 그 파일에 답이 없으면 가장 자주 쓰이는 것으로 보이는 ["#article-view-content-div"]를 반환.
+    여러 기사의 본문을 요청과 파싱을 나눈 두 단계로 추출함.
+    fetch_workers개의 스레드가 응답을 받아 크기가 queue_size인 큐에 넣고,
+    parse_workers개의 프로세스가 셀렉터, 속성 추출(CPU 작업)을 함. 파싱은 GIL에 묶이지 않음.
+    큐가 차면 요청 스레드가 기다리고, 처리 중인 파싱 작업도 parse_workers의 두 배까지만 두므로
+    파싱이 밀리면 요청도 그만큼 늦춰짐(backpressure).
+    파서 프로세스가 selector_set에서 새로 찾은 셀렉터는 rules.selector에, 시도한 셀렉터들의 결과는 rules.selector_stats에 반영함.
+    파서 프로세스는 호출할 때의 통계로 셀렉터 순서를 정하므로, 통계는 다음 호출(다음 키워드)부터 순서에 반영됨.
+    stream이면 본문을 청크 단위로 받으면서 점진적 파서에 넣고(parser_backend.ContainerWatcher),
+    호스트에 등록된 셀렉터의 본문 요소가 닫히면 나머지를 받지 않음. 본문은 max_bytes까지만 받음.
+    요청에 실패한(시간 초과, 연결 오류, 5xx) 기사는 지수 백오프와 jitter를 두고 max_retries번까지 다시 요청하며(retry_queue.RetryQueue),
+    기한이 된 재시도는 새 기사보다 먼저 요청 스레드에 넣으므로 재시도를 위한 별도의 단계가 없음.
+    요청 스레드에 넣어 두는 작업은 fetch_workers + queue_size개까지이므로, 재시도는 많아야 그만큼의 새 기사 뒤에서 요청됨.
+    연속으로 실패한 호스트는 회로 차단기(retry_queue.CircuitBreaker)가 막아서 시간 초과를 기다리지 않고 바로 실패함.
 
     Args:
-        host (str): 기사 사이트의 url 호스트.
-        selector_dict (Dict[str, str]): 호스트별 셀렉터 매핑 딕셔너리.
+        urls (List[str]): 기사 url들.
+        rules (NewsRules): 본문 추출 규칙(news_rules.py 참조).
+        archive (Optional[HtmlArchive], optional): 원본 응답 보관소. 기본값 None(보관하지 않음).
+        replay (bool, optional): 네트워크 없이 보관된 응답만 쓸지의 여부. 기본값 False.
+        prefer_archive (bool, optional): 끝까지 보관된 응답이 있는 기사는 요청하지 않고 그것을 쓸지의 여부.
+            stream으로 일부만 받아 보관된 기사는 다시 요청함. 기본값 False.
+        fetch_workers (int, optional): 요청 스레드 수. 기본값 8.
+        parse_workers (Optional[int], optional): 파서 프로세스 수. None이면 CPU 수, 0이면 프로세스 없이 현재 스레드에서 파싱(프로파일링용).
+        queue_size (int, optional): 요청과 파싱 사이 큐의 크기. 요청 스레드에 넣어 두는 작업 수도 fetch_workers + queue_size로 정함.
+            작게 하면 파싱이 밀릴 때 요청이 더 빨리 멈추고 재시도도 더 빨리 요청됨. 기본값 64.
+        parser (str, optional): 파서 백엔드 이름(parser_backend.py 참조). 기본값 "lxml".
+        stream (bool, optional): 본문을 스트리밍으로 받고 본문 요소가 닫히면 멈출지의 여부. 기본값 False.
+        max_bytes (int, optional): stream일 때 본문의 최대 크기(바이트). 기본값 MAX_BODY_SIZE.
+        max_retries (int, optional): 요청에 실패한 기사의 최대 재시도 횟수. 시간 초과, 연결 오류, 5xx, 회로가 열린 호스트만 재시도하며,
+            4xx와 보관된 응답을 쓰는 기사는 재시도하지 않음. 기본값 3.
+        breaker (Optional[CircuitBreaker], optional): 호스트별 회로 차단기. 여러 번 호출할 때 호스트 상태를 이어 쓰려면 넘김. 기본값 None(새로 만듦).
 
     Returns:
-        List[str]: css 셀렉터들의 리스트.
+        List[str]: urls 순서대로의 본문. 요청 실패는 "request_error", 추출 실패는 "encoding_error".
+    """
+    if not urls:
+        return []
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    n = len(urls)
+    results = [""] * n
+    queue: Queue = Queue(queue_size)
+    if breaker is None:
+        breaker = CircuitBreaker()
+    retries = RetryQueue(max_retries)
+    stream_args = {}
+    if stream:
+        stream_args = {
+            "max_bytes": max_bytes,
+            "get_watcher": lambda url: getattr(rules.get_container_watcher(url), "feed", None),
+        }
+
+    def fetch(i: int, attempt: int) -> None:
+        # 실패하면 retry_url에 다시 요청할 url을 넣음. 다시 시도해도 같은 실패(4xx, 보관된 응답이 없음, 예외)는 None.
+        item, retry_url = None, None
+        try:
+            url = rules.get_redirection_link(urls[i])
+            use_archive = replay or (
+                prefer_archive and archive is not None and archive.is_complete(url)
+            )
+            failures: List[bool] = []
+            res = get_response(
+                url, archive, use_archive, breaker=breaker, failures=failures, **stream_args
+            )
+            if res is not None:
+                host = get_host(res.url)
+                item = (charset.decode_html(res, host), host)
+            elif failures and failures[-1]:
+                retry_url = url
+        except Exception as err:
+            # 잘린 gzip 본문(charset.get_body()), requests.exceptions.ContentDecodingError 등. 요청 실패로 처리함.
+            print(f"{urls[i]}: {type(err).__name__}: {err}")
+            metrics.inc("fetch_errors_total", host=get_breaker_key(urls[i]), error=type(err).__name__)
+        finally:
+            queue.put((i, attempt, retry_url, item))
+
+    def done(
+        i: int,
+        host: str,
+        text: str,
+        source: str,
+        learned: Optional[str],
+        attempts: List[Tuple[str, bool]],
+        elapsed: float,
+    ) -> None:
+        metrics.observe("parse_seconds", elapsed, stage="news", host=host)
+        metrics.inc("selector_hits_total", host=host, source=source)
+        metrics.observe("selector_attempts", len(attempts), stage="news")
+        rules.selector_stats.update(host, attempts)
+        if learned is not None:
+            rules.learn(host, learned)
+        results[i] = text or "encoding_error"
+
+    pool = (
+        ProcessPoolExecutor(parse_workers, initializer=init_parser, initargs=(rules, parser))
+        if parse_workers
+        else nullcontext()
+    )
+    pending: Dict[Future, Tuple[int, str]] = {}
+
+    def collect(futures: Set[Future]) -> None:
+        for future in futures:
+            i, host = pending.pop(future)
+            done(i, host, *future.result())
+
+    with ThreadPoolExecutor(fetch_workers) as fetchers, pool:
+        fresh = iter(range(n))
+        # 요청 스레드에 넣어 두는 작업 수를 요청 중인 것(fetch_workers)과 큐를 채울 만큼(queue_size)으로 제한함.
+        # 큐가 차면 요청 스레드가 기다리므로 backpressure는 그대로이고, 기한이 된 재시도는 그 뒤에만 밀림.
+        max_inflight = fetch_workers + queue_size
+        inflight, count = 0, 0
+        while count < n:
+            while inflight < max_inflight:
+                job = retries.pop_due()
+                if job is None:
+                    i = next(fresh, None)
+                    if i is None:
+                        break
+                    job = (i, 0)
+                fetchers.submit(fetch, *job)
+                inflight += 1
+            try:
+                i, attempt, retry_url, item = queue.get(
+                    timeout=None if inflight >= max_inflight else retries.get_wait()
+                )
+            except Empty:
+                continue
+            inflight -= 1
+            if item is None and retry_url is not None:
+                if retries.push(i, attempt + 1, breaker.get_wait(retry_url)):
+                    metrics.inc("fetch_retries_total", host=get_breaker_key(retry_url))
+                    continue
+            if count % 100 == 0:
+                print(f"{count}'th article completed")
+            count += 1
+            if item is None:
+                results[i] = "request_error"
+                continue
+            text, host = item
+            if not parse_workers:
+                start = time.perf_counter()
+                attempts = []
+                text, source = get_news_text_from_html(text, host, rules, parser, attempts)
+                done(i, host, text, source, None, attempts, time.perf_counter() - start)
+                continue
+            while len(pending) >= 2 * parse_workers:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending[pool.submit(parse_html, text, host)] = (i, host)
+        collect(set(pending))
+    return results
+
+
+def get_maps_snapshot_fname(fname: str) -> str:
     """
+    본문 파일을 만들 때 쓴 맵들의 스냅샷 파일명을 반환함.
+    reextract_news_maintext.py가 지금의 맵과 비교해서 바뀐 호스트만 다시 추출할 때 사용함.
 
-    selector = selector_dict.get(host, ["#article-view-content-div"])
+    Args:
+        fname (str): 본문이 추가된 기사 데이터 파일명.
 
-    return selector
+    Returns:
+        str: 스냅샷 파일명.
+    """
+    return f"{fname}.maps.json"
 
 
-def get_news_text_from_url(url: str, maps: Dict[str, Dict[str, str] | Set[str]]) -> str:
+def write_maps_snapshot(fname: str, rules: NewsRules) -> None:
     """
-    url에서 뉴스 기사 본문을 추출함.
-    사이트에서 제대로 된 응답을 받지 못하면 "request error"를,
-    파싱이나 기사 본문 추출을 제대로 하지 못하면 "encoding error"를 반환.
+    본문 파일을 만들 때 쓴 셀렉터, 리디렉션, 속성 맵을 스냅샷으로 저장함.
 
     Args:
-        url (str): 기사 url.
-        maps (Dict[str, Dict[str, str] | Set[str]]): css 셀렉터, 리디렉션, 본문이 들어있는 태그 속성 딕셔너리들.
-
-    Returns:
-        str: 기사 본문 문자열.
+        fname (str): 본문이 추가된 기사 데이터 파일명.
+        rules (NewsRules): 본문 추출 규칙.
     """
-    url = get_redirection_link(url, maps["redirect"])
-    res = utils.get_response_from_url(url)
-    if res is None:
-        return "request_error"
-    text = get_news_text_from_res(res, maps)
-    if not text:
-        return "encoding_error"
-    return text
+    utils.write_json_on_file(get_maps_snapshot_fname(fname), rules.get_snapshot())
 
 
 def main(
-    keywords: List[str], filetype: utils.FileType, force_redo: bool = False
+    keywords: List[str],
+    filetype: utils.FileType,
+    force_redo: bool = False,
+    replay: bool = False,
+    fetch_workers: int = 8,
+    parse_workers: Optional[int] = None,
+    queue_size: int = 64,
+    parser: str = parser_backend.DEFAULT_BACKEND,
+    stream: bool = False,
+    max_bytes: int = MAX_BODY_SIZE,
+    max_retries: int = 3,
 ) -> None:
     """
     키워드들을 가지고, 그 키워드에 대한 기사 링크 데이터를 찾아서,
     본문을 추가해 json 형태로 새로운 파일에 저장함.
+    받은 원본 응답은 모두 html_archive의 "news" 보관소에 보관함.
+    요청과 파싱은 extract_texts()로 나누어 동시에 처리함. 실패한 요청의 재시도도 extract_texts()가 새 요청과 섞어서 처리하며,
+    호스트별 회로 차단기는 모든 키워드에서 함께 씀.
 
     Args:
         keywords (List[str]): 키워드들의 리스트.
         filetype (utils.FileType): 기사 링크 데이터의 파일타입(utils.py 참조).
         force_redo (bool, optional): 이미 파일이 존재하는 경우에도 다시 수집할지의 여부. 기본적으로는 하지 않음.
+        replay (bool, optional): 네트워크 없이 보관된 응답에서만 본문을 추출할지의 여부. 셀렉터를 추가한 뒤 다시 추출할 때 사용. 기본값 False.
+        fetch_workers (int, optional): 요청 스레드 수. 기본값 8.
+        parse_workers (Optional[int], optional): 파서 프로세스 수. None이면 CPU 수, 0이면 프로세스 없이 파싱. 기본값 None.
+        queue_size (int, optional): 요청과 파싱 사이 큐의 크기. 기본값 64.
+        parser (str, optional): 파서 백엔드 이름(parser_backend.py 참조). 기본값 "lxml".
+        stream (bool, optional): 본문을 스트리밍으로 받고 본문 요소가 닫히면 멈출지의 여부(extract_texts() 참조). 기본값 False.
+        max_bytes (int, optional): stream일 때 본문의 최대 크기(바이트). 기본값 MAX_BODY_SIZE.
+        max_retries (int, optional): 요청에 실패한 기사의 최대 재시도 횟수. 기본값 3.
     """
-    maps = {
-        "selector": utils.get_json_from_file(
-            f"{utils.MATERIALS}/news_maintext_selectors.txt"
-        ),
-        "redirect": utils.get_json_from_file(
-            f"{utils.MATERIALS}/news_maintext_redirections.txt"
-        ),
-        "attribute": utils.get_json_from_file(
-            f"{utils.MATERIALS}/news_maintext_attributes.txt"
-        ),
-    }
-    maps["selector"] = defaultdict(list, maps["selector"])
-    maps["selector_set"] = set(sum(maps["selector"].values(), []))
-    maps["selector_set"].add("#article-view-content-div")
+    rules = NewsRules.load()
+    archive = get_archive("news")
+    breaker = CircuitBreaker()
 
     for keyword in keywords:
-        errors = {"request_error": [], "encoding_error": []}
         fname = utils.validify_fname(f"{filetype.value}_with_text_{keyword}.txt")
         if not force_redo and utils.already(fname):
             continue
 
         original_fname = utils.validify_fname(f"{filetype.value}_{keyword}.txt")
         articles = utils.get_json_from_file(original_fname)["items"]
-        for i, article in enumerate(articles):
-            if i % 100 == 0:
-                print(f"{i}'th article completed")
-            url = article["url_naver"]
-            text = get_news_text_from_url(url, maps)
-
-            if text in errors:
-                errors[text].append((i, url))
-
+        workers = {
+            "fetch_workers": fetch_workers,
+            "parse_workers": parse_workers,
+            "queue_size": queue_size,
+            "parser": parser,
+            "stream": stream,
+            "max_bytes": max_bytes,
+            "max_retries": max_retries,
+            "breaker": breaker,
+        }
+        texts = extract_texts(
+            [e["url_naver"] for e in articles], rules, archive, replay, **workers
+        )
+        for article, text in zip(articles, texts):
             article["text"] = text
 
-        print("processing failed requests...")
-        time.sleep(5)
-        for i in range(3):
-            time.sleep(1)
-            del_list = []
-            for i, (article_idx, url) in enumerate(errors["request_error"]):
-                text = get_news_text_from_url(url, maps)
-                articles[article_idx]["text"] = text
-                if text in errors:
-                    continue
-                del_list.append(i)
-            for i in del_list[::-1]:
-                del errors["request_error"][i]
-
         utils.write_json_on_file(fname, {"keyword": keyword, "items": articles})
-        utils.write_json_on_file(
-            f"{utils.MATERIALS}/news_maintext_selectors.txt", maps["selector"]
-        )
+        write_maps_snapshot(fname, rules)
+        with ArticleStore() as store:
+            store.set_bodies(filetype, keyword, articles, "get_news_maintext")
+        rules.save()
 
 
 if __name__ == "__main__":
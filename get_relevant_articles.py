@@ -1,53 +1,465 @@
 #!python
 
-from typing import List, Dict, Tuple, Callable, Optional
+from typing import List, Dict, Tuple, Optional, Iterable
 from random import random
-from functools import wraps
+from os import remove, path
 import asyncio
+import json
+import time
 from httpx import Timeout
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DEFAULT_MAX_RETRIES
+from article_store import ArticleStore
+import metrics
 import utils
 
+# 판정에 사용할 모델.
+MODEL = "gpt-3.5-turbo"
 
-async def get_relatedness_list(
-    articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
-    keyword: str,
-    description: str,
-    key: str,
-    org: str,
-) -> List[Tuple[bool, str]]:
+# 모델의 컨텍스트 윈도우(토큰 수).
+# 게시글(아티클)이 이 안에 들어가도록 get_budgeted_text()로 줄여서 보낸다.
+CONTEXT_WINDOW = 16385
+
+# 응답(Y/N과 이유)을 위해 남겨두는 토큰 수.
+RESPONSE_TOKENS = 500
+
+# 토큰 수 추정의 오차를 감안해 실제 예산에 곱하는 비율.
+TOKEN_SAFETY_RATIO = 0.9
+
+# 예산에 맞추기 위해 본문을 잘랐을 때 끝에 붙이는 표시.
+TRUNCATION_MARK = "\n(이하 생략)"
+
+# 모델별 100만 토큰당 가격(USD): (입력, 출력).
+# 비용 추정(metrics의 llm_cost_usd_total)에만 사용한다.
+MODEL_PRICES = {"gpt-3.5-turbo": (0.5, 1.5)}
+
+# 배치 작업(Batch API)의 가격 할인율.
+BATCH_PRICE_RATIO = 0.5
+
+# 배치 작업이 이 상태 중 하나가 되면 폴링을 멈춘다.
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
 
-    client = AsyncOpenAI(
+
+def get_client(
+    key: str, org: str, base_url: Optional[str] = None, max_retries: int = DEFAULT_MAX_RETRIES
+) -> AsyncOpenAI:
+    """
+    OpenAI API 비동기 클라이언트를 만든다.
+
+    Args:
+        key (str): OpenAI API 키.
+        org (str): OpenAI API Organization.
+        base_url (Optional[str], optional): API 서버 주소. None이면 OpenAI 기본 주소. 로컬 모의 서버를 쓸 때 지정.
+        max_retries (int, optional): 클라이언트가 안에서 재시도하는 횟수. 이 재시도는 retried_articles에 세지 않는다.
+            기본값 openai.DEFAULT_MAX_RETRIES(2).
+
+    Returns:
+        AsyncOpenAI: OpenAI 요청 클라이언트 객체(비동기).
+    """
+    return AsyncOpenAI(
         api_key=key,
         organization=org,
+        base_url=base_url,
         timeout=Timeout(15.0, read=5.0, write=10.0, connect=3.0),
+        max_retries=max_retries,
     )
 
+
+def get_base_query(keyword: str, description: str) -> List[Dict[str, str]]:
+    """
+    연관성 판정을 지시하는 시스템 프롬프트 메시지 리스트를 만든다.
+
+    Args:
+        keyword (str): 데이터셋의 중심이 되는 하나의 키워드.
+        description (str): 해당 키워드에 대한 긴 글 설명.
+
+    Returns:
+        List[Dict[str, str]]: 시스템 프롬프트가 담긴 기본 메시지 리스트.
+    """
     INST = f"""기사 또는 게시글의 제목과 내용이 주어진다.
 해당 게시글의 토픽이 "{keyword}"과 연관성을 가지고 있는지 파악하라.
 "{keyword}"란, {description}
 첫째 줄에 Y/N만을, 둘째 줄에 그 이유만을 간략하게 서술하고 그 외에 아무것도 작성하지 마라."""
-    base_query = [{"role": "system", "content": INST}]
+    return [{"role": "system", "content": INST}]
+
 
-    global tried_articles, succed_articles
+def get_request_body(
+    title: str, text: str, base_query: List[Dict[str, str]]
+) -> Dict[str, str | float | List[Dict[str, str]]]:
+    """
+    chat completions 요청 본문을 만든다.
+    실시간 요청과 배치 요청이 같은 본문을 사용한다.
+
+    Args:
+        title (str): 게시글(아티클) 제목.
+        text (str): 게시글(아티클) 본문.
+        base_query (List[Dict[str, str]]): 시스템 프롬프트가 담긴 기본 메시지 리스트.
+
+    Returns:
+        Dict[str, str | float | List[Dict[str, str]]]: chat completions 요청 본문 딕셔너리.
+    """
+    content = f"제목 : {title}\n내용 : {text}"
+    return {
+        "model": MODEL,
+        "messages": base_query + [{"role": "user", "content": content}],
+        "temperature": 0.5,
+    }
+
+
+def parse_answer(result: str) -> Tuple[bool, str]:
+    """
+    모델의 응답 문자열을 (연관 여부, 이유)로 변환한다.
+    첫째 줄이 Y/N이 아니면 유관한 것으로 간주한다.
+
+    Args:
+        result (str): 모델의 응답 문자열.
+
+    Returns:
+        Tuple[bool, str]: (연관 여부, 이유).
+    """
+    tf, *reason = result.split("\n")
+
+    if tf.upper() == "Y":
+        tf = True
+    elif tf.upper() == "N":
+        tf = False
+    else:
+        print(f"exception case: {tf}")
+        tf = True
+    reason = "\n".join(reason).replace("이유:", "").strip()
+    return tf, reason
+
+
+async def get_relatedness_list(
+    articles: Iterable[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+    keyword: str,
+    description: str,
+    key: str,
+    org: str,
+    journal: Optional[str] = None,
+    base_url: Optional[str] = None,
+    concurrency: int = 30,
+    backoff: float = 6,
+    client_retries: int = DEFAULT_MAX_RETRIES,
+) -> List[Tuple[bool, str]]:
+    """
+    게시글(아티클)들의 키워드 연관성을 OpenAI API로 판정한다.
+    동시에 최대 concurrency개의 요청을 보내며, 하나가 끝나면 곧바로 다음 아티클을 요청한다.
+    articles는 리스트가 아니어도 되며 필요한 만큼만 꺼내 쓰므로,
+    제너레이터를 넘기면 전체 아티클을 메모리에 올리지 않고도 판정할 수 있다.
+    journal이 주어지면 판정이 하나 끝날 때마다 그 결과를 journal 파일에 덧붙인다.
+
+    실행이 끝나면 모듈 전역의 tried_articles, succed_articles, retried_articles, latencies에서
+    시도/성공/재시도 횟수와 아티클별 응답 시간(초)을 확인할 수 있다.
+
+    Args:
+        articles (Iterable[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 판정할 아티클들.
+        keyword (str): 데이터셋의 중심이 되는 하나의 키워드.
+        description (str): 해당 키워드에 대한 긴 글 설명.
+        key (str): OpenAI API 키.
+        org (str): OpenAI API Organization.
+        journal (Optional[str], optional): 판정 결과를 실시간으로 기록할 jsonl 파일명. 기본값은 None(기록하지 않음).
+        base_url (Optional[str], optional): API 서버 주소. 기본값은 None(OpenAI 기본 주소).
+        concurrency (int, optional): 동시에 보내는 최대 요청 수. 기본값 30.
+        backoff (float, optional): 요청 실패 시 처음 기다리는 시간의 2의 지수. 기본값 6(약 64초).
+        client_retries (int, optional): openai 클라이언트가 안에서 재시도하는 횟수(get_client() 참조).
+            0이면 모든 재시도를 get_nth_answer_async()가 하므로 retried_articles가 전체 재시도 횟수가 된다.
+            기본값 openai.DEFAULT_MAX_RETRIES(2).
+
+    Returns:
+        List[Tuple[bool, str]]: 입력 순서대로의 (연관 여부, 이유) 리스트.
+    """
+
+    client = get_client(key, org, base_url, client_retries)
+    base_query = get_base_query(keyword, description)
+
+    global tried_articles, succed_articles, retried_articles, latencies
     tried_articles = 0
     succed_articles = 0
+    retried_articles = 0
+    latencies = []
+
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    for i, article in enumerate(articles):
+        await semaphore.acquire()
+        task = asyncio.create_task(
+            get_journaled_answer_async(
+                client, i, article, base_query, journal, backoff=backoff
+            )
+        )
+        task.add_done_callback(lambda _: semaphore.release())
+        tasks.append(task)
+    return list(await asyncio.gather(*tasks))
+
+
+async def get_journaled_answer_async(
+    client: AsyncOpenAI,
+    i: int,
+    article: Dict[str, Optional[str | List[str] | List[List[str]]]],
+    base_query: List[Dict[str, str]],
+    journal: Optional[str],
+    backoff: float = 6,
+) -> Tuple[bool, str]:
+    """
+    get_nth_answer_async()로 판정한 뒤,
+    journal이 주어졌다면 그 결과를 곧바로 journal 파일에 덧붙인다.
 
-    n = len(articles)
-    ret = []
-    for i in range(0, n, 30):
-        chunk = articles[i : min(i + 30, n)]
-        ret += await asyncio.gather(
-            *[
-                get_nth_answer_async(
-                    client, j, article["title"], get_all_text(article), base_query
-                )
-                for j, article in enumerate(chunk)
-            ]
+    Args:
+        client (AsyncOpenAI): OpenAI 요청 클라이언트 객체(비동기).
+        i (int): 해당 게시글(아티클)의 인덱스.
+        article (Dict[str, Optional[str | List[str] | List[List[str]]]]): 판정할 아티클.
+        base_query (List[Dict[str, str]]): 시스템 프롬프트가 담긴 기본 메시지 리스트.
+        journal (Optional[str]): 판정 결과를 기록할 jsonl 파일명. None이면 기록하지 않음.
+        backoff (float, optional): 요청 실패 시 처음 기다리는 시간의 2의 지수. 기본값 6.
+
+    Returns:
+        Tuple[bool, str]: (연관 여부, 이유).
+    """
+    budget = get_text_budget(article["title"], base_query)
+    tf, reason = await get_nth_answer_async(
+        client,
+        i,
+        article["title"],
+        get_budgeted_text(article, budget),
+        base_query,
+        backoff=backoff,
+    )
+    write_journal(journal, article, tf, reason)
+    return tf, reason
+
+
+def write_journal(
+    journal: Optional[str],
+    article: Dict[str, Optional[str | List[str] | List[List[str]]]],
+    tf: bool,
+    reason: str,
+) -> None:
+    """
+    판정 결과 하나를 journal 파일에 덧붙인다.
+    journal이 None이면 아무것도 하지 않는다.
+
+    Args:
+        journal (Optional[str]): 판정 결과를 기록할 jsonl 파일명.
+        article (Dict[str, Optional[str | List[str] | List[List[str]]]]): 판정한 아티클.
+        tf (bool): 연관 여부.
+        reason (str): 판정 이유.
+    """
+    if journal is None:
+        return
+    utils.append_jsonl_on_file(
+        journal, {"key": get_article_key(article), "related": tf, "reason": reason}
+    )
+
+
+async def get_relatedness_list_batch(
+    articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+    keyword: str,
+    description: str,
+    key: str,
+    org: str,
+    batch_prefix: str,
+    journal: Optional[str] = None,
+    base_url: Optional[str] = None,
+    poll_interval: float = 60.0,
+) -> List[Tuple[bool, str]]:
+    """
+    get_relatedness_list()와 같은 판정을 배치 작업(Batch API)으로 수행한다.
+    실시간 응답이 필요 없는 대량 판정에서 더 싸고 처리량이 높다.
+
+    1. 모든 요청을 f"{batch_prefix}_input.jsonl"에 기록하고 업로드한다.
+    2. 배치 작업을 제출하고, 작업 id를 f"{batch_prefix}_state.json"에 저장한다.
+    3. 작업이 끝날 때까지 poll_interval초마다 상태를 확인한다.
+    4. 결과 파일을 내려받아 입력 순서대로 (연관 여부, 이유)를 맞춘다.
+
+    프로세스가 중간에 죽어도 state 파일이 남아 있으면 다시 제출하지 않고 기존 작업을 이어서 기다린다.
+    요청의 custom_id로 get_article_key()를 사용하므로, 재개 시 이미 판정된 아티클의 결과는 무시된다.
+    같은 키의 아티클이 여러 개면(중복 제거 전의 데이터셋) 한 번만 요청하고 그 결과를 모두에게 쓴다.
+    배치에서 실패하거나 결과가 없는 요청은 get_relatedness_list()로 모아서 동시에 실시간 재요청한다.
+    작업이 만료되거나 취소되어도 그때까지 끝난 요청들의 결과는 journal에 기록한 뒤에 예외를 일으키므로,
+    journal을 쓰는 main()은 다시 실행하면 남은 아티클만 판정한다.
+
+    Args:
+        articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 판정할 아티클들.
+        keyword (str): 데이터셋의 중심이 되는 하나의 키워드.
+        description (str): 해당 키워드에 대한 긴 글 설명.
+        key (str): OpenAI API 키.
+        org (str): OpenAI API Organization.
+        batch_prefix (str): 배치 입력 파일과 상태 파일의 경로 접두사.
+        journal (Optional[str], optional): 판정 결과를 기록할 jsonl 파일명. 기본값은 None(기록하지 않음).
+        base_url (Optional[str], optional): API 서버 주소. 기본값은 None(OpenAI 기본 주소).
+        poll_interval (float, optional): 작업 상태 확인 간격(초). 기본값 60.
+
+    Raises:
+        RuntimeError: 배치 작업이 완료되지 못하고 끝난 경우(failed, expired, cancelled). 끝난 요청들의 결과는 journal에 기록된 뒤다.
+
+    Returns:
+        List[Tuple[bool, str]]: 입력 순서대로의 (연관 여부, 이유) 리스트.
+    """
+    global tried_articles, succed_articles, retried_articles, latencies
+    tried_articles = 0
+    succed_articles = 0
+    retried_articles = 0
+    latencies = []
+
+    client = get_client(key, org, base_url)
+    base_query = get_base_query(keyword, description)
+    state_fname = f"{batch_prefix}_state.json"
+    ret = [None] * len(articles)
+    if not articles:
+        return ret
+    # 중복 제거 전의 데이터셋에는 같은 url이 여러 번 있을 수 있으나, 배치 입력의 custom_id는 유일해야 하므로
+    # 키마다 한 번만 요청하고 결과를 같은 키의 모든 아티클에 나눠 준다.
+    index: Dict[str, List[int]] = {}
+    for i, article in enumerate(articles):
+        index.setdefault(get_article_key(article), []).append(i)
+
+    if utils.already(state_fname):
+        state = utils.get_json_from_file(state_fname)
+        print(f"resuming batch {state['batch_id']}...")
+    else:
+        input_fname = f"{batch_prefix}_input.jsonl"
+        with open(input_fname, "wt", encoding="utf-8") as f:
+            for custom_id, positions in index.items():
+                article = articles[positions[0]]
+                budget = get_text_budget(article["title"], base_query)
+                text = get_budgeted_text(article, budget)
+                line = {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": get_request_body(article["title"], text, base_query),
+                }
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        with open(input_fname, "rb") as f:
+            input_file = await client.files.create(
+                file=(path.basename(input_fname), f.read()), purpose="batch"
+            )
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        state = {"batch_id": batch.id}
+        utils.write_json_on_file(state_fname, state)
+        print(f"batch {batch.id} submitted")
+
+    while True:
+        batch = await client.batches.retrieve(state["batch_id"])
+        if batch.status in BATCH_FINAL_STATUSES:
+            break
+        print(f"batch {batch.id} is {batch.status}...")
+        await asyncio.sleep(poll_interval)
+
+    # 만료되거나 취소된 배치도 끝난 요청들의 결과는 output_file_id에 있으므로 먼저 반영한다.
+    if batch.output_file_id is not None:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            line = json.loads(line)
+            response = line.get("response")
+            if response is None or response["status_code"] != 200:
+                continue
+            positions = index.get(line["custom_id"])
+            if positions is None:
+                continue
+            result = response["body"]["choices"][0]["message"]["content"]
+            usage = response["body"].get("usage") or {}
+            record_usage(
+                MODEL,
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+                batch=True,
+            )
+            metrics.inc("llm_requests_total", model=MODEL, outcome="ok")
+            answer = parse_answer(result)
+            for i in positions:
+                ret[i] = answer
+            write_journal(journal, articles[positions[0]], *answer)
+
+    if batch.status != "completed":
+        remove(state_fname)
+        done = sum(e is not None for e in ret)
+        raise RuntimeError(
+            f"batch {batch.id} ended with status {batch.status} ({done} / {len(articles)} judged)"
         )
+
+    leftovers = [positions for positions in index.values() if ret[positions[0]] is None]
+    if leftovers:
+        print(f"retrying {len(leftovers)} failed requests of batch {batch.id}...")
+        answers = await get_relatedness_list(
+            [articles[positions[0]] for positions in leftovers],
+            keyword,
+            description,
+            key,
+            org,
+            journal,
+            base_url,
+        )
+        for positions, answer in zip(leftovers, answers):
+            for i in positions:
+                ret[i] = answer
+
+    remove(state_fname)
     return ret
 
 
+def record_usage(
+    model: str, prompt_tokens: int, completion_tokens: int, batch: bool = False
+) -> None:
+    """
+    요청 하나의 토큰 사용량과 추정 비용을 metrics에 기록한다.
+    MODEL_PRICES에 없는 모델은 토큰 수만 기록한다.
+
+    Args:
+        model (str): 모델 이름.
+        prompt_tokens (int): 입력 토큰 수.
+        completion_tokens (int): 출력 토큰 수.
+        batch (bool, optional): 배치 작업의 요청인지의 여부(BATCH_PRICE_RATIO 적용). 기본값 거짓.
+    """
+    mode = "batch" if batch else "online"
+    metrics.inc("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    metrics.inc("llm_tokens_total", completion_tokens, model=model, kind="completion")
+    if model not in MODEL_PRICES:
+        return
+    prompt_price, completion_price = MODEL_PRICES[model]
+    cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+    if batch:
+        cost *= BATCH_PRICE_RATIO
+    metrics.inc("llm_cost_usd_total", cost, model=model, mode=mode)
+
+
+def get_article_key(article: Dict[str, Optional[str | List[str] | List[List[str]]]]) -> str:
+    """
+    journal에서 게시글(아티클)을 식별하기 위한 키를 반환함.
+    중복 제거 이후의 데이터셋에서는 url이 유일하므로 url을 키로 사용한다.
+
+    Args:
+        article (Dict[str, Optional[str  |  List[str]  |  List[List[str]]]]): 단일 게시글(아티클) 딕셔너리.
+
+    Returns:
+        str: 아티클의 키 문자열.
+    """
+    return article["url_naver"]
+
+
+def get_judged_from_journal(journal: str) -> Dict[str, Tuple[bool, str]]:
+    """
+    journal 파일에서 이미 판정이 끝난 게시글(아티클)들을 읽어들인다.
+    같은 키가 여러 번 기록되어 있으면 마지막 기록을 사용한다.
+
+    Args:
+        journal (str): 판정 결과가 기록된 jsonl 파일명.
+
+    Returns:
+        Dict[str, Tuple[bool, str]]: 아티클 키 -> (연관 여부, 이유) 딕셔너리.
+    """
+    return {
+        line["key"]: (line["related"], line["reason"])
+        for line in utils.get_jsonl_from_file(journal)
+    }
+
+
 def get_all_text(
     article: Dict[str, Optional[str | List[str] | List[List[str]]]]
 ) -> str:
@@ -68,45 +480,126 @@ def get_all_text(
     return ret
 
 
-def length_filter_decorator(l: int = 10000) -> Callable[[Callable], Callable]:
+def estimate_tokens(text: str) -> int:
     """
-    get_nth_answer_async()에서,
-    텍스트 길이가 토큰 제한을 넘을 것 같으면,
-    실행하지 않고 유관한 것으로 간주하고 반환한다.
-    이러한 아티클에 대해서는 수동으로 확인해야 함.
-    gpt-3.5-turbo의 토큰 제한은 대략 16000 정도이고,
-    한글은 받침이 없으면 1토큰, 있으면 2토큰이므로,
-    넉넉하게 10000자 정도는 수용 가능하다.
+    문자열의 토큰 수를 대략적으로 추정한다.
+    실제 토크나이저를 쓰지 않고 글자 종류별 경험치를 사용한다.
+        - 한글 음절: 받침이 없으면 1토큰, 있으면 2토큰.
+        - ASCII 문자: 4글자에 1토큰.
+        - 그 외 문자: 1글자에 1토큰.
 
     Args:
-        l (int, optional): 게시글(아티클)의 최대 길이. 기본값 10000.
+        text (str): 토큰 수를 추정할 문자열.
 
     Returns:
-        Callable[[Callable], Callable]: 데코레이터 래퍼 함수.
+        int: 추정 토큰 수.
     """
+    ascii_count = 0
+    tokens = 0
+    for c in text:
+        code = ord(c)
+        if code < 128:
+            ascii_count += 1
+        elif 0xAC00 <= code <= 0xD7A3:
+            tokens += 1 if (code - 0xAC00) % 28 == 0 else 2
+        else:
+            tokens += 1
+    return tokens + (ascii_count + 3) // 4
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """
+    문자열의 앞에서부터 추정 토큰 수가 budget을 넘지 않는 데까지만 남긴다.
 
-    def decorator(f):
-        @wraps(f)
-        async def wrapper(*args, **kwargs):
-            if "text" in kwargs:
-                text = kwargs["text"]
-            else:
-                text = args[3]
-            if len(text) > l:
-                return True, "길이 초과로 직접 확인 필요."
-            return await f(*args, **kwargs)
+    Args:
+        text (str): 자를 문자열.
+        budget (int): 허용하는 추정 토큰 수.
 
-        return wrapper
+    Returns:
+        str: 잘린 문자열. 자르지 않아도 되면 원래 문자열.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+def get_text_budget(title: str, base_query: List[Dict[str, str]]) -> int:
+    """
+    한 번의 요청에서 본문에 쓸 수 있는 추정 토큰 수를 계산한다.
+    컨텍스트 윈도우에서 시스템 프롬프트, 제목, 응답 몫을 빼고 안전 비율을 곱한다.
+
+    Args:
+        title (str): 게시글(아티클) 제목.
+        base_query (List[Dict[str, str]]): 시스템 프롬프트가 담긴 기본 메시지 리스트.
+
+    Returns:
+        int: 본문에 쓸 수 있는 추정 토큰 수.
+    """
+    used = sum(estimate_tokens(e["content"]) for e in base_query)
+    used += estimate_tokens(title) + RESPONSE_TOKENS
+    return int((CONTEXT_WINDOW - used) * TOKEN_SAFETY_RATIO)
+
+
+def get_budgeted_text(
+    article: Dict[str, Optional[str | List[str] | List[List[str]]]], budget: int
+) -> str:
+    """
+    게시글(아티클)의 본문을 추정 토큰 수 budget 안에 들어가도록 만든다.
+    예산 안에 들어가면 get_all_text()와 같고,
+    넘치면 판정에 가장 중요한 부분부터 채운다.
+        - 뉴스: 본문의 앞부분(리드)부터 예산까지.
+        - 지식IN: 질문을 먼저 넣고(최대 예산의 절반), 답변을 페이지 순서(채택, 추천 순)대로 예산까지.
+    잘린 경우 끝에 TRUNCATION_MARK를 붙인다.
+    이전에는 10000자를 넘는 아티클을 판정하지 않고 수동 확인으로 돌렸으나,
+    이제는 긴 아티클도 한 번의 요청으로 판정한다.
+
+    Args:
+        article (Dict[str, Optional[str | List[str] | List[List[str]]]]): 단일 게시글(아티클) 딕셔너리.
+        budget (int): 본문에 쓸 수 있는 추정 토큰 수. get_text_budget() 참조.
+
+    Returns:
+        str: 예산에 맞춘 본문 문자열.
+    """
+    text = get_all_text(article)
+    if estimate_tokens(text) <= budget:
+        return text
+
+    budget -= estimate_tokens(TRUNCATION_MARK)
+    if "text" in article:
+        return truncate_to_budget(text, budget) + TRUNCATION_MARK
 
-    return decorator
+    ret = truncate_to_budget(f"질문: {article['question']}", budget // 2)
+    budget -= estimate_tokens(ret)
+    for i, answer in enumerate(article["answers"]):
+        part = f"\n답변 {i}: {answer}"
+        cost = estimate_tokens(part)
+        if cost > budget:
+            ret += truncate_to_budget(part, budget)
+            break
+        ret += part
+        budget -= cost
+    return ret + TRUNCATION_MARK
 
 
-@length_filter_decorator(10000)
 async def get_nth_answer_async(
-    client: AsyncOpenAI, i: int, title: str, text: str, base_query: List[Dict[str, str]]
+    client: AsyncOpenAI,
+    i: int,
+    title: str,
+    text: str,
+    base_query: List[Dict[str, str]],
+    backoff: float = 6,
 ) -> Tuple[bool, str]:
     """
     OpenAI API 요청을 통해서 연관성을 확인함.
+    요청이 실패하면 약 2**backoff초를 기다린 뒤 지수를 1씩 늘려가며 성공할 때까지 재시도한다.
+    지연 시간, 토큰 사용량과 추정 비용, 재시도 횟수를 metrics에 기록한다.
 
     Args:
         client (AsyncOpenAI): OpenAI 요청 클라이언트 객체(비동기).
@@ -114,19 +607,15 @@ async def get_nth_answer_async(
         title (str): _description_
         text (str): _description_
         base_query (List[Dict[str, str]]): _description_
+        backoff (float, optional): 처음 기다리는 시간의 2의 지수. 기본값 6.
 
     Returns:
         Tuple[bool, str]: _description_
     """
-    global tried_articles, succed_articles
+    global tried_articles, succed_articles, retried_articles
 
-    content = f"제목 : {title}\n내용 : {text}"
-    kwargs = {
-        "model": "gpt-3.5-turbo",
-        "messages": base_query + [{"role": "user", "content": content}],
-        "temperature": 0.5,
-    }
-    backoff = 6
+    kwargs = get_request_body(title, text, base_query)
+    start = time.monotonic()
     tried_articles += 1
     if tried_articles % 100 == 0:
         print(f"[{succed_articles} / {tried_articles}]")
@@ -138,20 +627,18 @@ async def get_nth_answer_async(
             print(
                 f"error occures on {i}'s(will retry in about 2**{backoff} seconds [{succed_articles} / {tried_articles}])\n : {err}"
             )
+            retried_articles += 1
+            metrics.inc("llm_requests_total", model=MODEL, outcome=type(err).__name__)
+            metrics.inc("llm_retries_total", model=MODEL)
             await asyncio.sleep(2**backoff + random() * 2)
             backoff += 1
 
-    result = res.choices[0].message.content
-    tf, *reason = result.split("\n")
-
-    if tf.upper() == "Y":
-        tf = True
-    elif tf.upper() == "N":
-        tf = False
-    else:
-        print(f"exception case: {tf}")
-        tf = True
-    reason = "\n".join(reason).replace("이유:", "").strip()
+    latencies.append(time.monotonic() - start)
+    metrics.observe("llm_seconds", latencies[-1], model=MODEL)
+    metrics.inc("llm_requests_total", model=MODEL, outcome="ok")
+    if res.usage is not None:
+        record_usage(MODEL, res.usage.prompt_tokens, res.usage.completion_tokens)
+    tf, reason = parse_answer(res.choices[0].message.content)
 
     succed_articles += 1
     if succed_articles % 100 == 0:
@@ -161,32 +648,65 @@ async def get_nth_answer_async(
 
 
 async def main(
-    keyword: str, description: str, filetype: utils.FileType, force_redo: bool = False
+    keyword: str,
+    description: str,
+    filetype: utils.FileType,
+    force_redo: bool = False,
+    mode: str = "online",
 ) -> None:
     """
     게시글(아티클)의 데이터셋에서,
     해당 키워드와 유관한 것들만 골라낸다.
     OpenAI API를 이용한다.
+    판정 결과는 하나가 끝날 때마다 f"{결과 파일}_journal.jsonl"에 기록되므로,
+    중간에 중단되어도 다시 실행하면 이미 판정된 아티클은 건너뛰고 이어서 진행한다.
+    최종 결과 파일은 journal에 있던 판정과 이번에 판정한 결과를 합쳐 만들어진다.
+    mode가 "batch"이면 get_relatedness_list_batch()로 배치 작업을 제출하고 완료될 때까지 기다린다.
 
     Args:
         keyword (str): 데이터셋의 중심이 되는 하나의 키워드.
         description (str): 해당 키워드에 대한 긴 글 설명.
         filetype (utils.FileType): 필터링 전 데이터셋의 utils.FileType Enum 객체.
-        force_redo (bool, optional): 이미 필터링 결과가 있어도 강제로 다시할지의 여부. 기본값은 거짓.
+        force_redo (bool, optional): 이미 필터링 결과가 있어도 강제로 다시할지의 여부. 참이면 journal도 지우고 처음부터 다시 한다. 기본값은 거짓.
+        mode (str, optional): 판정 방식. "online" | "batch". 기본값은 "online".
     """
     typestring = utils.get_typestring_from_filetype(filetype)
     result_filetype = utils.get_filetype_from_typestring(typestring, "r")
     fname = f"{result_filetype.value}.txt"
+    journal = f"{result_filetype.value}_journal.jsonl"
+    batch_prefix = f"{result_filetype.value}_batch"
+    if force_redo:
+        for e in (journal, f"{batch_prefix}_state.json"):
+            if utils.already(e):
+                remove(e)
     if not force_redo and utils.already(fname):
         return
 
     articles = utils.get_json_from_file(f"{filetype.value}.txt")["items"]
 
+    judged = get_judged_from_journal(journal)
+    if judged:
+        print(f"{len(judged)} articles are already judged, resuming...")
+
     KEY, ORG = utils.get_key_org()
 
-    relatedness, reasons = zip(
-        *await get_relatedness_list(articles, keyword, description, KEY, ORG)
-    )
+    # journal에 없는 아티클(잘린 줄로 끝난 아티클 포함)은 모두 판정하고, 그 결과는 journal을 다시 읽지 않고 바로 반영한다.
+    pending = [e for e in articles if get_article_key(e) not in judged]
+    if mode == "batch":
+        answers = await get_relatedness_list_batch(
+            pending, keyword, description, KEY, ORG, batch_prefix, journal
+        )
+    else:
+        answers = await get_relatedness_list(pending, keyword, description, KEY, ORG, journal)
+    judged.update(zip(map(get_article_key, pending), answers))
+
+    relatedness, reasons = zip(*(judged[get_article_key(e)] for e in articles))
+
+    with ArticleStore() as store:
+        store.set_verdicts(
+            keyword,
+            ((get_article_key(e), tf, reason) for e, tf, reason in zip(articles, relatedness, reasons)),
+        )
 
     related_articles = []
     for i, e in enumerate(articles):
@@ -0,0 +1,260 @@
+#!python
+
+from typing import List, Dict, Optional, Iterator, Callable, TYPE_CHECKING
+from functools import cache
+from threading import Lock
+from os import makedirs, path
+import datetime as dt
+import gzip
+import json
+import utils
+
+# requests와 CircuitBreaker는 타입 힌트에만 쓰인다.
+if TYPE_CHECKING:
+    import requests
+    from retry_queue import CircuitBreaker
+
+# 원본 응답 보관소들이 있는 디렉토리.
+ARCHIVE = utils.RESULTS + "/" + "archive"
+
+# 세그먼트 파일 하나의 최대 크기(바이트). 넘으면 다음 세그먼트에 쓴다.
+SEGMENT_SIZE = 256 << 20
+
+# 레코드 하나는 gzip member 하나이며, 압축을 풀면 json 헤더 한 줄 뒤에 응답 본문(바이트)이 이어진다.
+# 세그먼트는 이런 member들을 이어 붙인 파일이라 gzip으로 통째로 풀 수도 있다(WARC.gz와 같은 방식).
+# index.jsonl에는 레코드마다 {"url", "final_url", "segment", "offset", "length"} 한 줄이 레코드를 쓴 뒤에 덧붙는다.
+# final_url은 HTTP 리디렉션이 끝난 응답의 url이다(이 필드가 생기기 전의 색인에는 없다).
+# 스트리밍으로 받다가 멈춘(utils.read_stream()) 응답은 헤더와 색인에 멈춘 이유("truncated": "max_bytes" | "watcher")가 붙는다.
+INDEX = "index.jsonl"
+
+
+class ArchivedResponse:
+    """
+    보관된 응답. 본문 추출 함수들이 쓰는 requests.models.Response의 속성만 흉내낸다.
+    """
+
+    def __init__(self, header: Dict[str, str | int | Dict[str, str]], content: bytes) -> None:
+        """
+        Args:
+            header (Dict[str, str | int | Dict[str, str]]): 레코드의 json 헤더.
+            content (bytes): 응답 본문.
+        """
+        self.url: str = header["final_url"]
+        self.request_url: str = header["url"]
+        self.status_code: int = header["status"]
+        self.headers: Dict[str, str] = header["headers"]
+        self.encoding: Optional[str] = header["encoding"]
+        self.fetched_at: str = header["fetched_at"]
+        # 일부만 받은 응답이면 멈춘 이유, 끝까지 받았으면 None.
+        self.truncated: Optional[str] = header.get("truncated")
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        """
+        requests와 같이 encoding으로 본문을 디코딩한다. encoding이 없으면 utf-8로 본다.
+
+        Returns:
+            str: 디코딩된 본문.
+        """
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+class HtmlArchive:
+    """
+    본문 수집 단계가 받은 원본 응답을 보관하는 추가 전용(append-only) 저장소.
+    같은 url을 다시 보관하면 색인은 마지막 레코드를 가리킨다(이전 레코드는 세그먼트에 남는다).
+    한 프로세스 안에서는 get_archive()로 얻은 같은 객체를 여러 스레드가 함께 쓴다.
+
+    Usage:
+        archive = get_archive("news")
+        archive.put(url, res)
+        res = archive.get(url)  # 네트워크 없이 ArchivedResponse
+    """
+
+    def __init__(self, dirname: str) -> None:
+        """
+        Args:
+            dirname (str): 보관소 디렉토리.
+        """
+        self.dirname = dirname
+        self.lock = Lock()
+        self.index: Dict[str, Dict[str, str | int]] = {}
+        makedirs(dirname, exist_ok=True)
+        for entry in utils.get_jsonl_from_file(f"{dirname}/{INDEX}"):
+            self.index[entry["url"]] = entry
+        self.segment = max((e["segment"] for e in self.index.values()), default=0)
+
+    def get_segment_fname(self, segment: int) -> str:
+        """
+        Args:
+            segment (int): 세그먼트 번호.
+
+        Returns:
+            str: 세그먼트 파일명.
+        """
+        return f"{self.dirname}/segment-{segment:05d}.gz"
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def is_complete(self, url: str) -> bool:
+        """
+        Args:
+            url (str): 요청한 url(리디렉션 매핑을 거친 url).
+
+        Returns:
+            bool: url의 응답이 본문 끝까지 보관되어 있는지의 여부. 없거나 일부만 받은 응답이면 False.
+        """
+        entry = self.index.get(url)
+        return entry is not None and not entry.get("truncated")
+
+    def get_final_url(self, url: str) -> Optional[str]:
+        """
+        보관된 응답의 (HTTP 리디렉션이 끝난) url을 구한다. 색인에 없으면(이전 형식) 레코드의 헤더에서 읽는다.
+
+        Args:
+            url (str): 요청한 url(리디렉션 매핑을 거친 url).
+
+        Returns:
+            Optional[str]: 응답의 url. 보관된 응답이 없으면 None.
+        """
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        if "final_url" in entry:
+            return entry["final_url"]
+        return self.get(url).url
+
+    def urls(self) -> Iterator[str]:
+        """
+        Yields:
+            Iterator[str]: 보관된 url들.
+        """
+        yield from list(self.index)
+
+    def put(self, url: str, res: "requests.models.Response") -> None:
+        """
+        응답을 보관한다. 일부만 받은 응답(res.truncated)은 그 이유를 헤더와 색인에 함께 기록한다.
+
+        Args:
+            url (str): 요청한 url(리디렉션 매핑을 거친 url).
+            res (requests.models.Response): 응답 객체.
+        """
+        header = {
+            "url": url,
+            "final_url": res.url,
+            "status": res.status_code,
+            "headers": dict(res.headers),
+            "encoding": res.encoding,
+            "fetched_at": dt.datetime.now().isoformat(timespec="seconds"),
+        }
+        truncated = getattr(res, "truncated", None)
+        if truncated:
+            header["truncated"] = truncated
+        record = gzip.compress(
+            json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + res.content
+        )
+        with self.lock:
+            fname = self.get_segment_fname(self.segment)
+            if path.exists(fname) and path.getsize(fname) + len(record) > SEGMENT_SIZE:
+                self.segment += 1
+                fname = self.get_segment_fname(self.segment)
+            with open(fname, "ab") as f:
+                offset = f.tell()
+                f.write(record)
+            entry = {
+                "url": url,
+                "final_url": res.url,
+                "segment": self.segment,
+                "offset": offset,
+                "length": len(record),
+            }
+            if truncated:
+                entry["truncated"] = truncated
+            utils.append_jsonl_on_file(f"{self.dirname}/{INDEX}", entry)
+            self.index[url] = entry
+
+    def get(self, url: str) -> Optional[ArchivedResponse]:
+        """
+        보관된 응답을 읽는다.
+
+        Args:
+            url (str): 요청한 url(리디렉션 매핑을 거친 url).
+
+        Returns:
+            Optional[ArchivedResponse]: 보관된 응답. 없으면 None.
+        """
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(self.get_segment_fname(entry["segment"]), "rb") as f:
+            f.seek(entry["offset"])
+            data = gzip.decompress(f.read(entry["length"]))
+        header, content = data.split(b"\n", 1)
+        return ArchivedResponse(json.loads(header), content)
+
+
+@cache
+def get_archive(name: str) -> HtmlArchive:
+    """
+    이름에 해당하는 보관소를 연다. 같은 이름이면 프로세스 안에서 같은 객체를 반환한다.
+
+    Args:
+        name (str): 보관소 이름. "news" | "kin".
+
+    Returns:
+        HtmlArchive: 보관소 객체.
+    """
+    return HtmlArchive(f"{ARCHIVE}/{name}")
+
+
+def get_response(
+    url: str,
+    archive: Optional[HtmlArchive],
+    replay: bool = False,
+    cookie: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    get_watcher: Optional[Callable[[str], Optional[Callable[[bytes], bool]]]] = None,
+    breaker: Optional["CircuitBreaker"] = None,
+    session: Optional["requests.Session"] = None,
+    failures: Optional[List[bool]] = None,
+) -> Optional["requests.models.Response | ArchivedResponse"]:
+    """
+    replay면 보관된 응답을, 아니면 utils.get_response_from_url()로 받은 응답을 반환한다.
+    새로 받은 응답은 archive에 보관한다. 스트리밍으로 받다가 멈춘 응답은 받은 부분까지만, 멈춘 이유와 함께 보관된다.
+    replay에서 일부만 보관된 응답은 쓰지 않는다(새 셀렉터의 본문 요소가 잘린 뒤에 있을 수 있으므로).
+
+    Args:
+        url (str): 요청할 url.
+        archive (Optional[HtmlArchive]): 보관소. None이면 보관하지 않는다.
+        replay (bool, optional): 네트워크 없이 보관된 응답만 쓸지의 여부. 기본값 False.
+        cookie (Optional[str], optional): 요청에 넣을 쿠키.
+        max_bytes (Optional[int], optional): utils.get_response_from_url() 참조.
+        get_watcher (Optional[Callable[[str], Optional[Callable[[bytes], bool]]]], optional): utils.get_response_from_url() 참조.
+        breaker (Optional[CircuitBreaker], optional): utils.get_response_from_url() 참조.
+        session (Optional[requests.Session], optional): utils.get_response_from_url() 참조.
+        failures (Optional[List[bool]], optional): utils.get_response_from_url() 참조. replay에서는 쓰지 않는다.
+
+    Returns:
+        Optional[requests.models.Response | ArchivedResponse]: 응답. 받지 못했거나 끝까지 보관되지 않았으면 None.
+    """
+    if replay:
+        if archive is None or not archive.is_complete(url):
+            return None
+        return archive.get(url)
+    res = utils.get_response_from_url(
+        url,
+        cookie=cookie,
+        max_bytes=max_bytes,
+        get_watcher=get_watcher,
+        breaker=breaker,
+        session=session,
+        failures=failures,
+    )
+    if res is not None and archive is not None:
+        archive.put(url, res)
+    return res
@@ -0,0 +1,408 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Set
+from collections import Counter
+from bisect import bisect_left, bisect_right
+from os import makedirs
+import math
+import time
+from article_store import get_date_iso, get_source
+import utils
+
+# 색인 디렉토리 안의 파일들.
+# docs.json: 문서 id 순서대로의 문서 정보와 평균 문서 길이.
+# lexicon.json: 용어 -> [postings.bin에서의 시작 위치, 바이트 수, 문서 빈도(df)].
+# postings.bin: 용어별 (문서 id 차이, 용어 빈도(tf)) 쌍들을 varint로 이어 붙인 바이너리.
+DOCS = "docs.json"
+LEXICON = "lexicon.json"
+POSTINGS = "postings.bin"
+
+# BM25 매개변수.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def get_index_dirname(filetype: utils.FileType) -> str:
+    """
+    데이터 파일의 색인 디렉토리 이름을 반환한다.
+
+    Args:
+        filetype (utils.FileType): 색인할 데이터 파일의 FileType.
+
+    Returns:
+        str: 색인 디렉토리 이름. 예: "results/naver_news_unique_index".
+    """
+    return f"{filetype.value}_index"
+
+
+def encode_varint(n: int, buf: bytearray) -> None:
+    """
+    음이 아닌 정수를 varint(하위 7비트씩, 최상위 비트는 다음 바이트 존재 여부)로 buf에 덧붙인다.
+
+    Args:
+        n (int): 음이 아닌 정수.
+        buf (bytearray): 결과를 덧붙일 버퍼.
+    """
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def encode_postings(postings: List[Tuple[int, int]]) -> bytes:
+    """
+    (문서 id, tf) 리스트를 문서 id 차이와 tf의 varint 열로 압축한다.
+
+    Args:
+        postings (List[Tuple[int, int]]): 문서 id 오름차순의 (문서 id, tf)들.
+
+    Returns:
+        bytes: 압축된 바이트열.
+    """
+    buf = bytearray()
+    prev = 0
+    for doc_id, tf in postings:
+        encode_varint(doc_id - prev, buf)
+        encode_varint(tf, buf)
+        prev = doc_id
+    return bytes(buf)
+
+
+def decode_postings(data: bytes) -> Iterator[Tuple[int, int]]:
+    """
+    encode_postings()의 역변환.
+
+    Args:
+        data (bytes): 압축된 바이트열.
+
+    Yields:
+        Iterator[Tuple[int, int]]: 문서 id 오름차순의 (문서 id, tf)들.
+    """
+    doc_id = 0
+    values = []
+    n = shift = 0
+    for byte in data:
+        n |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(n)
+        n = shift = 0
+        if len(values) == 2:
+            doc_id += values[0]
+            yield doc_id, values[1]
+            values.clear()
+
+
+def get_doc_terms(article: Dict[str, Optional[str | List[str] | List[List[str]]]]) -> List[str]:
+    """
+    아티클에서 색인할 용어들을 구한다.
+    tokenize_and_merge_data.py의 명사 토큰을 그대로 쓰며, 지식IN은 질문과 답변 토큰을 합친다.
+
+    Args:
+        article (Dict[str, Optional[str | List[str] | List[List[str]]]]): 토큰화된 아티클.
+
+    Returns:
+        List[str]: 용어들(중복 포함).
+    """
+    terms = list(article["tokens"])
+    for tokens in article.get("tokens_answer") or []:
+        terms += tokens
+    return terms
+
+
+def build(filetype: utils.FileType) -> None:
+    """
+    토큰화된 데이터 파일로 색인을 만들어 get_index_dirname() 디렉토리에 저장한다.
+    문서 id는 날짜 오름차순으로 부여하므로, 날짜 범위는 연속된 문서 id 범위가 된다.
+
+    Args:
+        filetype (utils.FileType): 토큰화된(PROCESSED 또는 PROCESSED_UNIQUE) 데이터 파일의 FileType.
+    """
+    articles = utils.get_json_from_file(f"{filetype.value}.txt")["items"]
+    dates = [get_date_iso(e.get("date")) or "" for e in articles]
+    order = sorted(range(len(articles)), key=lambda i: dates[i])
+
+    docs = []
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    for doc_id, i in enumerate(order):
+        article = articles[i]
+        terms = get_doc_terms(article)
+        for term, tf in Counter(terms).items():
+            postings.setdefault(term, []).append((doc_id, tf))
+        source = article.get("source")
+        docs.append(
+            [
+                article["url_naver"],
+                article["title"],
+                get_source(utils.FileType(source)) if source else None,
+                article.get("keyword"),
+                dates[i],
+                len(terms),
+            ]
+        )
+
+    dirname = get_index_dirname(filetype)
+    makedirs(dirname, exist_ok=True)
+    lexicon = {}
+    offset = 0
+    with open(f"{dirname}/{POSTINGS}", "wb") as f:
+        for term in sorted(postings):
+            data = encode_postings(postings[term])
+            f.write(data)
+            lexicon[term] = [offset, len(data), len(postings[term])]
+            offset += len(data)
+    avgdl = sum(e[5] for e in docs) / len(docs) if docs else 0.0
+    utils.write_json_on_file(
+        f"{dirname}/{DOCS}",
+        {
+            "fields": ["url", "title", "source", "keyword", "date", "length"],
+            "avgdl": avgdl,
+            "docs": docs,
+        },
+    )
+    utils.write_json_on_file(f"{dirname}/{LEXICON}", lexicon)
+
+
+class InvertedIndex:
+    """
+    build()로 만든 색인을 읽어서 불리언 검색과 BM25 순위 검색을 한다.
+    문서 정보와 용어 사전만 메모리에 올리고, 포스팅은 질의한 용어의 것만 읽어서 푼다.
+
+    Usage:
+        index = InvertedIndex.load(utils.FileType.NEWS_PROCESSED_UNIQUE)
+        index.search(all_terms=["환자", "권리"], none_terms=["동물"], date_from="2020-01-01")
+        index.rank(["공유", "의사결정"], k=20, source="NEWS")
+    """
+
+    def __init__(self, dirname: str) -> None:
+        """
+        Args:
+            dirname (str): 색인 디렉토리.
+        """
+        docs = utils.get_json_from_file(f"{dirname}/{DOCS}")
+        self.fields: List[str] = docs["fields"]
+        self.docs: List[list] = docs["docs"]
+        self.avgdl: float = docs["avgdl"]
+        self.dates = [e[4] for e in self.docs]
+        self.lexicon: Dict[str, List[int]] = utils.get_json_from_file(f"{dirname}/{LEXICON}")
+        with open(f"{dirname}/{POSTINGS}", "rb") as f:
+            self.data = f.read()
+
+        # 수집 방법, 키워드별 문서 id 집합. 값의 종류가 적으므로 미리 만들어 둔다.
+        self.by_source: Dict[str, Set[int]] = {}
+        self.by_keyword: Dict[str, Set[int]] = {}
+        for doc_id, e in enumerate(self.docs):
+            self.by_source.setdefault(e[2], set()).add(doc_id)
+            self.by_keyword.setdefault(e[3], set()).add(doc_id)
+
+    @classmethod
+    def load(cls, filetype: utils.FileType) -> "InvertedIndex":
+        """
+        데이터 파일의 색인을 읽는다.
+
+        Args:
+            filetype (utils.FileType): 색인한 데이터 파일의 FileType.
+
+        Returns:
+            InvertedIndex: 색인 객체.
+        """
+        return cls(get_index_dirname(filetype))
+
+    def get_postings(self, term: str, lo: int = 0, hi: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        용어의 포스팅 중 문서 id가 [lo, hi)인 것을 반환한다.
+
+        Args:
+            term (str): 용어.
+            lo (int, optional): 문서 id 하한(포함). 기본값 0.
+            hi (Optional[int], optional): 문서 id 상한(미포함). None이면 끝까지.
+
+        Returns:
+            List[Tuple[int, int]]: (문서 id, tf)들.
+        """
+        if term not in self.lexicon:
+            return []
+        offset, size, _ = self.lexicon[term]
+        if hi is None:
+            hi = len(self.docs)
+        ret = []
+        for doc_id, tf in decode_postings(self.data[offset : offset + size]):
+            if doc_id >= hi:
+                break
+            if doc_id >= lo:
+                ret.append((doc_id, tf))
+        return ret
+
+    def get_df(self, term: str) -> int:
+        """
+        용어의 문서 빈도를 반환한다.
+
+        Args:
+            term (str): 용어.
+
+        Returns:
+            int: 용어가 나온 문서 수.
+        """
+        return self.lexicon[term][2] if term in self.lexicon else 0
+
+    def get_range(self, date_from: Optional[str], date_to: Optional[str]) -> Tuple[int, int]:
+        """
+        날짜 범위에 해당하는 문서 id 범위를 구한다. 문서 id는 날짜 순이므로 이분 탐색으로 충분하다.
+
+        Args:
+            date_from (Optional[str]): 이 날짜(YYYY-MM-DD) 이후. None이면 처음부터.
+            date_to (Optional[str]): 이 날짜(YYYY-MM-DD) 이전. None이면 끝까지.
+
+        Returns:
+            Tuple[int, int]: 문서 id 범위 [lo, hi).
+        """
+        lo = bisect_left(self.dates, date_from) if date_from else 0
+        hi = bisect_right(self.dates, date_to) if date_to else len(self.docs)
+        return lo, hi
+
+    def get_allowed(self, source: Optional[str], keyword: Optional[str]) -> Optional[Set[int]]:
+        """
+        수집 방법과 키워드 조건을 만족하는 문서 id 집합을 구한다.
+
+        Args:
+            source (Optional[str]): 수집 방법("NEWS" | "CRAWL_NEWS" | "KIN"). None이면 조건 없음.
+            keyword (Optional[str]): 검색 키워드. None이면 조건 없음.
+
+        Returns:
+            Optional[Set[int]]: 문서 id 집합. 조건이 없으면 None.
+        """
+        allowed = None
+        if source is not None:
+            allowed = self.by_source.get(source, set())
+        if keyword is not None:
+            ids = self.by_keyword.get(keyword, set())
+            allowed = ids if allowed is None else allowed & ids
+        return allowed
+
+    def search(
+        self,
+        all_terms: Iterable[str] = (),
+        any_terms: Iterable[str] = (),
+        none_terms: Iterable[str] = (),
+        source: Optional[str] = None,
+        keyword: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[Dict[str, str | int]]:
+        """
+        불리언 검색. all_terms를 모두 포함하고, any_terms가 있으면 그중 하나 이상을 포함하며,
+        none_terms는 하나도 포함하지 않는 문서들을 날짜 순으로 반환한다.
+        df가 작은 용어부터 교집합을 구하므로 흔한 용어가 섞여도 빠르다.
+
+        Args:
+            all_terms (Iterable[str], optional): 모두 포함해야 하는 용어들(AND).
+            any_terms (Iterable[str], optional): 하나 이상 포함해야 하는 용어들(OR).
+            none_terms (Iterable[str], optional): 포함하면 안 되는 용어들(NOT).
+            source (Optional[str], optional): 수집 방법 조건.
+            keyword (Optional[str], optional): 검색 키워드 조건.
+            date_from (Optional[str], optional): 이 날짜(YYYY-MM-DD) 이후.
+            date_to (Optional[str], optional): 이 날짜(YYYY-MM-DD) 이전.
+
+        Raises:
+            ValueError: all_terms와 any_terms가 모두 비어 있는 경우.
+
+        Returns:
+            List[Dict[str, str | int]]: 문서 정보 딕셔너리들.
+        """
+        all_terms, any_terms = list(all_terms), list(any_terms)
+        if not all_terms and not any_terms:
+            raise ValueError("all_terms or any_terms is required")
+        lo, hi = self.get_range(date_from, date_to)
+
+        ids = None
+        for term in sorted(all_terms, key=self.get_df):
+            found = {doc_id for doc_id, _ in self.get_postings(term, lo, hi)}
+            ids = found if ids is None else ids & found
+            if not ids:
+                return []
+        if any_terms:
+            found = set()
+            for term in any_terms:
+                found.update(doc_id for doc_id, _ in self.get_postings(term, lo, hi))
+            ids = found if ids is None else ids & found
+        for term in none_terms:
+            ids -= {doc_id for doc_id, _ in self.get_postings(term, lo, hi)}
+        allowed = self.get_allowed(source, keyword)
+        if allowed is not None:
+            ids &= allowed
+        return [self.get_doc(doc_id) for doc_id in sorted(ids)]
+
+    def rank(
+        self,
+        terms: Iterable[str],
+        k: int = 10,
+        source: Optional[str] = None,
+        keyword: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+    ) -> List[Dict[str, str | int | float]]:
+        """
+        BM25 순위 검색. 용어 중 하나 이상을 포함하는 문서들의 점수 상위 k개를 반환한다.
+        idf는 조건과 관계없이 전체 색인 기준으로 계산한다.
+
+        Args:
+            terms (Iterable[str]): 질의 용어들.
+            k (int, optional): 반환할 문서 수. 기본값 10.
+            source (Optional[str], optional): 수집 방법 조건.
+            keyword (Optional[str], optional): 검색 키워드 조건.
+            date_from (Optional[str], optional): 이 날짜(YYYY-MM-DD) 이후.
+            date_to (Optional[str], optional): 이 날짜(YYYY-MM-DD) 이전.
+
+        Returns:
+            List[Dict[str, str | int | float]]: 점수("score")가 추가된 문서 정보 딕셔너리들(점수 내림차순).
+        """
+        n = len(self.docs)
+        lo, hi = self.get_range(date_from, date_to)
+        allowed = self.get_allowed(source, keyword)
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            df = self.get_df(term)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in self.get_postings(term, lo, hi):
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[doc_id][5] / self.avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        top = sorted(scores.items(), key=lambda e: (-e[1], e[0]))[:k]
+        return [{**self.get_doc(doc_id), "score": score} for doc_id, score in top]
+
+    def get_doc(self, doc_id: int) -> Dict[str, str | int]:
+        """
+        문서 정보를 딕셔너리로 반환한다.
+
+        Args:
+            doc_id (int): 문서 id.
+
+        Returns:
+            Dict[str, str | int]: "id"와 DOCS의 필드들(url, title, source, keyword, date, length).
+        """
+        return {"id": doc_id, **dict(zip(self.fields, self.docs[doc_id]))}
+
+
+def main(filetype: utils.FileType, force_redo: bool = False) -> None:
+    """
+    토큰화된 데이터 파일의 역색인을 만든다.
+
+    Args:
+        filetype (utils.FileType): 토큰화된 데이터 파일의 FileType.
+        force_redo (bool, optional): 이미 색인이 존재하는 경우에도 다시 만들지의 여부. 기본적으로는 하지 않음.
+    """
+    dirname = get_index_dirname(filetype)
+    if not force_redo and utils.already(f"{dirname}/{LEXICON}"):
+        return
+    start = time.perf_counter()
+    build(filetype)
+    print(f"{dirname} built in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main(utils.FileType.NEWS_PROCESSED_UNIQUE, True)
+    main(utils.FileType.KIN_PROCESSED_UNIQUE, True)
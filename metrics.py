@@ -0,0 +1,318 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional, Iterator
+from contextlib import contextmanager
+from os import makedirs
+import threading
+import time
+import json
+
+# 히스토그램의 기본 버킷 경계(초).
+# 요청 지연 시간과 파싱 시간처럼 수 밀리초 ~ 수십 초 범위인 값에 맞춰져 있다.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 실행별 측정 결과를 저장하는 디렉토리(utils.RESULTS 아래).
+# utils가 이 모듈을 임포트하므로 여기서는 utils를 임포트하지 않는다.
+RUNS = "results/runs"
+
+# 레이블은 (이름, 값) 튜플을 이름순으로 정렬한 튜플로 저장한다.
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def get_labels(labels: Dict[str, str]) -> Labels:
+    """
+    레이블 딕셔너리를 지표 저장용 키로 바꾼다.
+
+    Args:
+        labels (Dict[str, str]): 레이블 이름과 값의 딕셔너리.
+
+    Returns:
+        Labels: 이름순으로 정렬된 (이름, 값) 튜플의 튜플.
+    """
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_labels(labels: Labels, extra: Optional[Dict[str, str]] = None) -> str:
+    """
+    레이블을 Prometheus 텍스트 형식의 {a="1",b="2"} 문자열로 바꾼다.
+
+    Args:
+        labels (Labels): get_labels()로 만든 레이블.
+        extra (Optional[Dict[str, str]], optional): 덧붙일 레이블(히스토그램의 le 등). 기본값 None.
+
+    Returns:
+        str: 레이블 문자열. 레이블이 없으면 빈 문자열.
+    """
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    카운터, 게이지, 히스토그램을 모아두는 스레드 안전한 저장소.
+    pipeline.py는 단계들을 여러 스레드에서 동시에 실행하므로 모든 갱신은 락 안에서 한다.
+
+    Usage:
+        registry = MetricsRegistry()
+        registry.inc("fetch_bytes_total", 1024, host="example.com")
+        with registry.timer("parse_seconds", host="example.com"):
+            ...
+        registry.write("results/runs/20240101T000000")
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        # 이름 -> 레이블 -> [버킷별 개수, 합계, 개수]
+        self.histograms: Dict[str, Dict[Labels, list]] = {}
+        self.buckets: Dict[str, Tuple[float, ...]] = {}
+        self.helps: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        """
+        지표의 설명을 등록한다. Prometheus 텍스트 형식의 # HELP 줄로 출력된다.
+
+        Args:
+            name (str): 지표 이름.
+            help_text (str): 지표 설명.
+        """
+        with self.lock:
+            self.helps[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """
+        카운터를 value만큼 늘린다.
+
+        Args:
+            name (str): 지표 이름. 관례상 _total로 끝난다.
+            value (float, optional): 늘릴 값. 기본값 1.
+            **labels (str): 레이블.
+        """
+        key = get_labels(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        """
+        게이지의 값을 정한다.
+
+        Args:
+            name (str): 지표 이름.
+            value (float): 게이지 값.
+            **labels (str): 레이블.
+        """
+        key = get_labels(labels)
+        with self.lock:
+            self.gauges.setdefault(name, {})[key] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+        **labels: str,
+    ) -> None:
+        """
+        히스토그램에 값 하나를 기록한다.
+        버킷 경계는 지표마다 처음 기록할 때 정해진다.
+
+        Args:
+            name (str): 지표 이름.
+            value (float): 기록할 값.
+            buckets (Tuple[float, ...], optional): 버킷 경계들(오름차순). 기본값 DEFAULT_BUCKETS.
+            **labels (str): 레이블.
+        """
+        key = get_labels(labels)
+        with self.lock:
+            buckets = self.buckets.setdefault(name, tuple(buckets))
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = [[0] * len(buckets), 0.0, 0]
+            counts, _, _ = series[key]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[key][1] += value
+            series[key][2] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """
+        with 블록의 실행 시간(초)을 히스토그램에 기록하는 컨텍스트 매니저.
+        블록에서 예외가 발생해도 기록한다.
+
+        Args:
+            name (str): 지표 이름. 관례상 _seconds로 끝난다.
+            **labels (str): 레이블.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self) -> None:
+        """
+        기록된 모든 값을 지운다(설명은 남긴다).
+        """
+        with self.lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+            self.buckets.clear()
+
+    def get_snapshot(self) -> Dict[str, Dict[str, List[dict]]]:
+        """
+        현재까지 기록된 값을 json으로 덤프할 수 있는 딕셔너리로 반환한다.
+
+        Returns:
+            Dict[str, Dict[str, List[dict]]]: 지표 종류별, 이름별 값들.
+                ["counters"], ["gauges"]: {이름: [{"labels": {...}, "value": 값}, ...]}.
+                ["histograms"]: {이름: [{"labels": {...}, "count": 개수, "sum": 합계,
+                    "mean": 평균, "buckets": {경계: 누적 개수, ..., "+Inf": 개수}}, ...]}.
+        """
+        with self.lock:
+            ret = {"counters": {}, "gauges": {}, "histograms": {}}
+            for kind, metrics in (("counters", self.counters), ("gauges", self.gauges)):
+                for name, series in sorted(metrics.items()):
+                    ret[kind][name] = [
+                        {"labels": dict(key), "value": value}
+                        for key, value in sorted(series.items())
+                    ]
+            for name, series in sorted(self.histograms.items()):
+                ret["histograms"][name] = []
+                for key, (counts, total, count) in sorted(series.items()):
+                    cumulative, acc = {}, 0
+                    for bound, n in zip(self.buckets[name], counts):
+                        acc += n
+                        cumulative[str(bound)] = acc
+                    cumulative["+Inf"] = count
+                    ret["histograms"][name].append(
+                        {
+                            "labels": dict(key),
+                            "count": count,
+                            "sum": total,
+                            "mean": total / count if count else 0.0,
+                            "buckets": cumulative,
+                        }
+                    )
+        return ret
+
+    def to_prometheus(self) -> str:
+        """
+        현재까지 기록된 값을 Prometheus 텍스트 형식(exposition format)으로 반환한다.
+        node_exporter의 textfile collector 등으로 그대로 수집할 수 있다.
+
+        Returns:
+            str: Prometheus 텍스트 형식 문자열.
+        """
+        snapshot = self.get_snapshot()
+        with self.lock:
+            helps = dict(self.helps)
+        lines = []
+        for kind, type_name in (("counters", "counter"), ("gauges", "gauge")):
+            for name, series in snapshot[kind].items():
+                if name in helps:
+                    lines.append(f"# HELP {name} {helps[name]}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for e in series:
+                    labels = get_labels(e["labels"])
+                    lines.append(f"{name}{format_labels(labels)} {e['value']}")
+        for name, series in snapshot["histograms"].items():
+            if name in helps:
+                lines.append(f"# HELP {name} {helps[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for e in series:
+                labels = get_labels(e["labels"])
+                for bound, n in e["buckets"].items():
+                    lines.append(
+                        f"{name}_bucket{format_labels(labels, {'le': bound})} {n}"
+                    )
+                lines.append(f"{name}_sum{format_labels(labels)} {e['sum']}")
+                lines.append(f"{name}_count{format_labels(labels)} {e['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, dirname: str) -> None:
+        """
+        dirname 디렉토리에 metrics.json과 metrics.prom을 저장한다.
+        디렉토리가 없으면 만든다.
+
+        Args:
+            dirname (str): 저장할 디렉토리.
+        """
+        makedirs(dirname, exist_ok=True)
+        with open(f"{dirname}/metrics.json", "wt", encoding="utf-8") as f:
+            json.dump(self.get_snapshot(), f, ensure_ascii=False, indent=4)
+        with open(f"{dirname}/metrics.prom", "wt", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+
+# 프로세스 전체에서 공유하는 기본 저장소.
+# 각 단계는 아래의 모듈 수준 함수로 이 저장소에 기록한다.
+REGISTRY = MetricsRegistry()
+
+describe = REGISTRY.describe
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set_gauge
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+reset = REGISTRY.reset
+get_snapshot = REGISTRY.get_snapshot
+to_prometheus = REGISTRY.to_prometheus
+write = REGISTRY.write
+
+describe("fetch_seconds", "HTTP GET latency per host, including retries.")
+describe("fetch_bytes_total", "Response body bytes downloaded per host.")
+describe("fetch_requests_total", "HTTP GET attempts per host and outcome.")
+describe("fetch_truncated_total", "Streamed responses not read to the end, per host and reason.")
+describe("fetch_retries_total", "Failed fetches requeued for retry, per host.")
+describe("fetch_errors_total", "Unexpected errors while fetching or decoding a page, per host and error.")
+describe("circuit_open_total", "Times a host's circuit breaker opened.")
+describe("parse_seconds", "Time spent extracting text from one page.")
+describe("selector_hits_total", "Main-text extractions per host by selector source.")
+describe("tokenize_articles_total", "Articles tokenized per file type.")
+describe("tokenize_seconds", "Time spent tokenizing one article.")
+describe("tokenize_articles_per_second", "Tokenization throughput of the last run.")
+describe("similarity_pairs_total", "Article pairs compared per similarity method.")
+describe("similarity_pairs_per_second", "Similarity throughput of the last run.")
+describe("llm_requests_total", "Chat completion requests per model and outcome.")
+describe("llm_tokens_total", "Prompt and completion tokens per model.")
+describe("llm_cost_usd_total", "Estimated LLM cost in USD per model.")
+describe("llm_retries_total", "Retried chat completion requests per model.")
+describe("llm_seconds", "Time to a successful verdict, including retries.")
+describe("stage_seconds", "Wall time of each pipeline stage.")
+describe("stage_cpu_seconds", "CPU time of each profiled stage's thread.")
+describe("stage_units_total", "Pipeline units per stage by manifest state.")
+
+
+def get_run_dir(run_id: Optional[str] = None) -> str:
+    """
+    실행별 측정 결과 디렉토리 경로를 반환한다.
+    run_id가 없으면 현재 시각(YYYYMMDDTHHMMSS)을 쓴다.
+
+    Args:
+        run_id (Optional[str], optional): 실행 id. 기본값 None.
+
+    Returns:
+        str: f"{RUNS}/{run_id}" 꼴의 디렉토리 경로.
+    """
+    if run_id is None:
+        run_id = time.strftime("%Y%m%dT%H%M%S")
+    return f"{RUNS}/{run_id}"
+
+
+if __name__ == "__main__":
+    with timer("parse_seconds", host="example.com"):
+        time.sleep(0.01)
+    inc("fetch_bytes_total", 1024, host="example.com")
+    print(json.dumps(get_snapshot(), indent=4))
+    print(to_prometheus())
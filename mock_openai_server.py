@@ -0,0 +1,458 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email.parser import BytesParser
+from email import policy
+from threading import Thread, RLock
+from zlib import crc32
+from random import Random
+import time
+import json
+import asyncio
+
+
+def get_mock_answer(messages: List[Dict[str, str]]) -> str:
+    """
+    모의 서버가 돌려줄 응답 문자열을 만든다.
+    마지막 메시지 내용의 crc32가 짝수면 Y, 홀수면 N으로,
+    같은 요청에는 항상 같은 응답을 준다.
+
+    Args:
+        messages (List[Dict[str, str]]): chat completions 요청의 메시지 리스트.
+
+    Returns:
+        str: "Y" 또는 "N"과 이유로 이루어진 두 줄짜리 응답 문자열.
+    """
+    content = messages[-1]["content"] if messages else ""
+    tf = "Y" if crc32(content.encode("utf-8")) % 2 == 0 else "N"
+    return f"{tf}\n이유: 모의 서버 응답."
+
+
+def get_chat_completion(body: Dict[str, str | float | List[Dict[str, str]]]) -> dict:
+    """
+    chat completions 요청 본문에 대한 모의 응답 객체를 만든다.
+
+    Args:
+        body (Dict[str, str | float | List[Dict[str, str]]]): chat completions 요청 본문.
+
+    Returns:
+        dict: OpenAI chat.completion 형식의 응답 딕셔너리.
+    """
+    messages = body.get("messages", [])
+    prompt_tokens = sum(len(e["content"]) for e in messages)
+    return {
+        "id": f"chatcmpl-mock-{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": get_mock_answer(messages)},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 10,
+            "total_tokens": prompt_tokens + 10,
+        },
+    }
+
+
+class MockHTTPServer(ThreadingHTTPServer):
+    """
+    동시 요청이 많을 때 연결이 대기열에서 밀리지 않도록 listen 대기열을 늘린 HTTP 서버.
+    """
+
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class MockOpenAIServer:
+    """
+    OpenAI API의 일부를 흉내내는 로컬 모의 서버.
+    실제 API 비용 없이 get_relevant_articles의 동작을 확인하기 위해 사용한다.
+    with 문으로 사용하면 별도 스레드에서 서버를 켜고 끈다.
+
+    현재 지원하는 엔드포인트:
+        - POST /v1/chat/completions: 실시간 판정. 지연 시간, 에러율, 429(요청 한도 초과)를 흉내낼 수 있다.
+        - POST /v1/files: 배치 입력 파일 업로드(multipart/form-data).
+        - GET /v1/files/{id}/content: 파일 내용 다운로드.
+        - POST /v1/batches: 배치 작업 생성.
+        - GET /v1/batches/{id}: 배치 작업 조회. 생성 후 batch_delay초가 지나면 완료된다.
+
+    Usage:
+        with MockOpenAIServer() as server:
+            client = AsyncOpenAI(api_key="mock", base_url=server.base_url)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        batch_delay: float = 1.0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        max_concurrent: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            host (str, optional): 서버 주소. 기본값 "127.0.0.1".
+            port (int, optional): 서버 포트. 0이면 빈 포트를 자동으로 고른다.
+            batch_delay (float, optional): 배치 작업이 완료되기까지 걸리는 시간(초). 기본값 1.
+            latency (float, optional): chat completions 응답 지연 시간(초). 기본값 0.
+            latency_jitter (float, optional): 지연 시간에 더해지는 0 ~ latency_jitter초의 무작위 값. 기본값 0.
+            error_rate (float, optional): 500 에러를 돌려줄 확률. 기본값 0.
+            rate_limit_rate (float, optional): 429 에러를 돌려줄 확률. 기본값 0.
+            max_concurrent (Optional[int], optional): 동시에 처리 중인 요청이 이 수를 넘으면 429를 돌려준다. 기본값 None(제한 없음).
+            retry_after (Optional[float], optional): 429 응답에 붙일 Retry-After 헤더(초). 기본값 None(붙이지 않음).
+            seed (Optional[int], optional): 에러 발생에 사용하는 난수 시드. 기본값 None.
+        """
+        self.batch_delay = batch_delay
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.random = Random(seed)
+        self.in_flight = 0
+        self.stats = {"requests": 0, "succeeded": 0, "errors": 0, "rate_limited": 0}
+        self.files: Dict[str, Tuple[str, str, bytes]] = {}
+        self.batches: Dict[str, dict] = {}
+        self.lock = RLock()
+        self.httpd = MockHTTPServer((host, port), self.get_handler())
+        self.thread: Optional[Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        AsyncOpenAI의 base_url로 넘겨줄 주소.
+        """
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> None:
+        """
+        별도의 데몬 스레드에서 서버를 시작한다.
+        """
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        서버를 종료한다.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockOpenAIServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def get_chat_response(
+        self, body: Dict[str, str | float | List[Dict[str, str]]]
+    ) -> Tuple[int, dict, Dict[str, str]]:
+        """
+        chat completions 요청 하나를 처리한다.
+        설정에 따라 429 또는 500을 돌려주거나, 지연 시간만큼 기다린 뒤 응답한다.
+        처리 결과는 stats에 누적된다.
+
+        Args:
+            body (Dict[str, str | float | List[Dict[str, str]]]): chat completions 요청 본문.
+
+        Returns:
+            Tuple[int, dict, Dict[str, str]]: (상태 코드, 응답 딕셔너리, 추가 헤더).
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            self.in_flight += 1
+            over_limit = (
+                self.max_concurrent is not None and self.in_flight > self.max_concurrent
+            )
+            dice = self.random.random()
+            delay = self.latency + self.random.random() * self.latency_jitter
+        try:
+            if over_limit or dice < self.rate_limit_rate:
+                with self.lock:
+                    self.stats["rate_limited"] += 1
+                headers = {}
+                if self.retry_after is not None:
+                    headers["Retry-After"] = str(self.retry_after)
+                error = {"message": "rate limit exceeded", "type": "rate_limit_error"}
+                return 429, {"error": error}, headers
+            time.sleep(delay)
+            if dice < self.rate_limit_rate + self.error_rate:
+                with self.lock:
+                    self.stats["errors"] += 1
+                error = {"message": "internal server error", "type": "server_error"}
+                return 500, {"error": error}, {}
+            with self.lock:
+                self.stats["succeeded"] += 1
+            return 200, get_chat_completion(body), {}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def add_file(self, filename: str, purpose: str, content: bytes) -> dict:
+        """
+        파일을 저장하고 OpenAI file 객체 형식의 딕셔너리를 반환한다.
+
+        Args:
+            filename (str): 파일명.
+            purpose (str): 파일 용도("batch", "batch_output" 등).
+            content (bytes): 파일 내용.
+
+        Returns:
+            dict: OpenAI file 객체 형식의 딕셔너리.
+        """
+        with self.lock:
+            file_id = f"file-mock-{len(self.files)}"
+            self.files[file_id] = (filename, purpose, content)
+        return self.get_file_object(file_id)
+
+    def get_file_object(self, file_id: str) -> dict:
+        """
+        저장된 파일의 OpenAI file 객체 형식 딕셔너리를 반환한다.
+
+        Args:
+            file_id (str): 파일 id.
+
+        Returns:
+            dict: OpenAI file 객체 형식의 딕셔너리.
+        """
+        filename, purpose, content = self.files[file_id]
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def add_batch(self, input_file_id: str, endpoint: str, window: str) -> dict:
+        """
+        배치 작업을 만든다.
+        결과는 작업을 완료 상태로 조회할 때 만든다.
+
+        Args:
+            input_file_id (str): 입력 파일 id.
+            endpoint (str): 배치 요청의 엔드포인트.
+            window (str): completion_window 문자열.
+
+        Returns:
+            dict: OpenAI batch 객체 형식의 딕셔너리.
+        """
+        with self.lock:
+            batch_id = f"batch-mock-{len(self.batches)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": endpoint,
+                "input_file_id": input_file_id,
+                "completion_window": window,
+                "status": "validating",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": int(time.time()),
+                "_created": time.monotonic(),
+            }
+        return self.get_batch_object(batch_id)
+
+    def get_batch_object(self, batch_id: str) -> dict:
+        """
+        배치 작업을 조회한다.
+        생성 후 batch_delay초가 지났으면 입력 파일의 모든 요청을 처리해서 완료 상태로 바꾼다.
+
+        Args:
+            batch_id (str): 배치 작업 id.
+
+        Returns:
+            dict: OpenAI batch 객체 형식의 딕셔너리.
+        """
+        with self.lock:
+            batch = self.batches[batch_id]
+            if batch["status"] == "validating":
+                batch["status"] = "in_progress"
+            elif (
+                batch["status"] == "in_progress"
+                and time.monotonic() - batch["_created"] >= self.batch_delay
+            ):
+                self.finish_batch(batch)
+            return {k: v for k, v in batch.items() if not k.startswith("_")}
+
+    def finish_batch(self, batch: dict) -> None:
+        """
+        배치 작업의 입력 파일에 있는 모든 요청에 응답하고,
+        결과 파일을 만들어 작업을 완료 상태로 바꾼다.
+
+        Args:
+            batch (dict): 완료할 배치 작업 딕셔너리.
+        """
+        _, _, content = self.files[batch["input_file_id"]]
+        lines = []
+        for line in content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            line = json.loads(line)
+            lines.append(
+                {
+                    "id": f"batch_req_{line['custom_id']}",
+                    "custom_id": line["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": line["custom_id"],
+                        "body": get_chat_completion(line["body"]),
+                    },
+                    "error": None,
+                }
+            )
+        output = "\n".join(json.dumps(e, ensure_ascii=False) for e in lines)
+        output_file = self.add_file(
+            f"{batch['id']}_output.jsonl", "batch_output", output.encode("utf-8")
+        )
+        batch["output_file_id"] = output_file["id"]
+        batch["status"] = "completed"
+
+    def get_handler(self) -> type:
+        """
+        이 서버 객체에 묶인 요청 핸들러 클래스를 만든다.
+
+        Returns:
+            type: BaseHTTPRequestHandler를 상속한 핸들러 클래스.
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def send_json(
+                self,
+                obj: dict,
+                status: int = 200,
+                headers: Optional[Dict[str, str]] = None,
+            ) -> None:
+                data = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for key, val in (headers or {}).items():
+                    self.send_header(key, val)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def read_body(self) -> bytes:
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_GET(self) -> None:
+                parts = self.path.split("?")[0].strip("/").split("/")
+                try:
+                    match parts:
+                        case ["v1", "files", file_id, "content"]:
+                            content = server.files[file_id][2]
+                            self.send_response(200)
+                            self.send_header("Content-Type", "application/octet-stream")
+                            self.send_header("Content-Length", str(len(content)))
+                            self.end_headers()
+                            self.wfile.write(content)
+                        case ["v1", "files", file_id]:
+                            self.send_json(server.get_file_object(file_id))
+                        case ["v1", "batches", batch_id]:
+                            self.send_json(server.get_batch_object(batch_id))
+                        case _:
+                            self.send_json({"error": {"message": "not found"}}, 404)
+                except KeyError:
+                    self.send_json({"error": {"message": "not found"}}, 404)
+
+            def do_POST(self) -> None:
+                parts = self.path.split("?")[0].strip("/").split("/")
+                body = self.read_body()
+                match parts:
+                    case ["v1", "chat", "completions"]:
+                        status, obj, headers = server.get_chat_response(json.loads(body))
+                        self.send_json(obj, status, headers)
+                    case ["v1", "files"]:
+                        message = BytesParser(policy=policy.default).parsebytes(
+                            b"Content-Type: "
+                            + self.headers["Content-Type"].encode("latin-1")
+                            + b"\r\n\r\n"
+                            + body
+                        )
+                        fields = {}
+                        for part in message.iter_parts():
+                            name = part.get_param("name", header="content-disposition")
+                            fields[name] = (part.get_filename(), part.get_payload(decode=True))
+                        filename, content = fields["file"]
+                        purpose = fields.get("purpose", (None, b"batch"))[1].decode()
+                        self.send_json(server.add_file(filename, purpose, content))
+                    case ["v1", "batches"]:
+                        body = json.loads(body)
+                        self.send_json(
+                            server.add_batch(
+                                body["input_file_id"],
+                                body["endpoint"],
+                                body["completion_window"],
+                            )
+                        )
+                    case _:
+                        self.send_json({"error": {"message": "not found"}}, 404)
+
+        return Handler
+
+
+async def main(n: int = 20) -> None:
+    """
+    모의 서버를 띄우고 get_relevant_articles의 배치 모드를 실행해서,
+    모든 아티클이 판정되는지 확인한다.
+
+    Args:
+        n (int, optional): 확인에 사용할 가짜 아티클 개수. 기본값 20.
+    """
+    import tempfile
+    from os import path
+    import get_relevant_articles
+
+    articles = [
+        {"title": f"제목 {i}", "url_naver": f"https://example.com/{i}", "text": f"본문 {i}"}
+        for i in range(n)
+    ]
+    with MockOpenAIServer(batch_delay=0.5) as server, tempfile.TemporaryDirectory() as d:
+        result = await get_relevant_articles.get_relatedness_list_batch(
+            articles,
+            "키워드",
+            "설명",
+            "mock",
+            "mock",
+            path.join(d, "batch"),
+            journal=path.join(d, "journal.jsonl"),
+            base_url=server.base_url,
+            poll_interval=0.2,
+        )
+    expected = [
+        get_relevant_articles.parse_answer(
+            get_mock_answer(
+                get_relevant_articles.get_request_body(
+                    e["title"], e["text"], get_relevant_articles.get_base_query("키워드", "설명")
+                )["messages"]
+            )
+        )
+        for e in articles
+    ]
+    assert result == expected, "배치 결과가 모의 서버의 응답과 다릅니다."
+    print(f"{n} articles judged via batch mode")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,278 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional
+from collections import defaultdict
+from functools import lru_cache
+from urllib import parse
+import re
+import soupsieve
+from parser_backend import SelectorMatcher, ContainerWatcher
+from selector_stats import SelectorStats
+import utils
+
+# 호스트의 셀렉터가 등록되지 않았을 때 쓰는, 가장 자주 쓰이는 것으로 보이는 셀렉터.
+DEFAULT_SELECTOR = "#article-view-content-div"
+
+# 규칙 파일들. 형식은 NewsRules 참조.
+SELECTORS_FNAME = f"{utils.MATERIALS}/news_maintext_selectors.txt"
+REDIRECTIONS_FNAME = f"{utils.MATERIALS}/news_maintext_redirections.txt"
+ATTRIBUTES_FNAME = f"{utils.MATERIALS}/news_maintext_attributes.txt"
+
+
+def normalize_host(host: str) -> str:
+    """
+    호스트를 규칙의 키로 쓰는 형태로 바꾼다. 소문자로 바꾸고, 맨 앞의 "www."과 맨 뒤의 "."을 뺀다.
+    utils.get_host_from_url()의 결과와 같은 형태다.
+
+    Args:
+        host (str): 호스트.
+
+    Returns:
+        str: 정규화된 호스트.
+    """
+    host = host.strip().lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+@lru_cache(maxsize=1 << 16)
+def get_host(url: str) -> str:
+    """
+    url의 정규화된 호스트를 구한다. 같은 url은 한 번만 파싱한다.
+    기사 하나를 처리하는 동안 리디렉션 규칙, 응답 url의 셀렉터, 속성 규칙을 찾을 때 같은 url을 여러 번 쓰므로 기억해 둔다.
+
+    Args:
+        url (str): url.
+
+    Returns:
+        str: 정규화된 호스트. 호스트가 없는 url이면 "".
+    """
+    return normalize_host(parse.urlsplit(url).hostname or "")
+
+
+class NewsRules:
+    """
+    기사 본문 추출 규칙(셀렉터, 리디렉션, 속성)을 한 번 읽고 검증, 컴파일한 객체.
+        - 모든 규칙은 정규화된 호스트(normalize_host())를 키로 가지므로 기사마다 딕셔너리 조회 한 번으로 찾는다.
+        - 리디렉션 패턴은 미리 컴파일해 두므로 re 모듈의 캐시 크기와 관계가 없다.
+        - 만들 때 규칙 전체를 검증하고, 잘못된 규칙이 있으면 전부 모아서 ValueError를 일으킨다.
+
+    규칙 파일의 형식:
+        news_maintext_selectors.txt: {"호스트": ["셀렉터", ...], ...}
+        news_maintext_redirections.txt: {"호스트": [["패턴", ...], "접두사", "접미사"], ...}
+            패턴은 첫 번째 그룹으로 기사 키를 찾는 정규식이며, 리디렉션된 url은 접두사 + 키 + 접미사.
+        news_maintext_attributes.txt: {"호스트": "본문이 들어있는 속성 이름", ...}
+
+    Usage:
+        rules = NewsRules.load()
+        url = rules.get_redirection_link(url)
+        selectors = rules.get_selectors(get_host(res.url))
+    """
+
+    def __init__(
+        self,
+        selector: Dict[str, List[str]],
+        redirect: Dict[str, Tuple[List[str], str, str]],
+        attribute: Dict[str, str],
+        selector_stats: Optional[SelectorStats] = None,
+    ) -> None:
+        """
+        Args:
+            selector (Dict[str, List[str]]): 호스트 -> 셀렉터 리스트.
+            redirect (Dict[str, Tuple[List[str], str, str]]): 호스트 -> (패턴들, 접두사, 접미사).
+            attribute (Dict[str, str]): 호스트 -> 본문이 들어있는 속성 이름.
+            selector_stats (Optional[SelectorStats], optional): 셀렉터 통계. 기본값 None(빈 통계).
+
+        Raises:
+            ValueError: 잘못된 규칙이 있는 경우.
+        """
+        errors = []
+        selector = self.normalize_keys("selector", selector, errors)
+        redirect = self.normalize_keys("redirect", redirect, errors)
+        attribute = self.normalize_keys("attribute", attribute, errors)
+
+        for host, selectors in selector.items():
+            if not isinstance(selectors, list) or not all(isinstance(e, str) for e in selectors):
+                errors.append(f"selector[{host!r}]: not a list of strings")
+                continue
+            for e in selectors:
+                try:
+                    soupsieve.compile(e)
+                except soupsieve.SelectorSyntaxError as err:
+                    errors.append(f"selector[{host!r}]: invalid selector {e!r} ({err.msg})")
+
+        self.redirect_rules: Dict[str, Tuple[List[re.Pattern], str, str]] = {}
+        for host, rule in redirect.items():
+            if not (
+                isinstance(rule, list)
+                and len(rule) == 3
+                and isinstance(rule[0], list)
+                and isinstance(rule[1], str)
+                and isinstance(rule[2], str)
+            ):
+                errors.append(f"redirect[{host!r}]: expected [[patterns], prefix, suffix]")
+                continue
+            patterns = []
+            for pat in rule[0]:
+                try:
+                    pattern = re.compile(pat)
+                except (re.error, TypeError) as err:
+                    errors.append(f"redirect[{host!r}]: invalid pattern {pat!r} ({err})")
+                    continue
+                if pattern.groups < 1:
+                    errors.append(f"redirect[{host!r}]: pattern {pat!r} has no group")
+                    continue
+                patterns.append(pattern)
+            self.redirect_rules[host] = (patterns, rule[1], rule[2])
+
+        for host, name in attribute.items():
+            if not isinstance(name, str) or not name:
+                errors.append(f"attribute[{host!r}]: expected a non-empty string")
+
+        if errors:
+            raise ValueError("invalid news maintext rules:\n" + "\n".join(f"  - {e}" for e in errors))
+
+        self.selector: Dict[str, List[str]] = defaultdict(list, selector)
+        self.redirect = redirect
+        self.attribute = attribute
+        self.selector_set: List[str] = list(
+            dict.fromkeys(sum(selector.values(), []) + [DEFAULT_SELECTOR])
+        )
+        self.selector_matcher = SelectorMatcher(self.selector_set)
+        self.selector_stats = selector_stats or SelectorStats()
+        self.host_matchers: Dict[str, SelectorMatcher] = {}
+
+    @staticmethod
+    def normalize_keys(name: str, rules: Dict[str, object], errors: List[str]) -> Dict[str, object]:
+        """
+        규칙 딕셔너리의 호스트 키를 정규화한다. 정규화하면 같아지는 키들의 규칙이 다르면 errors에 기록한다.
+
+        Args:
+            name (str): 규칙 이름(오류 메시지용).
+            rules (Dict[str, object]): 호스트 -> 규칙.
+            errors (List[str]): 오류 메시지들을 덧붙일 리스트.
+
+        Returns:
+            Dict[str, object]: 정규화된 호스트 -> 규칙.
+        """
+        if not isinstance(rules, dict):
+            errors.append(f"{name}: expected an object of host -> rule")
+            return {}
+        ret = {}
+        for host, rule in rules.items():
+            key = normalize_host(host)
+            if key in ret and ret[key] != rule:
+                errors.append(f"{name}[{host!r}]: conflicts with another rule for {key!r}")
+                continue
+            ret[key] = rule
+        return ret
+
+    @classmethod
+    def load(cls) -> "NewsRules":
+        """
+        MATERIALS의 셀렉터, 리디렉션, 속성 파일과 셀렉터 통계를 읽는다.
+
+        Raises:
+            ValueError: 잘못된 규칙이 있는 경우.
+
+        Returns:
+            NewsRules: 규칙 객체.
+        """
+        return cls(
+            utils.get_json_from_file(SELECTORS_FNAME),
+            utils.get_json_from_file(REDIRECTIONS_FNAME),
+            utils.get_json_from_file(ATTRIBUTES_FNAME),
+            SelectorStats.load(),
+        )
+
+    def save(self) -> None:
+        """
+        실행 중에 바뀌는 셀렉터(selector_set에서 새로 찾은 셀렉터)와 셀렉터 통계를 파일에 쓴다.
+        """
+        utils.write_json_on_file(SELECTORS_FNAME, self.selector)
+        self.selector_stats.save()
+
+    def get_redirection_link(self, url: str) -> str:
+        """
+        많은 리디렉션이 일어나 일반적으로 수집할 수 없거나, 감지할 수 없는 리디렉션이 있거나(주로 js를 이용한),
+        기타 다른 링크를 활용해야 하는 상황에서 현재 url을 리디렉션이 완료된 url로 바꾼다.
+
+        Args:
+            url (str): 원래 기사 url.
+
+        Returns:
+            str: 리디렉션 결과로 변환된 기사 url. 규칙이 없거나 맞는 패턴이 없으면 url 그대로.
+        """
+        rule = self.redirect_rules.get(get_host(url))
+        if rule is None:
+            return url
+        patterns, pre, post = rule
+        for pattern in patterns:
+            key = pattern.search(url)
+            if key is not None:
+                return pre + key.group(1) + post
+        return url
+
+    def get_selectors(self, host: str) -> List[str]:
+        """
+        호스트의 셀렉터들을 시도할 순서(SelectorStats.order())대로 반환한다.
+        일부 사이트는 기사마다 셀렉터가 달라서 리스트다. 등록되지 않은 호스트면 [DEFAULT_SELECTOR].
+
+        Args:
+            host (str): 정규화된 호스트.
+
+        Returns:
+            List[str]: css 셀렉터들.
+        """
+        selectors = self.selector.get(host, [DEFAULT_SELECTOR])
+        return self.selector_stats.order(host, selectors)
+
+    def get_attribute(self, host: str) -> str:
+        """
+        Args:
+            host (str): 정규화된 호스트.
+
+        Returns:
+            str: 본문이 들어있는 속성 이름. 없으면 ""(요소의 텍스트).
+        """
+        return self.attribute.get(host, "")
+
+    def learn(self, host: str, selector: str) -> None:
+        """
+        selector_set에서 찾은 셀렉터를 호스트의 셀렉터로 등록한다.
+
+        Args:
+            host (str): 정규화된 호스트.
+            selector (str): css 셀렉터.
+        """
+        if selector not in self.selector[host]:
+            self.selector[host].append(selector)
+            self.host_matchers.pop(host, None)
+
+    def get_container_watcher(self, url: str) -> Optional[ContainerWatcher]:
+        """
+        url의 호스트에 등록된 셀렉터로 본문 요소가 닫혔는지 확인하는 ContainerWatcher를 만든다.
+        셀렉터가 등록되지 않은 호스트는 모든 호스트의 셀렉터(selector_set)로 찾아야 하므로 None이다.
+
+        Args:
+            url (str): (리디렉션이 끝난) 응답 url.
+
+        Returns:
+            Optional[ContainerWatcher]: 본문 요소 감시자. 셀렉터가 등록되지 않은 호스트면 None.
+        """
+        host = get_host(url)
+        if not self.selector.get(host):
+            return None
+        if host not in self.host_matchers:
+            self.host_matchers[host] = SelectorMatcher(self.selector[host])
+        return ContainerWatcher(
+            self.host_matchers[host], self.get_attribute(host), utils.NEWS_MAINTEXT_LOWER_BOUND
+        )
+
+    def get_snapshot(self) -> Dict[str, Dict[str, List[str] | list | str]]:
+        """
+        Returns:
+            Dict[str, Dict[str, List[str] | list | str]]: 규칙 파일과 같은 형식의 {"selector", "redirect", "attribute"}.
+        """
+        return {"selector": dict(self.selector), "redirect": self.redirect, "attribute": self.attribute}
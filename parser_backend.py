@@ -0,0 +1,439 @@
+#!python
+
+from typing import List, Dict, Tuple, FrozenSet, Iterator, Optional, Any
+from collections import defaultdict
+from functools import cache
+import re
+from bs4 import BeautifulSoup
+from lxml import etree
+from cssselect import HTMLTranslator, SelectorError
+
+# 본문 추출에 쓸 수 있는 파서 백엔드들.
+#   "lxml": libxml2(C) 파서와 cssselect로 번역한 XPath. 기본값.
+#   "bs4": BeautifulSoup + html.parser. 원래 구현이며, 다른 백엔드의 결과를 확인하는 기준이다.
+DEFAULT_BACKEND = "lxml"
+
+# bs4의 get_text()와 같이 script, style, template 안의 문자열과 주석을 뺀 텍스트 노드들.
+TEXT_XPATH = etree.XPath(
+    "descendant-or-self::text()[not(ancestor::script or ancestor::style or ancestor::template)]"
+)
+
+# SelectorMatcher가 직접 매칭하는 셀렉터의 한 단계(태그, id, 클래스). 예: "div#article.body", "*.content".
+COMPOUND_PATTERN = re.compile(r"^([a-zA-Z][\w-]*|\*)?((?:[#.][\w-]+)*)$")
+
+
+class Bs4Backend:
+    """
+    BeautifulSoup(html.parser) 백엔드. 느리지만 기준이 되는 구현.
+    """
+
+    name = "bs4"
+
+    def parse(self, html: str) -> BeautifulSoup:
+        """
+        Args:
+            html (str): html 문자열.
+
+        Returns:
+            BeautifulSoup: 문서 객체.
+        """
+        return BeautifulSoup(html, "html.parser")
+
+    def select_one(self, root: BeautifulSoup, selector: str) -> Optional[Any]:
+        """
+        Args:
+            root (BeautifulSoup): parse()의 결과.
+            selector (str): css 셀렉터.
+
+        Returns:
+            Optional[Any]: 셀렉터에 맞는 첫 요소. 없으면 None.
+        """
+        return root.select_one(selector)
+
+    def get_text(self, node: Any, attribute: str = "") -> str:
+        """
+        요소의 텍스트를 추출하고 스트립한다. attribute가 있으면 그 속성 값을 추출한다.
+
+        Args:
+            node (Any): select_one()의 결과.
+            attribute (str, optional): 본문이 들어있는 속성 이름. 기본값 ""(요소의 텍스트).
+
+        Returns:
+            str: 본문 문자열.
+        """
+        if not attribute:
+            return node.get_text().strip()
+        return node[attribute].strip()
+
+    def iter_elements(self, root: BeautifulSoup) -> Iterator[Any]:
+        """
+        Args:
+            root (BeautifulSoup): parse()의 결과.
+
+        Yields:
+            Iterator[Any]: 문서 순서대로의 요소들.
+        """
+        yield from root.find_all(True)
+
+    def get_name(self, node: Any) -> str:
+        return node.name
+
+    def get_id(self, node: Any) -> Optional[str]:
+        return node.get("id")
+
+    def get_classes(self, node: Any) -> List[str]:
+        return node.get("class") or []
+
+    def get_parent(self, node: Any) -> Optional[Any]:
+        return node.parent
+
+
+class LxmlBackend:
+    """
+    lxml 백엔드. 파싱과 셀렉터 탐색이 모두 C에서 이루어진다.
+    셀렉터는 cssselect로 XPath로 번역해서 셀렉터마다 한 번만 컴파일한다(get_xpath()).
+    """
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        self.parser = etree.HTMLParser()
+        self.bytes_parser = etree.HTMLParser(encoding="utf-8")
+
+    def parse(self, html: str) -> Optional[etree._Element]:
+        """
+        Args:
+            html (str): html 문자열.
+
+        Returns:
+            Optional[etree._Element]: 문서의 루트 요소. 빈 문서면 None.
+        """
+        try:
+            return etree.fromstring(html, self.parser)
+        except ValueError:
+            # 인코딩 선언(<?xml ... encoding=...?>)이 있는 str은 lxml이 받지 않으므로 utf-8 바이트로 파싱한다.
+            return etree.fromstring(html.encode("utf-8"), self.bytes_parser)
+
+    def select_one(self, root: Optional[etree._Element], selector: str) -> Optional[etree._Element]:
+        """
+        Args:
+            root (Optional[etree._Element]): parse()의 결과.
+            selector (str): css 셀렉터.
+
+        Returns:
+            Optional[etree._Element]: 셀렉터에 맞는 첫 요소. 없거나 번역할 수 없는 셀렉터면 None.
+        """
+        xpath = get_xpath(selector)
+        if root is None or xpath is None:
+            return None
+        result = xpath(root)
+        return result[0] if result else None
+
+    def get_text(self, node: etree._Element, attribute: str = "") -> str:
+        """
+        Bs4Backend.get_text()와 같다.
+
+        Args:
+            node (etree._Element): select_one()의 결과.
+            attribute (str, optional): 본문이 들어있는 속성 이름. 기본값 ""(요소의 텍스트).
+
+        Returns:
+            str: 본문 문자열.
+        """
+        if not attribute:
+            return "".join(TEXT_XPATH(node)).strip()
+        return node.attrib[attribute].strip()
+
+    def iter_elements(self, root: Optional[etree._Element]) -> Iterator[etree._Element]:
+        """
+        Args:
+            root (Optional[etree._Element]): parse()의 결과.
+
+        Yields:
+            Iterator[etree._Element]: 문서 순서대로의 요소들(주석 제외).
+        """
+        if root is not None:
+            yield from root.iter(etree.Element)
+
+    def get_name(self, node: etree._Element) -> str:
+        return node.tag
+
+    def get_id(self, node: etree._Element) -> Optional[str]:
+        return node.get("id")
+
+    def get_classes(self, node: etree._Element) -> List[str]:
+        return node.get("class", "").split()
+
+    def get_parent(self, node: etree._Element) -> Optional[etree._Element]:
+        return node.getparent()
+
+
+@cache
+def get_xpath(selector: str) -> Optional[etree.XPath]:
+    """
+    css 셀렉터를 컴파일된 XPath로 번역한다. 같은 셀렉터는 한 번만 번역한다.
+    cssselect가 지원하지 않는 셀렉터는 경고를 한 번 출력하고 None을 반환한다(그 셀렉터로는 찾지 못함).
+
+    Args:
+        selector (str): css 셀렉터.
+
+    Returns:
+        Optional[etree.XPath]: 컴파일된 XPath.
+    """
+    try:
+        return etree.XPath(HTMLTranslator().css_to_xpath(selector))
+    except SelectorError as err:
+        print(f"unsupported selector {selector!r}: {err}")
+        return None
+
+
+# parse_selector()의 결과. 왼쪽부터 (태그, id, 클래스들) 단계들과, 단계 사이의 결합자(" " | ">")들.
+Compound = Tuple[str, str, FrozenSet[str]]
+ParsedSelector = Tuple[Tuple[Compound, ...], Tuple[str, ...]]
+
+
+def parse_selector(selector: str) -> Optional[ParsedSelector]:
+    """
+    태그, id, 클래스와 자손(공백), 자식(>) 결합자로만 이루어진 셀렉터를 단계별로 나눈다.
+
+    Args:
+        selector (str): css 셀렉터.
+
+    Returns:
+        Optional[ParsedSelector]: (단계들, 결합자들). 그 밖의 문법이 있는 셀렉터면 None.
+    """
+    compounds, combinators = [], []
+    combinator = None
+    for token in re.findall(r">|[^\s>]+", selector):
+        if token == ">":
+            if not compounds or combinator is not None:
+                return None
+            combinator = ">"
+            continue
+        match = COMPOUND_PATTERN.match(token)
+        if match is None:
+            return None
+        if compounds:
+            combinators.append(combinator or " ")
+        combinator = None
+        tag = (match.group(1) or "*").lower()
+        parts = re.findall(r"[#.][\w-]+", match.group(2))
+        ids = {e[1:] for e in parts if e[0] == "#"}
+        if len(ids) > 1:
+            return None
+        classes = frozenset(e[1:] for e in parts if e[0] == ".")
+        compounds.append((tag, ids.pop() if ids else "", classes))
+    if not compounds or combinator is not None:
+        return None
+    return tuple(compounds), tuple(combinators)
+
+
+class SelectorMatcher:
+    """
+    여러 셀렉터를 한 번에 매칭하는 컴파일된 매처.
+    셀렉터마다 select_one()으로 트리 전체를 탐색하는 대신, 문서를 한 번만 순회하면서
+    요소의 id, 클래스, 태그로 후보 셀렉터만 골라(가장 오른쪽 단계 기준) 오른쪽에서 왼쪽으로 조상을 확인한다.
+    parse_selector()가 나눌 수 없는 셀렉터는 백엔드의 select_one()으로 따로 찾는다.
+
+    Usage:
+        matcher = SelectorMatcher(["#article-view-content-div", "div.news > p"])
+        nodes = matcher.select_first(backend, root)  # 셀렉터마다 select_one()의 결과
+    """
+
+    def __init__(self, selectors: List[str]) -> None:
+        """
+        Args:
+            selectors (List[str]): css 셀렉터들.
+        """
+        self.selectors = list(selectors)
+        self.parsed: Dict[int, ParsedSelector] = {}
+        self.complex: List[int] = []
+        self.by_id: Dict[str, List[int]] = defaultdict(list)
+        self.by_class: Dict[str, List[int]] = defaultdict(list)
+        self.by_tag: Dict[str, List[int]] = defaultdict(list)
+        self.universal: List[int] = []
+
+        for i, selector in enumerate(self.selectors):
+            parsed = parse_selector(selector)
+            if parsed is None:
+                self.complex.append(i)
+                continue
+            self.parsed[i] = parsed
+            tag, id_, classes = parsed[0][-1]
+            if id_:
+                self.by_id[id_].append(i)
+            elif classes:
+                self.by_class[min(classes)].append(i)
+            elif tag != "*":
+                self.by_tag[tag].append(i)
+            else:
+                self.universal.append(i)
+
+    def match_compound(self, backend: Bs4Backend | LxmlBackend, node: Any, compound: Compound) -> bool:
+        tag, id_, classes = compound
+        if tag != "*" and backend.get_name(node) != tag:
+            return False
+        if id_ and backend.get_id(node) != id_:
+            return False
+        return not classes or classes.issubset(backend.get_classes(node))
+
+    def match(self, backend: Bs4Backend | LxmlBackend, node: Any, parsed: ParsedSelector, k: int) -> bool:
+        """
+        node가 셀렉터의 k번째 단계에 맞고, 조상들이 그 왼쪽 단계들에 맞는지 확인한다.
+
+        Args:
+            backend (Bs4Backend | LxmlBackend): 파서 백엔드.
+            node (Any): 요소.
+            parsed (ParsedSelector): parse_selector()의 결과.
+            k (int): 단계 번호.
+
+        Returns:
+            bool: 맞는지의 여부.
+        """
+        compounds, combinators = parsed
+        if not self.match_compound(backend, node, compounds[k]):
+            return False
+        if k == 0:
+            return True
+        parent = backend.get_parent(node)
+        if combinators[k - 1] == ">":
+            return parent is not None and self.match(backend, parent, parsed, k - 1)
+        while parent is not None:
+            if self.match(backend, parent, parsed, k - 1):
+                return True
+            parent = backend.get_parent(parent)
+        return False
+
+    def get_candidates(self, backend: Bs4Backend | LxmlBackend, node: Any) -> List[int]:
+        """
+        요소의 id, 클래스, 태그로 가장 오른쪽 단계가 맞을 수 있는 셀렉터들을 고른다.
+
+        Args:
+            backend (Bs4Backend | LxmlBackend): 파서 백엔드.
+            node (Any): 요소.
+
+        Returns:
+            List[int]: 셀렉터 번호들(parse_selector()로 나눌 수 있는 셀렉터만).
+        """
+        candidates = list(self.universal)
+        id_ = backend.get_id(node)
+        if id_ in self.by_id:
+            candidates += self.by_id[id_]
+        for cls in backend.get_classes(node):
+            if cls in self.by_class:
+                candidates += self.by_class[cls]
+        candidates += self.by_tag.get(backend.get_name(node), [])
+        return candidates
+
+    def get_matches(self, backend: Bs4Backend | LxmlBackend, node: Any) -> List[int]:
+        """
+        요소에 맞는 셀렉터들을 구한다. parse_selector()로 나눌 수 없는 셀렉터는 확인하지 않는다.
+
+        Args:
+            backend (Bs4Backend | LxmlBackend): 파서 백엔드.
+            node (Any): 요소.
+
+        Returns:
+            List[int]: 셀렉터 번호들.
+        """
+        return [
+            i
+            for i in self.get_candidates(backend, node)
+            if self.match(backend, node, self.parsed[i], len(self.parsed[i][0]) - 1)
+        ]
+
+    def select_first(self, backend: Bs4Backend | LxmlBackend, root: Any) -> List[Optional[Any]]:
+        """
+        문서를 한 번 순회해서 셀렉터마다 처음(문서 순서)으로 맞는 요소를 찾는다.
+        셀렉터마다 backend.select_one(root, selector)를 부른 것과 같은 결과다.
+
+        Args:
+            backend (Bs4Backend | LxmlBackend): 파서 백엔드.
+            root (Any): backend.parse()의 결과.
+
+        Returns:
+            List[Optional[Any]]: selectors 순서대로의 요소. 맞는 요소가 없으면 None.
+        """
+        found: List[Optional[Any]] = [None] * len(self.selectors)
+        remaining = len(self.parsed)
+        for node in backend.iter_elements(root):
+            if not remaining:
+                break
+            for i in self.get_candidates(backend, node):
+                if found[i] is None and self.match(backend, node, self.parsed[i], len(self.parsed[i][0]) - 1):
+                    found[i] = node
+                    remaining -= 1
+        for i in self.complex:
+            found[i] = backend.select_one(root, self.selectors[i])
+        return found
+
+
+class ContainerWatcher:
+    """
+    청크 단위로 받는 html을 lxml의 점진적 파서(HTMLPullParser)에 넣으면서, 본문 요소가 닫혔는지 확인한다.
+    본문 요소는 matcher의 셀렉터에 맞고 본문(get_text())이 lower_bound 이상인 요소다.
+    스트리밍으로 받는 중에 본문 요소가 닫히면 나머지(광고, 스크립트, 관련 기사 등)는 받지 않아도 된다.
+
+    Usage:
+        watcher = ContainerWatcher(SelectorMatcher(selectors))
+        for chunk in chunks:
+            if watcher.feed(chunk):
+                break
+    """
+
+    def __init__(self, matcher: SelectorMatcher, attribute: str = "", lower_bound: int = 0) -> None:
+        """
+        Args:
+            matcher (SelectorMatcher): 본문 셀렉터들의 매처.
+            attribute (str, optional): 본문이 들어있는 속성 이름. 기본값 ""(요소의 텍스트).
+            lower_bound (int, optional): 본문 요소로 볼 최소 본문 길이. 기본값 0.
+        """
+        self.matcher = matcher
+        self.attribute = attribute
+        self.lower_bound = lower_bound
+        self.backend = BACKENDS["lxml"]
+        self.parser = etree.HTMLPullParser(events=("end",))
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Args:
+            chunk (bytes): 이어서 받은 html 바이트.
+
+        Returns:
+            bool: 본문 요소가 닫혔는지의 여부.
+        """
+        self.parser.feed(chunk)
+        for _, node in self.parser.read_events():
+            if not self.matcher.get_matches(self.backend, node):
+                continue
+            try:
+                text = self.backend.get_text(node, self.attribute)
+            except KeyError:
+                continue
+            if len(text) >= self.lower_bound:
+                return True
+        return False
+
+
+BACKENDS: Dict[str, Bs4Backend | LxmlBackend] = {
+    "bs4": Bs4Backend(),
+    "lxml": LxmlBackend(),
+}
+
+
+def get_backend(name: str = DEFAULT_BACKEND) -> Bs4Backend | LxmlBackend:
+    """
+    이름에 해당하는 파서 백엔드를 반환한다.
+
+    Args:
+        name (str, optional): 백엔드 이름("lxml" | "bs4"). 기본값 DEFAULT_BACKEND.
+
+    Raises:
+        ValueError: 없는 백엔드 이름인 경우.
+
+    Returns:
+        Bs4Backend | LxmlBackend: 파서 백엔드.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"unknown parser backend: {name!r} (one of {', '.join(BACKENDS)})")
+    return BACKENDS[name]
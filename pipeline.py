@@ -0,0 +1,781 @@
+#!python
+
+from typing import List, Dict, Set, Tuple, Optional, Any, Callable
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from importlib import import_module
+from importlib.util import find_spec
+from enum import Enum
+from copy import deepcopy
+from contextlib import ExitStack
+from functools import cache
+from os import remove, path
+import sys
+import time
+import argparse
+import traceback
+import metrics
+import utils
+
+# 시작 시간을 줄이기 위해, 단계 모듈은 실행 직전에 import_module()로 임포트하고
+# asyncio, inspect, profiling처럼 일부 경로에서만 쓰는 모듈은 그 경로에서 임포트한다.
+# benchmarks/import_time.py로 임포트 시간 예산을 확인할 수 있다.
+
+# 기본 파이프라인의 단계 정의.
+# 각 단계는 실행할 모듈, 모듈의 main()에 넘길 인자, 먼저 끝나야 하는 단계들로 이루어진다.
+# 인자 중 아래 형식의 문자열은 resolve_value()에서 실제 값으로 바뀐다.
+#   - "FileType.X": utils.FileType.X
+#   - "$news", "$kin": 설정 파일의 뉴스, 지식IN 키워드 리스트.
+#   - "$keyword", "$description": 설정 파일의 상위 키워드와 그 설명.
+#   - {"$product": [a, b]}: a와 b의 곱집합(itertools.product)의 리스트.
+# 뉴스 단계와 지식IN 단계는 서로 의존하지 않으므로 동시에 실행된다.
+# 두 get_news_maintext 단계는 같은 규칙 파일(셀렉터, 셀렉터 통계)을 읽고 덮어쓰며 각자 파서 프로세스 풀을 띄우므로,
+# crawl 단계가 api 단계에 의존하게 해서 차례로 실행한다(api 단계에서 찾은 셀렉터를 crawl 단계가 이어서 씀).
+DEFAULT_STAGES = {
+    "api_naver_news": {
+        "module": "api_naver_news",
+        "kwargs": {"keywords": "$news"},
+        "depends": [],
+    },
+    "crawl_naver_news": {
+        "module": "crawl_naver_news",
+        "kwargs": {"keywords": "$news"},
+        "depends": [],
+    },
+    "get_news_maintext_api": {
+        "module": "get_news_maintext",
+        "kwargs": {"keywords": "$news", "filetype": "FileType.NEWS"},
+        "depends": ["api_naver_news"],
+    },
+    "get_news_maintext_crawl": {
+        "module": "get_news_maintext",
+        "kwargs": {"keywords": "$news", "filetype": "FileType.CRAWL_NEWS"},
+        "depends": ["crawl_naver_news", "get_news_maintext_api"],
+    },
+    "api_naver_kin": {
+        "module": "api_naver_kin",
+        "kwargs": {"keywords": "$kin"},
+        "depends": [],
+    },
+    "get_kin_maintext": {
+        "module": "get_kin_maintext",
+        "kwargs": {"keywords": "$kin"},
+        "depends": ["api_naver_kin"],
+    },
+    "tokenize_news": {
+        "module": "tokenize_and_merge_data",
+        "kwargs": {
+            "files": {
+                "$product": [["FileType.NEWS_WT", "FileType.CRAWL_NEWS_WT"], "$news"]
+            },
+            "save_file": "FileType.NEWS_PROCESSED",
+        },
+        "depends": ["get_news_maintext_api", "get_news_maintext_crawl"],
+    },
+    "tokenize_kin": {
+        "module": "tokenize_and_merge_data",
+        "kwargs": {
+            "files": {"$product": [["FileType.KIN_WT"], "$kin"]},
+            "save_file": "FileType.KIN_PROCESSED",
+        },
+        "depends": ["get_kin_maintext"],
+    },
+    "remove_similar_news": {
+        "module": "remove_similar_articles",
+        "kwargs": {"filetype": "FileType.NEWS_PROCESSED", "method": "jaccard"},
+        "depends": ["tokenize_news"],
+    },
+    "remove_similar_kin": {
+        "module": "remove_similar_articles",
+        "kwargs": {"filetype": "FileType.KIN_PROCESSED", "method": "url"},
+        "depends": ["tokenize_kin"],
+    },
+    "get_relevant_news": {
+        "module": "get_relevant_articles",
+        "kwargs": {
+            "keyword": "$keyword",
+            "description": "$description",
+            "filetype": "FileType.NEWS_PROCESSED_UNIQUE",
+        },
+        "depends": ["remove_similar_news"],
+    },
+    "get_relevant_kin": {
+        "module": "get_relevant_articles",
+        "kwargs": {
+            "keyword": "$keyword",
+            "description": "$description",
+            "filetype": "FileType.KIN_PROCESSED_UNIQUE",
+        },
+        "depends": ["remove_similar_kin"],
+    },
+    "remove_similar_kin_answers": {
+        "module": "remove_similar_articles",
+        "kwargs": {"filetype": "FileType.KIN_PROCESSED_UNIQUE", "method": "answer"},
+        "depends": ["remove_similar_kin"],
+    },
+    "index_news": {
+        "module": "inverted_index",
+        "kwargs": {"filetype": "FileType.NEWS_PROCESSED_UNIQUE"},
+        "depends": ["remove_similar_news"],
+    },
+    "index_kin": {
+        "module": "inverted_index",
+        "kwargs": {"filetype": "FileType.KIN_PROCESSED_UNIQUE"},
+        "depends": ["remove_similar_kin"],
+    },
+}
+
+
+def resolve_value(value: Any, config: Dict[str, Any]) -> Any:
+    """
+    단계 정의의 인자 값에서 "FileType.X", "$news" 등의 표기를 실제 값으로 바꾼다.
+    리스트와 딕셔너리는 재귀적으로 처리한다.
+    표기법은 DEFAULT_STAGES의 주석 참조.
+
+    Args:
+        value (Any): 단계 정의의 인자 값.
+        config (Dict[str, Any]): 파이프라인 설정 딕셔너리.
+
+    Raises:
+        KeyError: 존재하지 않는 FileType이나 설정 항목을 참조한 경우.
+
+    Returns:
+        Any: 실제 값으로 바뀐 인자 값.
+    """
+    if isinstance(value, str):
+        if value.startswith("FileType."):
+            return utils.FileType[value[len("FileType.") :]]
+        match value:
+            case "$news" | "$kin":
+                return list(config["keywords"][value[1:]])
+            case "$keyword":
+                return config["keyword"]
+            case "$description":
+                return config["description"]
+        return value
+    if isinstance(value, list):
+        return [resolve_value(e, config) for e in value]
+    if isinstance(value, dict):
+        if set(value) == {"$product"}:
+            a, b = (resolve_value(e, config) for e in value["$product"])
+            return [(x, y) for x in a for y in b]
+        return {k: resolve_value(v, config) for k, v in value.items()}
+    return value
+
+
+# 단계 실행 단위: (main()에 넘길 인자, 입력 파일들, 출력 파일들).
+Unit = Tuple[Dict[str, Any], List[str], List[str]]
+
+# 중간 결과(journal)를 이어서 쓸 수 있는 모듈들.
+# 입력 파일이나 코드만 바뀌었으면 force_redo 없이 다시 실행해서 중간 결과를 재사용한다.
+RESUMABLE_MODULES = {"get_relevant_articles"}
+
+
+def get_keyword_units(
+    kwargs: Dict[str, Any],
+    get_files: Callable[[str], Tuple[List[str], List[str]]],
+) -> List[Unit]:
+    """
+    keywords 인자를 받는 단계를 키워드 하나씩의 실행 단위로 나눈다.
+    키워드별로 결과 파일이 따로 있으므로, 바뀐 키워드만 다시 실행할 수 있다.
+
+    Args:
+        kwargs (Dict[str, Any]): 단계의 main()에 넘길 인자(resolve_value()를 거친 값).
+        get_files (Callable[[str], Tuple[List[str], List[str]]]): 키워드 -> (입력 파일들, 출력 파일들) 함수.
+
+    Returns:
+        List[Unit]: 키워드별 실행 단위들의 리스트.
+    """
+    ret = []
+    for keyword in kwargs["keywords"]:
+        inputs, outputs = get_files(keyword)
+        ret.append(({**kwargs, "keywords": [keyword]}, inputs, outputs))
+    return ret
+
+
+def get_stage_units(module: str, kwargs: Dict[str, Any]) -> Optional[List[Unit]]:
+    """
+    단계를 실행 단위들로 나누고, 각 단위의 입력 파일과 출력 파일을 구한다.
+    파일명은 각 모듈이 실제로 읽고 쓰는 파일명과 같아야 한다.
+    get_news_maintext가 매번 갱신하는 news_maintext_selectors.txt는
+    입력으로 보면 매 실행마다 전체가 다시 실행되므로 입력에서 제외한다.
+
+    Args:
+        module (str): 모듈 이름.
+        kwargs (Dict[str, Any]): 단계의 main()에 넘길 인자(resolve_value()를 거친 값).
+
+    Returns:
+        Optional[List[Unit]]: 실행 단위들의 리스트. 입출력을 알 수 없는 모듈이면 None.
+    """
+    FileType = utils.FileType
+    vf = utils.validify_fname
+    match module:
+        case "api_naver_news":
+            return get_keyword_units(
+                kwargs, lambda k: ([], [f"{FileType.NEWS.value}_{k}.txt"])
+            )
+        case "api_naver_kin":
+            return get_keyword_units(
+                kwargs, lambda k: ([], [f"{FileType.KIN.value}_{k}.txt"])
+            )
+        case "crawl_naver_news":
+            return get_keyword_units(
+                kwargs, lambda k: ([], [vf(f"{FileType.CRAWL_NEWS.value}_{k}.txt")])
+            )
+        case "get_news_maintext":
+            ft = kwargs["filetype"].value
+            materials = [
+                f"{utils.MATERIALS}/news_maintext_redirections.txt",
+                f"{utils.MATERIALS}/news_maintext_attributes.txt",
+            ]
+            return get_keyword_units(
+                kwargs,
+                lambda k: (
+                    [vf(f"{ft}_{k}.txt")] + materials,
+                    [vf(f"{ft}_with_text_{k}.txt")],
+                ),
+            )
+        case "get_kin_maintext":
+            return get_keyword_units(
+                kwargs,
+                lambda k: (
+                    [f"{FileType.KIN.value}_{k}.txt"],
+                    [f"{FileType.KIN_WT.value}_{k}.txt"],
+                ),
+            )
+        case "tokenize_and_merge_data":
+            inputs = [
+                vf(f"{ft.value}_{k}.txt" if k else f"{ft.value}.txt")
+                for ft, k in kwargs["files"]
+            ]
+            return [(kwargs, inputs, [f"{kwargs['save_file'].value}.txt"])]
+        case "remove_similar_articles":
+            ft = kwargs["filetype"]
+            typestring = utils.get_typestring_from_filetype(ft)
+            info = "au" if kwargs["method"] == "answer" else "u"
+            result = utils.get_filetype_from_typestring(typestring, info)
+            return [(kwargs, [f"{ft.value}.txt"], [f"{result.value}.txt"])]
+        case "get_relevant_articles":
+            ft = kwargs["filetype"]
+            typestring = utils.get_typestring_from_filetype(ft)
+            result = utils.get_filetype_from_typestring(typestring, "r")
+            return [(kwargs, [f"{ft.value}.txt"], [f"{result.value}.txt"])]
+        case "inverted_index":
+            ft = kwargs["filetype"]
+            dirname = f"{ft.value}_index"
+            outputs = [f"{dirname}/{e}" for e in ("docs.json", "lexicon.json", "postings.bin")]
+            return [(kwargs, [f"{ft.value}.txt"], outputs)]
+    return None
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    인자 값을 매니페스트에 기록할 수 있도록 json으로 덤프 가능한 값으로 바꾼다.
+    Enum은 이름으로, 튜플은 리스트로 바꾼다.
+
+    Args:
+        value (Any): 인자 값.
+
+    Returns:
+        Any: json으로 덤프 가능한 값.
+    """
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(e) for e in value]
+    if isinstance(value, dict):
+        return {k: to_jsonable(v) for k, v in value.items()}
+    return value
+
+
+# 이 파일이 있는 저장소 폴더. 이 안의 모듈만 단계의 코드 지문에 넣는다.
+REPO_ROOT = path.dirname(path.abspath(__file__))
+
+
+def get_local_origin(name: str) -> Optional[str]:
+    """
+    모듈이 저장소 안의 파이썬 파일이면 그 경로를 구한다.
+    find_spec()은 점이 있는 이름의 부모를 임포트하므로, 최상위 이름이 저장소 안의 패키지일 때만 하위 모듈을 찾는다
+    (모듈의 함수를 임포트하는 from news_rules import NewsRules에서 news_rules와 그 의존성을 임포트하지 않도록).
+
+    Args:
+        name (str): 모듈 이름.
+
+    Returns:
+        Optional[str]: 모듈 파일 경로. 저장소 밖의 모듈이거나 모듈이 아니면(from X import 함수) None.
+    """
+    try:
+        top = find_spec(name.split(".")[0])
+        if top is None or not (top.origin or "").startswith(REPO_ROOT):
+            return None
+        if "." in name and top.submodule_search_locations is None:
+            return None
+        spec = find_spec(name) if "." in name else top
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not (spec.origin or "").endswith(".py"):
+        return None
+    return spec.origin
+
+
+@cache
+def get_code_hash(module: str) -> str:
+    """
+    단계 모듈과, 모듈이 임포트하는(함수 안의 지연 임포트 포함) 저장소 안의 모듈들을 재귀적으로 모아 그 코드의 해시를 구한다.
+    단계 파일만이 아니라 utils.py, news_rules.py처럼 단계가 쓰는 모듈이 바뀌어도 결과를 다시 만들게 한다.
+    실행 중에는 코드가 바뀌지 않으므로 모듈마다 한 번만 계산한다.
+
+    Args:
+        module (str): 단계 모듈 이름.
+
+    Returns:
+        str: 임포트 폐포(closure)의 (모듈 이름, 파일 해시)들을 이어 붙인 것의 sha256.
+    """
+    import ast
+    import hashlib
+
+    origins: Dict[str, str] = {}
+    stack = [module]
+    while stack:
+        name = stack.pop()
+        if name in origins:
+            continue
+        origin = get_local_origin(name)
+        if origin is None:
+            continue
+        origins[name] = origin
+        with open(origin, encoding="utf8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                stack.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                stack.append(node.module)
+                # from benchmarks import corpus처럼 패키지에서 모듈을 임포트하는 경우.
+                stack.extend(f"{node.module}.{alias.name}" for alias in node.names)
+
+    h = hashlib.sha256()
+    for name in sorted(origins):
+        h.update(f"{name}:{utils.get_file_hash(origins[name])}\n".encode("utf8"))
+    return h.hexdigest()
+
+
+def get_fingerprint(module: str, unit: Unit) -> Dict[str, Any]:
+    """
+    실행 단위의 지문(fingerprint)을 만든다.
+    지문은 모듈 코드의 해시(get_code_hash(), 모듈이 임포트하는 저장소 안의 모듈 포함), main()의 인자, 입력 파일들의 해시로 이루어지며,
+    이 중 하나라도 바뀌면 결과를 다시 만들어야 한다.
+
+    Args:
+        module (str): 모듈 이름.
+        unit (Unit): 실행 단위.
+
+    Returns:
+        Dict[str, Any]: 지문 딕셔너리.
+    """
+    kwargs, inputs, _ = unit
+    return {
+        "module": module,
+        "code": get_code_hash(module),
+        "params": to_jsonable({k: v for k, v in kwargs.items() if k != "force_redo"}),
+        "inputs": {fname: utils.get_file_hash(fname) for fname in inputs},
+    }
+
+
+def get_manifest_fname(output: str) -> str:
+    """
+    출력 파일의 매니페스트 파일명을 반환한다. 매니페스트는 출력 파일 바로 옆에 저장된다.
+
+    Args:
+        output (str): 출력 파일명.
+
+    Returns:
+        str: 매니페스트 파일명.
+    """
+    return f"{output}.manifest.json"
+
+
+def get_unit_state(unit: Unit, fingerprint: Dict[str, Any]) -> str:
+    """
+    실행 단위의 출력 파일들과 매니페스트를 현재 지문과 비교해서 상태를 판정한다.
+    utils.already()와 달리 입력이나 인자, 코드가 바뀌었으면 다시 실행해야 한다고 판정한다.
+
+    Args:
+        unit (Unit): 실행 단위.
+        fingerprint (Dict[str, Any]): get_fingerprint()로 만든 현재 지문.
+
+    Returns:
+        str: 실행 단위의 상태.
+            "fresh": 출력 파일과 매니페스트가 모두 있고 지문이 같음. 다시 실행하지 않는다.
+            "legacy": 출력 파일은 모두 있지만 매니페스트가 하나도 없음(매니페스트 도입 전의 결과).
+            "stale": 그 밖의 경우. 다시 실행해야 한다.
+    """
+    _, _, outputs = unit
+    manifests = [get_manifest_fname(output) for output in outputs]
+    if not utils.already(outputs):
+        return "stale"
+    if not any(utils.already(manifest) for manifest in manifests):
+        return "legacy"
+    for manifest in manifests:
+        if not utils.already(manifest):
+            return "stale"
+        if utils.get_json_from_file(manifest) != fingerprint:
+            return "stale"
+    return "fresh"
+
+
+def get_previous_params(unit: Unit) -> Optional[Dict[str, Any]]:
+    """
+    실행 단위의 첫 번째 출력 파일의 매니페스트에 기록된 인자를 반환한다.
+
+    Args:
+        unit (Unit): 실행 단위.
+
+    Returns:
+        Optional[Dict[str, Any]]: 이전 실행의 인자. 매니페스트가 없으면 None.
+    """
+    _, _, outputs = unit
+    manifest = get_manifest_fname(outputs[0])
+    if not utils.already(manifest):
+        return None
+    return utils.get_json_from_file(manifest).get("params")
+
+
+def write_manifests(unit: Unit, fingerprint: Dict[str, Any]) -> None:
+    """
+    실행 단위의 모든 출력 파일 옆에 매니페스트를 기록한다.
+
+    Args:
+        unit (Unit): 실행 단위.
+        fingerprint (Dict[str, Any]): 실행 전에 만든 지문.
+    """
+    _, _, outputs = unit
+    for output in outputs:
+        utils.write_json_on_file(get_manifest_fname(output), fingerprint)
+
+
+def get_stages(config: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    기본 단계 정의(DEFAULT_STAGES)에 설정 파일의 "stages"를 덮어써서 최종 단계 정의를 만든다.
+    설정 파일에서는 단계별로 일부 항목만 바꿀 수도 있고("skip", "force_redo" 등),
+    완전히 새로운 단계를 추가할 수도 있다.
+
+    Args:
+        config (Dict[str, Any]): 파이프라인 설정 딕셔너리.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 단계 이름 -> 단계 정의 딕셔너리.
+            ["module"]: 실행할 모듈 이름.
+            ["kwargs"]: 모듈의 main()에 넘길 인자(아직 resolve_value()를 거치지 않은 값).
+            ["depends"]: 먼저 끝나야 하는 단계 이름들의 리스트.
+            ["skip"]: 참이면 실행하지 않고 끝난 것으로 간주.
+            ["force_redo"]: main()의 force_redo 인자.
+    """
+    stages = deepcopy(DEFAULT_STAGES)
+    for name, override in config.get("stages", {}).items():
+        stages.setdefault(name, {"kwargs": {}, "depends": []}).update(override)
+    for stage in stages.values():
+        stage.setdefault("skip", False)
+        stage.setdefault("force_redo", False)
+    return stages
+
+
+def get_execution_order(stages: Dict[str, Dict[str, Any]]) -> List[str]:
+    """
+    단계들의 의존성으로 위상 정렬한 실행 순서를 구한다.
+    실제 실행은 병렬로 이루어지므로, 이 함수는 주로 설정 검증과 출력에 사용한다.
+
+    Args:
+        stages (Dict[str, Dict[str, Any]]): 단계 이름 -> 단계 정의 딕셔너리.
+
+    Raises:
+        ValueError: 존재하지 않는 단계에 의존하거나, 의존성에 순환이 있는 경우.
+
+    Returns:
+        List[str]: 위상 정렬된 단계 이름들의 리스트.
+    """
+    for name, stage in stages.items():
+        for dep in stage["depends"]:
+            if dep not in stages:
+                raise ValueError(f"'{name}' 단계가 존재하지 않는 '{dep}' 단계에 의존합니다.")
+
+    order = []
+    done: Set[str] = set()
+    while len(order) < len(stages):
+        ready = [
+            name
+            for name, stage in stages.items()
+            if name not in done and all(dep in done for dep in stage["depends"])
+        ]
+        if not ready:
+            cycle = sorted(set(stages) - done)
+            raise ValueError(f"단계 의존성에 순환이 있습니다: {cycle}")
+        order += ready
+        done.update(ready)
+    return order
+
+
+def call_main(module: Any, kwargs: Dict[str, Any]) -> None:
+    """
+    모듈의 main()을 실행한다. main()이 코루틴 함수면 asyncio.run()으로 실행한다.
+
+    Args:
+        module (Any): 임포트된 모듈 객체.
+        kwargs (Dict[str, Any]): main()에 넘길 인자.
+    """
+    import inspect
+
+    if inspect.iscoroutinefunction(module.main):
+        import asyncio
+
+        asyncio.run(module.main(**kwargs))
+    else:
+        module.main(**kwargs)
+
+
+def run_units(name: str, stage: Dict[str, Any], module: Any, kwargs: Dict[str, Any]) -> None:
+    """
+    단계의 main()을 실행한다.
+
+    입출력을 아는 모듈(get_stage_units() 참조)은 실행 단위(대개 키워드 하나)별로,
+    입력 파일 해시, 인자, 코드 해시로 이루어진 지문을 출력 파일 옆의 매니페스트와 비교해서
+    바뀐 단위만 출력 파일을 지우고 다시 실행한 뒤 매니페스트를 갱신한다(make와 유사).
+    RESUMABLE_MODULES의 모듈은 인자가 그대로면 force_redo 없이 실행해서 journal을 재사용한다.
+    단계의 force_redo가 참이면 모든 단위를 다시 실행한다.
+    입출력을 모르는 모듈은 예전처럼 한 번에 실행하고 판단을 모듈의 utils.already()에 맡긴다.
+
+    Args:
+        name (str): 단계 이름.
+        stage (Dict[str, Any]): 단계 정의 딕셔너리.
+        module (Any): 임포트된 모듈 객체.
+        kwargs (Dict[str, Any]): main()에 넘길 인자(resolve_value()를 거친 값).
+    """
+    units = get_stage_units(stage["module"], kwargs)
+    if units is None:
+        call_main(module, {**kwargs, "force_redo": stage["force_redo"]})
+        return
+
+    for unit in units:
+        unit_kwargs, _, outputs = unit
+        fingerprint = get_fingerprint(stage["module"], unit)
+        state = "stale" if stage["force_redo"] else get_unit_state(unit, fingerprint)
+        metrics.inc("stage_units_total", stage=name, state=state)
+        if state == "fresh":
+            print(f"[{name}] up to date: {', '.join(outputs)}", flush=True)
+            continue
+        if state == "legacy":
+            # 매니페스트 도입 전의 결과는 재수집하지 않고 현재 지문으로 받아들인다.
+            print(f"[{name}] adopted: {', '.join(outputs)}", flush=True)
+            write_manifests(unit, fingerprint)
+            continue
+
+        previous_params = get_previous_params(unit)
+        force_redo = (
+            stage["force_redo"]
+            or stage["module"] not in RESUMABLE_MODULES
+            or previous_params not in (None, fingerprint["params"])
+        )
+        for output in outputs:
+            if utils.already(output):
+                remove(output)
+        call_main(module, {**unit_kwargs, "force_redo": force_redo})
+        write_manifests(unit, fingerprint)
+
+
+def run_stage(
+    name: str,
+    stage: Dict[str, Any],
+    config: Dict[str, Any],
+    run_dir: Optional[str] = None,
+    profile: bool = False,
+    sample: Optional[int] = None,
+) -> None:
+    """
+    단계 하나를 실행한다. 모듈은 실행 직전에 임포트한다.
+    profile이 참이면 profiling.profile()로 f"{run_dir}/{단계 이름}/"에 프로파일 결과를 남긴다.
+    sample이 있으면 profiling.sample_mode()로 f"{run_dir}/sandbox"에서 파일마다 앞 sample개만 처리한다.
+    샘플 모드의 결과는 원래 결과가 아니므로 매니페스트를 쓰지도 읽지도 않는다.
+
+    Args:
+        name (str): 단계 이름.
+        stage (Dict[str, Any]): 단계 정의 딕셔너리.
+        config (Dict[str, Any]): 파이프라인 설정 딕셔너리.
+        run_dir (Optional[str], optional): 실행 디렉토리. profile이나 sample을 쓰면 필요. 기본값 None.
+        profile (bool, optional): 프로파일링할지의 여부. 기본값 거짓.
+        sample (Optional[int], optional): 파일마다 처리할 아티클 수. 기본값 None(전부).
+    """
+    module = import_module(stage["module"])
+    kwargs = resolve_value(stage["kwargs"], config)
+
+    start = time.perf_counter()
+    print(f"[{name}] started", flush=True)
+    with ExitStack() as stack:
+        if profile or sample is not None:
+            import profiling
+        if profile:
+            stack.enter_context(profiling.profile(name, run_dir))
+        if sample is None:
+            run_units(name, stage, module, kwargs)
+        else:
+            stack.enter_context(profiling.sample_mode(sample, f"{run_dir}/sandbox"))
+            call_main(module, {**kwargs, "force_redo": stage["force_redo"]})
+    elapsed = time.perf_counter() - start
+    metrics.set_gauge("stage_seconds", elapsed, stage=name)
+    print(f"[{name}] finished in {elapsed:.1f}s", flush=True)
+
+
+def run_pipeline(
+    config: Dict[str, Any],
+    max_workers: Optional[int] = None,
+    run_dir: Optional[str] = None,
+    profile: bool = False,
+    sample: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    파이프라인 설정에 따라 모든 단계를 의존성 DAG로 실행한다.
+    의존하는 단계가 모두 끝난 단계는 곧바로 스레드 풀에 제출되므로,
+    서로 독립인 단계(예: 뉴스 본문 수집과 지식IN 본문 수집)는 동시에 실행된다.
+    실패한 단계에 의존하는 단계들은 실행하지 않고, 나머지 단계는 계속 실행한다.
+    실행이 끝나면 각 단계가 기록한 지표를 run_dir에 metrics.json과 metrics.prom으로 저장한다.
+    profile이나 sample을 쓰면 측정이 섞이지 않도록 단계를 한 번에 하나씩 실행한다(run_stage() 참조).
+
+    Args:
+        config (Dict[str, Any]): 파이프라인 설정 딕셔너리. load_config() 참조.
+        max_workers (Optional[int], optional): 동시에 실행할 최대 단계 수. None이면 설정의 "max_workers"(기본 4).
+        run_dir (Optional[str], optional): 지표를 저장할 디렉토리. None이면 metrics.get_run_dir().
+        profile (bool, optional): 단계별로 프로파일링할지의 여부. 기본값 거짓.
+        sample (Optional[int], optional): 파일마다 처리할 아티클 수. 기본값 None(전부).
+
+    Returns:
+        Dict[str, str]: 단계 이름 -> 결과("done" | "skipped" | "failed" | "upstream_failed").
+    """
+    if sys.platform == "win32":
+        import asyncio
+
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    stages = get_stages(config)
+    get_execution_order(stages)
+    if max_workers is None:
+        max_workers = config.get("max_workers", 4)
+    if profile or sample is not None:
+        max_workers = 1
+    if run_dir is None:
+        run_dir = metrics.get_run_dir()
+
+    status: Dict[str, str] = {}
+    running: Dict[Future, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while len(status) < len(stages):
+            for name, stage in stages.items():
+                if name in status or name in running.values():
+                    continue
+                deps = [status.get(dep) for dep in stage["depends"]]
+                if any(e in ("failed", "upstream_failed") for e in deps):
+                    status[name] = "upstream_failed"
+                    print(f"[{name}] not started: upstream stage failed", flush=True)
+                    continue
+                if not all(e in ("done", "skipped") for e in deps):
+                    continue
+                if stage["skip"]:
+                    status[name] = "skipped"
+                    continue
+                future = executor.submit(
+                    run_stage, name, stage, config, run_dir, profile, sample
+                )
+                running[future] = name
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                err = future.exception()
+                if err is None:
+                    status[name] = "done"
+                    continue
+                status[name] = "failed"
+                print(f"[{name}] failed:", flush=True)
+                traceback.print_exception(err)
+
+    metrics.write(run_dir)
+    print(f"metrics written to {run_dir}", flush=True)
+    return status
+
+
+def load_config(fname: str) -> Dict[str, Any]:
+    """
+    json 형식의 파이프라인 설정 파일을 읽는다.
+
+    설정 파일의 항목:
+        ["keywords"]["news"]: 뉴스 검색 키워드 리스트.
+        ["keywords"]["kin"]: 지식IN 검색 키워드 리스트.
+        ["keyword"]: 데이터 전체를 아우르는 하나의 키워드(유관 데이터 판정에 사용).
+        ["description"]: 그 키워드에 대한 설명.
+        ["max_workers"]: 동시에 실행할 최대 단계 수(선택).
+        ["stages"]: 단계 이름 -> 기본 단계 정의에 덮어쓸 항목(선택). get_stages() 참조.
+
+    Args:
+        fname (str): 설정 파일명.
+
+    Returns:
+        Dict[str, Any]: 파이프라인 설정 딕셔너리.
+    """
+    config = utils.get_json_from_file(fname)
+    config.setdefault("keywords", {})
+    config["keywords"].setdefault("news", [])
+    config["keywords"].setdefault("kin", [])
+    return config
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    설정 파일을 받아서 파이프라인을 대화 없이 실행한다.
+    cron 등에서 무인으로 실행할 수 있도록, 실패한 단계가 있으면 1을 반환한다.
+
+    Usage:
+        python pipeline.py materials/pipeline.json
+        python pipeline.py materials/pipeline.json --only get_kin_maintext --force get_kin_maintext
+        python pipeline.py materials/pipeline.json --dry-run
+        python pipeline.py materials/pipeline.json --only tokenize_kin --profile --sample 100
+
+    Args:
+        argv (Optional[List[str]], optional): 명령행 인자. None이면 sys.argv를 사용.
+
+    Returns:
+        int: 종료 코드. 모든 단계가 성공하면 0, 아니면 1.
+    """
+    parser = argparse.ArgumentParser(description="SDM 데이터 수집 파이프라인을 실행합니다.")
+    parser.add_argument("config", help="json 파이프라인 설정 파일")
+    parser.add_argument("--workers", type=int, default=None, help="동시에 실행할 최대 단계 수")
+    parser.add_argument("--only", nargs="+", default=None, help="이 단계들만 실행(나머지는 건너뜀)")
+    parser.add_argument("--force", nargs="+", default=[], help="이미 결과가 있어도 다시 실행할 단계들")
+    parser.add_argument("--dry-run", action="store_true", help="실행 순서만 출력")
+    parser.add_argument("--profile", action="store_true", help="단계별 cProfile, tracemalloc, 시간 측정 결과 저장")
+    parser.add_argument("--sample", type=int, default=None, help="파일마다 앞 N개 아티클만 처리(결과는 실행 디렉토리에 저장)")
+    parser.add_argument("--run-dir", default=None, help="지표와 프로파일 결과를 저장할 디렉토리")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    stages = config.setdefault("stages", {})
+    for name in get_stages(config):
+        if args.only is not None and name not in args.only:
+            stages.setdefault(name, {})["skip"] = True
+        if name in args.force:
+            stages.setdefault(name, {})["force_redo"] = True
+
+    order = get_execution_order(get_stages(config))
+    if args.dry_run:
+        for name in order:
+            stage = get_stages(config)[name]
+            flag = " (skip)" if stage["skip"] else ""
+            print(f"{name}{flag} <- {', '.join(stage['depends']) or '-'}")
+        return 0
+
+    status = run_pipeline(config, args.workers, args.run_dir, args.profile, args.sample)
+    for name in order:
+        print(f"{name}: {status[name]}")
+    return 0 if all(e in ("done", "skipped") for e in status.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!python
+
+from typing import List, Dict, Callable, Optional
+from os import makedirs
+import json
+import pandas as pd
+import utils
+
+# 데이터프레임 캐시를 보관하는 디렉토리.
+# 캐시 파일 옆의 .json에는 원본 파일들의 해시와 CACHE_VERSION이 기록되며, 하나라도 다르면 다시 만든다.
+FRAMES = utils.RESULTS + "/" + "frames"
+
+# 전처리 방식이 바뀌면 올려서 기존 캐시를 무효화한다.
+CACHE_VERSION = 1
+
+# RFC 2822 날짜(검색 api)의 월 약어.
+MONTHS = {
+    m: i
+    for i, m in enumerate(
+        ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"],
+        1,
+    )
+}
+
+# 노트북에서 쓰는 파일 종류 문자열 -> FileType.
+SOURCE_TYPES = {
+    "news_api": utils.FileType.NEWS_WT,
+    "news_crawl": utils.FileType.CRAWL_NEWS_WT,
+    "kin": utils.FileType.KIN_WT,
+    "news_unique": utils.FileType.NEWS_PROCESSED_UNIQUE,
+    "kin_unique": utils.FileType.KIN_PROCESSED_UNIQUE,
+}
+
+
+def normalize_dates(dates: pd.Series) -> pd.Series:
+    """
+    수집 방법마다 다른 날짜 문자열을 한 번에(벡터화해서) datetime으로 바꾼다.
+    지원하는 형식:
+        - 검색 api: "Mon, 01 Jan 2024 09:00:00 +0900" (시간대는 버리고 현지 시각을 유지)
+        - 크롤링, 지식IN: "2024.01.01.", "작성일2024.01.01."
+    해석할 수 없는 값("1시간 전" 등)은 NaT가 된다.
+
+    Args:
+        dates (pd.Series): 날짜 문자열 시리즈.
+
+    Returns:
+        pd.Series: datetime64 시리즈(시간대 없음).
+    """
+    s = dates.astype("string").str.strip().str.replace(r"^작성일\s*", "", regex=True)
+
+    dotted = s.str.extract(r"^(\d{4})\.\s*(\d{1,2})\.\s*(\d{1,2})").astype("float")
+    dotted.columns = ["year", "month", "day"]
+    ret = pd.to_datetime(dotted, errors="coerce")
+
+    rfc = s.str.extract(r"(\d{1,2}) ([A-Z][a-z]{2}) (\d{4}) (\d{2}):(\d{2}):(\d{2})")
+    rfc.columns = ["day", "month", "year", "hour", "minute", "second"]
+    rfc["month"] = rfc["month"].map(MONTHS)
+    rfc = rfc.astype("float")
+    return ret.fillna(pd.to_datetime(rfc, errors="coerce"))
+
+
+def get_fname(filetype: utils.FileType, keyword: str = "") -> str:
+    """
+    FileType과 키워드로 데이터 파일명을 구한다(키워드가 없으면 병합된 파일).
+
+    Args:
+        filetype (utils.FileType): 데이터 파일의 FileType.
+        keyword (str, optional): 검색 키워드. 기본값 "".
+
+    Returns:
+        str: 데이터 파일명.
+    """
+    fname = f"{filetype.value}_{keyword}.txt" if keyword else f"{filetype.value}.txt"
+    return utils.validify_fname(fname)
+
+
+def get_cache_name(filetype: utils.FileType, keyword: str = "", *suffixes: str) -> str:
+    """
+    캐시 이름을 만든다. 예: ("KIN_WT", "환자 권리") -> "KIN_WT_환자 권리".
+
+    Args:
+        filetype (utils.FileType): 데이터 파일의 FileType.
+        keyword (str, optional): 검색 키워드. 기본값 "".
+        *suffixes (str): 덧붙일 문자열들(전처리 종류 등).
+
+    Returns:
+        str: 캐시 이름.
+    """
+    return "_".join(e for e in (filetype.name, keyword, *suffixes) if e)
+
+
+def cached(name: str, sources: List[str], build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    build()의 결과를 FRAMES에 parquet으로 캐시한다.
+    캐시를 만들 때의 원본 파일 해시와 CACHE_VERSION이 지금과 같으면 build() 대신 캐시를 읽는다.
+
+    Args:
+        name (str): 캐시 이름(파일명).
+        sources (List[str]): build()가 읽는 원본 파일들.
+        build (Callable[[], pd.DataFrame]): 데이터프레임을 만드는 함수.
+
+    Returns:
+        pd.DataFrame: 데이터프레임.
+    """
+    makedirs(FRAMES, exist_ok=True)
+    fname = utils.validify_fname(f"{FRAMES}/{name}.parquet")
+    key = {
+        "version": CACHE_VERSION,
+        "sources": {e: utils.get_file_hash(utils.get_read_path(e)) for e in sources},
+    }
+    if utils.already([fname, f"{fname}.json"]) and utils.get_json_from_file(f"{fname}.json") == key:
+        return pd.read_parquet(fname)
+
+    df = build()
+    df.to_parquet(fname, index=False)
+    utils.write_json_on_file(f"{fname}.json", key)
+    return df
+
+
+def get_frame(filetype: utils.FileType, keyword: str = "") -> pd.DataFrame:
+    """
+    기사 데이터 파일을 데이터프레임으로 불러오고 전처리한다.
+        - 날짜를 normalize_dates()로 datetime으로 바꾼다.
+        - 본문 수집에 실패한 기사("..._error")를 버린다.
+        - 토큰이 있는 파일이면 토큰이 없는 기사를 버린다.
+
+    Args:
+        filetype (utils.FileType): 기사 데이터 파일의 FileType.
+        keyword (str, optional): 검색 키워드. 병합된 파일이면 "". 기본값 "".
+
+    Returns:
+        pd.DataFrame: 전처리한 데이터프레임.
+    """
+    fname = get_fname(filetype, keyword)
+
+    def build() -> pd.DataFrame:
+        df = pd.DataFrame(utils.get_json_from_file(fname)["items"])
+        df["date"] = normalize_dates(df["date"])
+        if "text" in df:
+            df = df[~df["text"].str.endswith("_error")]
+        if "tokens" in df:
+            df = df[df["tokens"].str.len() > 0]
+        return df.reset_index(drop=True)
+
+    return cached(get_cache_name(filetype, keyword), [fname], build)
+
+
+def get_kin_qa_frame(filetype: utils.FileType, keyword: str = "") -> pd.DataFrame:
+    """
+    지식IN 데이터 파일을 질문과 답변이 각각 한 행인 데이터프레임으로 정규화한다.
+    원래 게시글의 순서를 "id"로 남겨서 질문과 답변의 연결을 유지한다.
+
+    열:
+        id: 원래 게시글의 번호.
+        type: "question" | "answer".
+        answer_idx: 게시글 안에서 답변의 번호(질문이면 -1). remove_similar_articles의 답변 id와 같다.
+        text, date, (tokens): 질문 또는 답변 하나의 본문, 날짜, (토큰).
+        나머지 열(title, url_naver, keyword 등)은 게시글의 값을 그대로 가진다.
+
+    Args:
+        filetype (utils.FileType): 지식IN 데이터 파일의 FileType.
+        keyword (str, optional): 검색 키워드. 병합된 파일이면 "". 기본값 "".
+
+    Returns:
+        pd.DataFrame: 질문/답변 데이터프레임.
+    """
+    fname = get_fname(filetype, keyword)
+
+    def build() -> pd.DataFrame:
+        df = pd.DataFrame(utils.get_json_from_file(fname)["items"])
+        df = df[df["date"].str.len() > 0]
+        df.insert(0, "id", df.index)
+        has_tokens = "tokens" in df
+
+        df_question = df.drop(columns=["answers", "tokens_answer"], errors="ignore")
+        df_question = df_question.rename(columns={"question": "text"})
+        df_question["date"] = df["date"].str[0]
+        df_question["type"] = "question"
+        df_question["answer_idx"] = -1
+
+        df_answer = df.drop(columns=["question", "tokens"], errors="ignore")
+        df_answer["date"] = df["date"].str[1:]
+        columns = ["answers", "date"] + (["tokens_answer"] if has_tokens else [])
+        df_answer = df_answer.explode(columns)
+        df_answer = df_answer[df_answer["answers"].notna()]
+        df_answer["answer_idx"] = df_answer.groupby(level=0).cumcount()
+        df_answer = df_answer.rename(columns={"answers": "text", "tokens_answer": "tokens"})
+        df_answer["type"] = "answer"
+
+        df = pd.concat([df_question, df_answer]).sort_index(kind="stable")
+        df["date"] = normalize_dates(df["date"])
+        return df.reset_index(drop=True)
+
+    return cached(get_cache_name(filetype, keyword, "qa"), [fname], build)
+
+
+def load_frames(keywords: Dict[str, List[str]]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    노트북에서 쓰는 데이터프레임들을 전부 불러온다.
+    지식IN(kin, kin_unique)은 get_kin_qa_frame(), 나머지는 get_frame()으로 불러온다.
+
+    Args:
+        keywords (Dict[str, List[str]]): 파일 종류 문자열(SOURCE_TYPES) -> 키워드들. 병합된 파일은 [""].
+
+    Returns:
+        Dict[str, Dict[str, pd.DataFrame]]: dfs["파일 종류 문자열"]["키워드"] 형태의 데이터프레임들.
+    """
+    dfs = {}
+    for source_type, source_keywords in keywords.items():
+        filetype = SOURCE_TYPES[source_type]
+        load = get_kin_qa_frame if source_type.startswith("kin") else get_frame
+        dfs[source_type] = {keyword: load(filetype, keyword) for keyword in source_keywords}
+    return dfs
+
+
+def main(keywords: Optional[Dict[str, List[str]]] = None) -> None:
+    """
+    데이터프레임 캐시를 미리 만든다.
+
+    Args:
+        keywords (Optional[Dict[str, List[str]]], optional): load_frames() 참조. None이면 병합된 파일만.
+    """
+    if keywords is None:
+        keywords = {"news_unique": [""], "kin_unique": [""]}
+    for source_type, frames in load_frames(keywords).items():
+        for keyword, df in frames.items():
+            print(json.dumps({"source_type": source_type, "keyword": keyword, "rows": len(df)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main(
+        {
+            "news_api": ["환자-의사 공유 의사결정"],
+            "news_crawl": ["환자 의사 공유의사결정"],
+            "kin": ["환자 권리", "환자 요구", "환자 의견"],
+            "news_unique": [""],
+            "kin_unique": [""],
+        }
+    )
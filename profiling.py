@@ -0,0 +1,166 @@
+#!python
+
+from typing import List, Optional, Iterator
+from contextlib import contextmanager
+from os import makedirs, path, chdir, getcwd
+import io
+import sys
+import time
+import runpy
+import pstats
+import cProfile
+import argparse
+import tracemalloc
+import metrics
+import utils
+
+# 프로파일 결과 텍스트에 출력할 함수, 메모리 할당 위치의 개수.
+DEFAULT_TOP = 30
+
+# tracemalloc이 할당 위치마다 저장할 호출 스택 깊이.
+TRACEMALLOC_FRAMES = 10
+
+
+@contextmanager
+def profile(name: str, run_dir: str, top: int = DEFAULT_TOP) -> Iterator[None]:
+    """
+    with 블록을 프로파일링해서 f"{run_dir}/{name}/"에 결과를 저장하는 컨텍스트 매니저.
+    블록에서 예외가 발생해도 그때까지의 결과를 저장한다.
+
+    저장되는 파일:
+        profile.pstats: cProfile 결과(pstats.Stats, snakeviz 등으로 열 수 있음).
+        profile.txt: 누적 시간 기준 상위 top개 함수.
+        memory.txt: tracemalloc 기준 할당량 상위 top개 위치.
+        timing.json: 벽시계 시간, 이 스레드의 CPU 시간, 프로세스 CPU 시간, 메모리 최대치.
+
+    cProfile은 with 블록을 실행하는 스레드만 측정하지만, tracemalloc과 프로세스 CPU 시간은
+    프로세스 전체를 측정하므로 다른 단계와 동시에 실행하면 섞인다(pipeline.py는 --profile이면 한 번에 하나씩 실행).
+
+    Args:
+        name (str): 결과 디렉토리 이름(단계 이름, 모듈 이름 등).
+        run_dir (str): 실행 디렉토리.
+        top (int, optional): 텍스트 결과에 출력할 항목 수. 기본값 DEFAULT_TOP.
+    """
+    out_dir = path.abspath(path.join(run_dir, name))
+    makedirs(out_dir, exist_ok=True)
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+
+    profiler = cProfile.Profile()
+    wall, thread_cpu, process_cpu = (
+        time.perf_counter(),
+        time.thread_time(),
+        time.process_time(),
+    )
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        timing = {
+            "name": name,
+            "wall_seconds": time.perf_counter() - wall,
+            "thread_cpu_seconds": time.thread_time() - thread_cpu,
+            "process_cpu_seconds": time.process_time() - process_cpu,
+            "peak_traced_bytes": tracemalloc.get_traced_memory()[1],
+        }
+        after = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+
+        profiler.dump_stats(f"{out_dir}/profile.pstats")
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        with open(f"{out_dir}/profile.txt", "wt", encoding="utf-8") as f:
+            f.write(stream.getvalue())
+
+        with open(f"{out_dir}/memory.txt", "wt", encoding="utf-8") as f:
+            for stat in after.compare_to(before, "lineno")[:top]:
+                f.write(f"{stat}\n")
+
+        utils.write_json_on_file(f"{out_dir}/timing.json", timing)
+        metrics.set_gauge("stage_cpu_seconds", timing["thread_cpu_seconds"], stage=name)
+        print(
+            f"[{name}] profiled: {timing['wall_seconds']:.1f}s wall, "
+            f"{timing['thread_cpu_seconds']:.1f}s cpu -> {out_dir}",
+            flush=True,
+        )
+
+
+@contextmanager
+def sample_mode(limit: int, sandbox: str) -> Iterator[None]:
+    """
+    with 블록 안에서 데이터 파일의 앞 limit개 아티클만 처리하도록 하는 컨텍스트 매니저.
+    프로파일링을 위해 대표적인 일부만 빠르게 실행할 때 사용한다.
+
+    작업 폴더를 sandbox로 옮기고 utils.SAMPLE_LIMIT, utils.SAMPLE_ROOT를 설정한다.
+    따라서 입력은 원래 폴더에서 읽되(utils.get_json_from_file() 참조), 결과 파일, journal, 캐시 등은
+    모두 sandbox 아래에 쓰여서 원래 수집 결과를 덮어쓰지 않는다.
+    sandbox에는 결과가 없으므로 각 단계는 utils.already()에 걸리지 않고 실제로 실행된다.
+    작업 폴더는 프로세스 전체에 적용되므로 다른 단계와 동시에 실행하면 안 된다.
+
+    Args:
+        limit (int): 파일마다 처리할 아티클 수.
+        sandbox (str): 결과를 쓸 폴더.
+    """
+    root = getcwd()
+    sandbox = path.abspath(sandbox)
+    for dirname in (utils.RESULTS, utils.MATERIALS):
+        makedirs(path.join(sandbox, dirname), exist_ok=True)
+
+    utils.SAMPLE_LIMIT, utils.SAMPLE_ROOT = limit, root
+    chdir(sandbox)
+    try:
+        yield
+    finally:
+        chdir(root)
+        utils.SAMPLE_LIMIT, utils.SAMPLE_ROOT = None, None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    모듈의 진입점(if __name__ == "__main__": 블록)을 그대로 실행하면서 프로파일링한다.
+    각 모듈을 손으로 감싸지 않고도 같은 방식으로 프로파일링할 수 있다.
+    파이프라인 전체는 python pipeline.py <설정 파일> --profile을 사용한다.
+
+    Usage:
+        python profiling.py get_news_maintext
+        python profiling.py remove_similar_articles --sample 500
+        python profiling.py tokenize_and_merge_data --sample 100 --run-dir results/runs/tokenize
+
+    Args:
+        argv (Optional[List[str]], optional): 명령행 인자. None이면 sys.argv를 사용.
+
+    Returns:
+        int: 종료 코드. 모듈이 예외 없이 끝나면 0, 아니면 1.
+    """
+    parser = argparse.ArgumentParser(description="모듈의 진입점을 프로파일링합니다.")
+    parser.add_argument("module", help="프로파일링할 모듈 이름(예: get_news_maintext)")
+    parser.add_argument("--sample", type=int, default=None, help="파일마다 앞 N개 아티클만 처리")
+    parser.add_argument("--run-dir", default=None, help="결과를 저장할 디렉토리")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="출력할 상위 항목 수")
+    args = parser.parse_args(argv)
+
+    run_dir = path.abspath(args.run_dir or metrics.get_run_dir())
+    status = 0
+    with profile(args.module, run_dir, args.top):
+        try:
+            if args.sample is None:
+                runpy.run_module(args.module, run_name="__main__")
+            else:
+                with sample_mode(args.sample, f"{run_dir}/sandbox"):
+                    runpy.run_module(args.module, run_name="__main__")
+        except Exception as err:
+            print(f"[{args.module}] failed: {err!r}", flush=True)
+            status = 1
+    metrics.write(run_dir)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!python
+
+from typing import List, Dict, Set, Tuple, Optional
+from glob import glob
+import time
+from article_store import ArticleStore
+from html_archive import HtmlArchive, get_archive
+from news_rules import NewsRules, get_host
+import get_news_maintext as g
+import utils
+
+# 본문 수집에 실패한 기사의 본문 값.
+ERRORS = ("request_error", "encoding_error")
+
+
+def get_changed_hosts(
+    old: Dict[str, Dict[str, str | List[str]]], new: Dict[str, Dict[str, str | List[str]]]
+) -> Set[str]:
+    """
+    두 맵 스냅샷에서 셀렉터, 리디렉션, 속성 중 하나라도 바뀐 호스트들을 구한다.
+    없는 호스트와 빈 값은 같은 것으로 본다.
+
+    Args:
+        old (Dict[str, Dict[str, str | List[str]]]): 이전 맵("selector", "redirect", "attribute").
+        new (Dict[str, Dict[str, str | List[str]]]): 현재 맵.
+
+    Returns:
+        Set[str]: 바뀐 호스트들.
+    """
+    hosts = set()
+    for key in ("selector", "redirect", "attribute"):
+        for host in set(old[key]) | set(new[key]):
+            if (old[key].get(host) or None) != (new[key].get(host) or None):
+                hosts.add(host)
+    return hosts
+
+
+def get_selector_set(selector_dict: Dict[str, List[str]]) -> Set[str]:
+    """
+    NewsRules.selector_set과 같은 셀렉터들의 집합을 만든다(순서는 무시).
+
+    Args:
+        selector_dict (Dict[str, List[str]]): 호스트별 셀렉터 딕셔너리.
+
+    Returns:
+        Set[str]: 셀렉터 집합.
+    """
+    return set(sum(selector_dict.values(), [])) | {"#article-view-content-div"}
+
+
+def get_targets(
+    articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+    snapshot: Optional[Dict[str, Dict[str, str | List[str]]]],
+    rules: NewsRules,
+    archive: Optional[HtmlArchive] = None,
+) -> List[int]:
+    """
+    다시 추출해야 하는 기사들의 번호를 구한다.
+        - 원래 url, 리디렉션된 url 또는 보관된 응답의 url(HTTP 리디렉션이 끝난 url)의 호스트가 바뀐 호스트인 기사.
+          셀렉터와 속성은 응답의 url의 호스트로 찾으므로, HTTP 리디렉션으로 다른 호스트에 닿는 기사도 대상이 된다.
+        - 셀렉터 집합에 새 셀렉터가 생겼다면, 본문 추출에 실패했던("encoding_error") 기사(selector_set으로 찾을 수 있으므로).
+    스냅샷이 없는(이 기능 이전에 만든) 파일은 본문 수집에 실패했던 기사 전부.
+
+    Args:
+        articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 본문이 추가된 기사들.
+        snapshot (Optional[Dict[str, Dict[str, str | List[str]]]]): 파일을 만들 때의 맵 스냅샷.
+        rules (NewsRules): 현재 규칙.
+        archive (Optional[HtmlArchive], optional): 원본 응답 보관소. 기본값 None(응답의 url을 보지 않음).
+
+    Returns:
+        List[int]: 기사 번호들.
+    """
+    if snapshot is None:
+        return [i for i, e in enumerate(articles) if e["text"] in ERRORS]
+
+    hosts = get_changed_hosts(snapshot, rules.get_snapshot())
+    new_selectors = set(rules.selector_set) - get_selector_set(snapshot["selector"])
+    targets = []
+    for i, article in enumerate(articles):
+        url = article["url_naver"]
+        redirected = rules.get_redirection_link(url)
+        if (
+            get_host(url) in hosts
+            or get_host(redirected) in hosts
+            or (new_selectors and article["text"] == "encoding_error")
+        ):
+            targets.append(i)
+            continue
+        final_url = archive.get_final_url(redirected) if archive is not None else None
+        if final_url is not None and get_host(final_url) in hosts:
+            targets.append(i)
+    return targets
+
+
+def get_files(filetypes: List[utils.FileType]) -> List[Tuple[utils.FileType, str]]:
+    """
+    본문이 추가된 기사 데이터 파일들을 모두 찾는다.
+
+    Args:
+        filetypes (List[utils.FileType]): 기사 링크 데이터의 FileType들(NEWS, CRAWL_NEWS).
+
+    Returns:
+        List[Tuple[utils.FileType, str]]: (FileType, 파일명)들.
+    """
+    return [
+        (filetype, fname)
+        for filetype in filetypes
+        for fname in sorted(glob(f"{filetype.value}_with_text_*.txt"))
+    ]
+
+
+def main(
+    filetypes: List[utils.FileType],
+    replay: bool = False,
+    fetch_workers: int = 8,
+    parse_workers: Optional[int] = None,
+) -> None:
+    """
+    셀렉터, 리디렉션, 속성 맵이 바뀐 호스트의 기사만 다시 추출해서 본문 파일을 그 자리에서 고친다.
+    get_news_maintext.main()을 모든 키워드에 대해 다시 실행하는 대신,
+    script_set_more_selector.py 등으로 news_maintext_selectors.txt를 고친 뒤 실행한다.
+
+    각 파일을 만들 때의 맵 스냅샷(get_news_maintext.get_maps_snapshot_fname())과 지금의 맵을 비교해서 대상을 고르고(get_targets()),
+    끝까지 보관된 원본 응답(html_archive.py)이 있으면 그것을, 없거나 일부만(stream) 보관되었으면 새로 요청해서
+    get_news_maintext.extract_texts()로 병렬 추출한다(요청 스레드와 파서 프로세스).
+    새 결과가 실패("..._error")인데 원래 본문이 있던 기사는 원래 본문을 유지한다.
+
+    Args:
+        filetypes (List[utils.FileType]): 기사 링크 데이터의 FileType들(NEWS, CRAWL_NEWS).
+        replay (bool, optional): 네트워크 없이 보관된 응답만 쓸지의 여부. 기본값 False.
+        fetch_workers (int, optional): 요청 스레드 수. 기본값 8.
+        parse_workers (Optional[int], optional): 파서 프로세스 수. None이면 CPU 수. 기본값 None.
+    """
+    rules = NewsRules.load()
+    archive = get_archive("news")
+
+    for filetype, fname in get_files(filetypes):
+        start = time.perf_counter()
+        data = utils.get_json_from_file(fname)
+        articles = data["items"]
+        snapshot_fname = g.get_maps_snapshot_fname(fname)
+        snapshot = utils.get_json_from_file(snapshot_fname) if utils.already(snapshot_fname) else None
+
+        targets = get_targets(articles, snapshot, rules, archive)
+        if not targets:
+            print(f"{fname}: nothing to re-extract")
+            continue
+
+        texts = g.extract_texts(
+            [articles[i]["url_naver"] for i in targets],
+            rules,
+            archive,
+            replay,
+            prefer_archive=True,
+            fetch_workers=fetch_workers,
+            parse_workers=parse_workers,
+        )
+
+        patched = []
+        for i, text in zip(targets, texts):
+            old = articles[i]["text"]
+            if text == old or (text in ERRORS and old not in ERRORS):
+                continue
+            articles[i]["text"] = text
+            patched.append(articles[i])
+
+        if patched:
+            utils.write_json_on_file(fname, data)
+            with ArticleStore() as store:
+                store.set_bodies(filetype, data["keyword"], patched, "reextract_news_maintext")
+        g.write_maps_snapshot(fname, rules)
+        print(
+            f"{fname}: {len(targets)} re-extracted, {len(patched)} patched "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+    rules.save()
+
+
+if __name__ == "__main__":
+    main([utils.FileType.NEWS, utils.FileType.CRAWL_NEWS])
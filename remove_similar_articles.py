@@ -1,9 +1,13 @@
 #!python
 
-from typing import Set, Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+import math
 import pickle
 from urllib.parse import urlparse, parse_qs
+import time
 import numpy as np
+import metrics
 import utils
 
 
@@ -36,23 +40,29 @@ def get_similarity_matrix(
             return pickle.load(f)
 
     n = len(articles)
+    start = time.perf_counter()
     similarity = [[1.0] * n for _ in range(n)]
+    if method == "jaccard":
+        token_sets = [np.unique(np.array(e["tokens"], dtype=str)) for e in articles]
     for i, article in enumerate(articles):
         if not i % 100:
             print(f"{i}'th similarity computed")
-        if method == "jaccard":
-            a = np.array(article["tokens"])
-        elif method == "mixed":
-            a = np.array(article["tokens_answer"])
         for j in range(i + 1, n):
             if method == "jaccard":
-                b = np.array(set(articles[j]["tokens"]))
-                similarity[i][j] = similarity[j][i] = jaccard(a, b)
+                similarity[i][j] = similarity[j][i] = jaccard(
+                    token_sets[i], token_sets[j]
+                )
             if method == "url":
                 similarity[i][j] = similarity[j][i] = url_match(
                     article["url_naver"], articles[j]["url_naver"]
                 )
 
+    elapsed = time.perf_counter() - start
+    pairs = n * (n - 1) // 2
+    metrics.inc("similarity_pairs_total", pairs, method=method)
+    if elapsed > 0:
+        metrics.set_gauge("similarity_pairs_per_second", pairs / elapsed, method=method)
+
     with open(f"{fname}.txt", "wb") as f:
         pickle.dump(similarity, f)
 
@@ -82,7 +92,7 @@ def url_match(a: str, b: str) -> int:
     return 0
 
 
-def jaccard(a: Set[str], b: Set[str]) -> float:
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
     """
     두 집합에 대해,
     자카드 유사도를 계산한다.
@@ -90,28 +100,111 @@ def jaccard(a: Set[str], b: Set[str]) -> float:
     두 게시글(아티클)의 토큰 유사도를 확인할 때 사용.
 
     Args:
-        a (Set[str]): 첫 번째 집합.
-        b (Set[str]): 두 번째 집합.
+        a (np.ndarray): 첫 번째 집합(np.unique()로 중복을 제거한 1차원 배열).
+        b (np.ndarray): 두 번째 집합(np.unique()로 중복을 제거한 1차원 배열).
 
     Returns:
         float: 자카드 유사도.
     """
-    i = np.intersect1d(a, b).size
+    i = np.intersect1d(a, b, assume_unique=True).size
     u = a.size + b.size - i
     if not u:
         return 0
     return i / u
 
 
+# 이 값보다 유사도가 큰 게시글(아티클), 답변은 중복으로 보고 드랍한다.
+SIM_BOUND = 0.5
+
+
+def get_prefix_length(size: int, bound: float) -> int:
+    """
+    prefix filtering에서 색인할 접두사의 길이를 구한다.
+    크기가 size인 두 집합의 자카드 유사도가 bound 이상이려면,
+    전역 순서로 정렬한 두 집합의 앞쪽 size - ceil(bound * size) + 1개 중 적어도 하나가 겹쳐야 한다.
+
+    Args:
+        size (int): 집합의 크기.
+        bound (float): 자카드 유사도 하한.
+
+    Returns:
+        int: 접두사 길이.
+    """
+    return size - math.ceil(bound * size) + 1
+
+
+def get_unique_answers(
+    articles: List[Dict[str, Optional[str | List[str] | List[List[str]]]]],
+    bound: float = SIM_BOUND,
+) -> List[Tuple[int, int]]:
+    """
+    지식IN 답변 단위로 중복을 제거하고 살아남은 답변의 id를 반환한다.
+    답변 id는 (게시글 번호, 게시글 안에서 답변의 번호)이다.
+
+    답변들을 순서대로 보면서, 아직 드랍되지 않은 답변과 토큰 자카드 유사도가 bound보다 큰 뒤쪽 답변을 드랍한다.
+    모든 쌍을 비교하는 대신 prefix filtering으로 후보 쌍만 고른다.
+        - 토큰을 전체 답변에서의 빈도가 낮은 순으로 정렬하고, 각 답변의 접두사(get_prefix_length())만 역색인에 넣는다.
+        - 접두사 토큰을 하나도 공유하지 않거나, 크기 차이 때문에 bound를 넘을 수 없는 쌍은 비교하지 않는다.
+
+    Args:
+        articles (List[Dict[str, Optional[str | List[str] | List[List[str]]]]]): 토큰화된 지식IN 게시글들.
+        bound (float, optional): 중복으로 볼 자카드 유사도. 기본값 SIM_BOUND.
+
+    Returns:
+        List[Tuple[int, int]]: 살아남은 답변 id들(순서대로).
+    """
+    ids = []
+    token_sets = []
+    for i, article in enumerate(articles):
+        for k, tokens in enumerate(article.get("tokens_answer") or []):
+            ids.append((i, k))
+            token_sets.append(set(tokens))
+
+    df = Counter(token for tokens in token_sets for token in tokens)
+    prefixes = []
+    index: Dict[str, List[int]] = {}
+    for a, tokens in enumerate(token_sets):
+        prefix = sorted(tokens, key=lambda e: (df[e], e))[: get_prefix_length(len(tokens), bound)]
+        prefixes.append(prefix)
+        for token in prefix:
+            index.setdefault(token, []).append(a)
+
+    start = time.perf_counter()
+    pairs = 0
+    deleted = [False] * len(ids)
+    for a, tokens in enumerate(token_sets):
+        if deleted[a] or not tokens:
+            continue
+        candidates = {b for token in prefixes[a] for b in index[token] if b > a and not deleted[b]}
+        for b in candidates:
+            other = token_sets[b]
+            if min(len(tokens), len(other)) < bound * max(len(tokens), len(other)):
+                continue
+            pairs += 1
+            i = len(tokens & other)
+            if i / (len(tokens) + len(other) - i) > bound:
+                deleted[b] = True
+
+    elapsed = time.perf_counter() - start
+    metrics.inc("similarity_pairs_total", pairs, method="answer")
+    if elapsed > 0:
+        metrics.set_gauge("similarity_pairs_per_second", pairs / elapsed, method="answer")
+    print(f"{len(ids)} answers, {pairs} pairs compared, {sum(deleted)} dropped")
+
+    return [e for e, d in zip(ids, deleted) if not d]
+
+
 def main(filetype: utils.FileType, method: str, force_redo: bool = True) -> None:
     """
     지정된 유사도 계산 방법에 따라 유사도를 계산하고
     다른 게시글과의 유사도가 0.5 이상인 게시글(아티클)은
     더 짧은 쪽을 드랍한다.
+    method가 "answer"이면 지식IN 답변 단위로 중복을 제거하고(get_unique_answers()),
+    게시글 대신 살아남은 답변 id({"id": 게시글 번호, "answer_idx": 답변 번호})들을 저장한다.
 
     Args:
         filetype (utils.FileType): 파일의 종류를 나타내는 utils.FileType 객체.
-        method (str): 유사도 계산 방법. "jaccard" | "url".
+        method (str): 유사도 계산 방법. "jaccard" | "url" | "answer"("answer"는 지식IN만).
         force_redo (bool, optional): 이미 캐시된 유사도 행렬 파일이 있을 때 이를 재계산할지의 여부.
         - 기본은 True이며, 파일타입만 가지고 캐시의 존재여부를 확인하므로 의도적이지 않은 경우 True로 하는 것이 좋음.
     """
@@ -119,12 +212,21 @@ def main(filetype: utils.FileType, method: str, force_redo: bool = True) -> None
     n = len(articles)
     typestring = utils.get_typestring_from_filetype(filetype)
 
+    if method == "answer":
+        unique = get_unique_answers(articles)
+        filetype = utils.get_filetype_from_typestring(typestring, "au")
+        utils.write_json_on_file(
+            f"{filetype.value}.txt",
+            {"keyword": None, "items": [{"id": i, "answer_idx": k} for i, k in unique]},
+        )
+        return
+
     similarity = get_similarity_matrix(articles, typestring, method, force_redo)
     to_del = []
     for i, line in enumerate(similarity):
         for j in range(i + 1, n):
             e = line[j]
-            if e is not None and e > 0.5:
+            if e is not None and e > SIM_BOUND:
                 if typestring == "news":
                     d = j if len(articles[i]["text"]) > len(articles[j]["text"]) else i
                 elif typestring == "kin":
@@ -0,0 +1,193 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional, Any
+from urllib import parse
+import heapq
+import itertools
+import random
+import threading
+import time
+import metrics
+
+
+def get_breaker_key(url: str) -> str:
+    """
+    회로 차단기의 키(url의 호스트)를 구한다. utils.get_response_from_url()의 metrics 호스트와 같다.
+
+    Args:
+        url (str): 요청할 url.
+
+    Returns:
+        str: 호스트. 호스트가 없는 url이면 "".
+    """
+    return parse.urlparse(url).hostname or ""
+
+
+class CircuitBreaker:
+    """
+    호스트별 회로 차단기. 연속으로 threshold번 실패(시간 초과, 연결 오류, 5xx)한 호스트는
+    cooldown초 동안 요청하지 않고 바로 실패시킨다(open). cooldown이 지나면 요청 하나만 보내 보고(half-open),
+    성공하면 다시 요청하고(closed) 실패하면 cooldown을 두 배(최대 max_cooldown)로 늘려 다시 막는다.
+    죽은 호스트에 기사마다 5초씩 시간 초과를 기다리지 않기 위한 것이다. 요청 스레드들이 함께 쓰므로 스레드 안전하다.
+
+    Usage:
+        breaker = CircuitBreaker()
+        if breaker.allow(url):
+            ok = ...  # 요청
+            breaker.record(url, ok)
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 10.0, max_cooldown: float = 60.0) -> None:
+        """
+        Args:
+            threshold (int, optional): 회로를 열 연속 실패 횟수. 기본값 5.
+            cooldown (float, optional): 처음 열렸을 때 막는 시간(초). 기본값 10.0.
+            max_cooldown (float, optional): 막는 시간의 최댓값(초). 기본값 60.0.
+        """
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        # 호스트 -> [연속 실패 횟수, 다시 열리는 시각(monotonic, 닫혀 있으면 0), 현재 막는 시간, half-open 시도 중인지의 여부]
+        self.hosts: Dict[str, List[Any]] = {}
+        self.lock = threading.Lock()
+
+    def get_state(self, host: str) -> List[Any]:
+        """
+        호스트의 상태를 반환한다. 없으면 닫힌 상태로 만든다. self.lock을 잡고 불러야 한다.
+
+        Args:
+            host (str): 호스트.
+
+        Returns:
+            List[Any]: [연속 실패 횟수, 다시 열리는 시각, 현재 막는 시간, half-open 시도 중인지의 여부].
+        """
+        return self.hosts.setdefault(host, [0, 0.0, self.cooldown, False])
+
+    def allow(self, url: str) -> bool:
+        """
+        url의 호스트에 요청해도 되는지 확인한다. cooldown이 지난 열린 회로는 요청 하나만 허용한다(half-open).
+
+        Args:
+            url (str): 요청할 url.
+
+        Returns:
+            bool: 요청해도 되는지의 여부.
+        """
+        host = get_breaker_key(url)
+        with self.lock:
+            state = self.get_state(host)
+            if not state[1]:
+                return True
+            if state[3] or time.monotonic() < state[1]:
+                return False
+            state[3] = True
+            return True
+
+    def record(self, url: str, ok: bool) -> None:
+        """
+        요청 결과를 기록한다. 호스트가 살아 있다는 응답(2xx ~ 4xx)이면 ok다.
+
+        Args:
+            url (str): 요청한 url.
+            ok (bool): 호스트가 응답했는지의 여부.
+        """
+        host = get_breaker_key(url)
+        with self.lock:
+            state = self.get_state(host)
+            if ok:
+                self.hosts[host] = [0, 0.0, self.cooldown, False]
+                return
+            state[0] += 1
+            if state[3]:
+                state[2] = min(state[2] * 2, self.max_cooldown)
+            elif state[1] or state[0] < self.threshold:
+                # 이미 열린 회로(열리기 전에 보낸 요청의 실패)이거나 아직 threshold번이 안 된 경우.
+                return
+            state[1] = time.monotonic() + state[2]
+            state[3] = False
+            metrics.inc("circuit_open_total", host=host)
+
+    def get_wait(self, url: str) -> float:
+        """
+        Args:
+            url (str): 요청할 url.
+
+        Returns:
+            float: url의 호스트의 회로가 half-open이 될 때까지 남은 시간(초). 닫혀 있으면 0.
+        """
+        host = get_breaker_key(url)
+        with self.lock:
+            until = self.hosts[host][1] if host in self.hosts else 0.0
+        return max(until - time.monotonic(), 0.0)
+
+
+class RetryQueue:
+    """
+    재시도할 작업들의 힙. 작업은 attempt번째 재시도마다 [0, min(cap, base * 2 ** attempt)] 사이의 무작위 시간(full jitter)
+    뒤에 꺼낼 수 있게 된다. 같은 호스트의 실패한 작업들이 한꺼번에 다시 요청되지 않도록 퍼뜨린다.
+    한 스레드(extract_texts()의 메인 스레드)에서만 쓴다.
+
+    Usage:
+        retries = RetryQueue()
+        if not retries.push(item, attempt):
+            ...  # 재시도 횟수 초과
+        item, attempt = retries.pop_due() or (None, 0)
+    """
+
+    def __init__(
+        self, max_attempts: int = 3, base: float = 1.0, cap: float = 30.0, seed: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            max_attempts (int, optional): 작업 하나의 최대 재시도 횟수. 기본값 3.
+            base (float, optional): 백오프의 기본 시간(초). 기본값 1.0.
+            cap (float, optional): 백오프의 최댓값(초). 기본값 30.0.
+            seed (Optional[int], optional): jitter의 난수 시드. 기본값 None.
+        """
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.random = random.Random(seed)
+        self.heap: List[Tuple[float, int, Any, int]] = []
+        self.counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def push(self, item: Any, attempt: int, not_before: float = 0.0) -> bool:
+        """
+        작업을 attempt번째 재시도로 넣는다.
+
+        Args:
+            item (Any): 작업.
+            attempt (int): 몇 번째 재시도인지(1부터).
+            not_before (float, optional): 최소 대기 시간(초). 회로가 열린 호스트의 남은 시간 등. 기본값 0.0.
+
+        Returns:
+            bool: 넣었는지의 여부. 재시도 횟수를 넘었으면 False.
+        """
+        if attempt > self.max_attempts:
+            return False
+        delay = self.random.uniform(0, min(self.cap, self.base * 2**attempt))
+        due = time.monotonic() + max(delay, not_before)
+        heapq.heappush(self.heap, (due, next(self.counter), item, attempt))
+        return True
+
+    def pop_due(self) -> Optional[Tuple[Any, int]]:
+        """
+        Returns:
+            Optional[Tuple[Any, int]]: 대기 시간이 지난 가장 이른 (작업, 재시도 번호). 없으면 None.
+        """
+        if not self.heap or self.heap[0][0] > time.monotonic():
+            return None
+        _, _, item, attempt = heapq.heappop(self.heap)
+        return item, attempt
+
+    def get_wait(self) -> Optional[float]:
+        """
+        Returns:
+            Optional[float]: 가장 이른 작업을 꺼낼 수 있을 때까지 남은 시간(초). 비어 있으면 None.
+        """
+        if not self.heap:
+            return None
+        return max(self.heap[0][0] - time.monotonic(), 0.0)
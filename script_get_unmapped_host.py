@@ -1,9 +1,16 @@
 #!python
 
+from typing import Optional
+from article_store import ArticleStore, get_source
 import utils
 
 
-def main(fname_hosts: str, fname_data: str) -> None:
+def main(
+    fname_hosts: str,
+    fname_data: str,
+    keyword: Optional[str] = None,
+    filetype: Optional[utils.FileType] = None,
+) -> None:
     """
     script_가 접두사로 붙은 파일은,
     전체 수집, 분석 과정에서 불필요한,
@@ -12,29 +19,54 @@ def main(fname_hosts: str, fname_data: str) -> None:
 
     호스트 목록 파일과 json 기사 데이터셋 파일을 가지고,
     호스트 목록 중 기사가 제대로 수집되지 않는 호스트들을 파일로 저장함.
+    keyword와 filetype이 주어지고 기사 저장소(article_store.py)에 해당 기사들이 있으면,
+    데이터셋 파일 전체를 읽는 대신 저장소에서 호스트별로 찾음.
 
     Args:
         fname_hosts (str): 호스트 목록 파일.
         fname_data (str): json 기사 데이터셋 파일.
+        keyword (Optional[str], optional): 검색 키워드 문자열. 기본값 None(저장소를 쓰지 않음).
+        filetype (Optional[utils.FileType], optional): 기사 링크 데이터의 FileType Enum 객체. 기본값 None(저장소를 쓰지 않음).
     """
     selector_dict = utils.get_json_from_file(
         f"{utils.MATERIALS}/news_maintext_selectors.txt"
     )
-    articles = utils.get_json_from_file(fname_data)["items"]
     with open(fname_hosts, "rt", encoding="utf8") as f:
         l = f.read().split("\n")
     res = []
-    for host in l:
-        if host in selector_dict:
-            continue
-        if any(
-            (
-                host in article["url_naver"] and article["text"] != "encoding_error"
-                for article in articles
+    with ArticleStore() as store:
+        source = get_source(filetype) if filetype is not None else None
+        use_store = keyword is not None and source is not None and bool(
+            store.get_host_stats(source, keyword)
+        )
+        if use_store:
+            for host in l:
+                if host in selector_dict:
+                    continue
+                articles = store.get_articles(source, keyword, host=host)
+                if any(article["status"] != "encoding_error" for article in articles):
+                    continue
+                res.append(host)
+
+    if not use_store:
+        if not utils.already(fname_data):
+            print(
+                f"no articles in the article store and no {fname_data}; "
+                "run `python article_store.py` first to import the json results"
             )
-        ):
-            continue
-        res.append(host)
+            return
+        articles = utils.get_json_from_file(fname_data)["items"]
+        for host in l:
+            if host in selector_dict:
+                continue
+            if any(
+                (
+                    host in article["url_naver"] and article["text"] != "encoding_error"
+                    for article in articles
+                )
+            ):
+                continue
+            res.append(host)
     with open(f"unmapped_{fname_hosts}.txt", "wt", encoding="utf8") as f:
         print(*res, sep="\n", file=f)
 
@@ -43,4 +75,6 @@ if __name__ == "__main__":
     main(
         "hosts_crawl_naver_news_result_환자 의사 공유의사결정.txt",
         "crawl_naver_news_result_with_text_환자 의사 공유의사결정.txt",
+        "환자 의사 공유의사결정",
+        utils.FileType.CRAWL_NEWS,
     )
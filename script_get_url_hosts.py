@@ -1,5 +1,6 @@
 #!python
 
+from article_store import ArticleStore, get_source
 import utils
 
 
@@ -10,20 +11,31 @@ def main(keyword: str, filetype: utils.FileType) -> None:
     단순한 일회성 스크립트 파일임.
     굳이 살펴볼 필요는 없으나 혹시 재사용할 경우에 대비하여 기록.
 
-    주어진 키워드와 FileType으로 알맞은 데이터를 찾아서,
+    주어진 키워드와 FileType으로 기사 저장소(article_store.py)에서 알맞은 데이터를 찾아서,
     해당 파일의 호스트 목록을 파일로 저장함.
+    저장소에 해당 데이터가 없으면(가져오기 전이면) json 데이터 파일에서 찾음.
 
     Args:
         keyword (str): 검색 키워드 문자열.
         filetype (utils.FileType): FileType Enum 객체.
     """
-    hosts = set()
-
-    articles = utils.get_json_from_file(f"{filetype.value}_{keyword}.txt")["items"]
-    for article in articles:
-        url = article["url_naver"]
-        host = utils.get_host_from_url(url)
-        hosts.add(host)
+    with ArticleStore() as store:
+        hosts = list(store.get_host_stats(get_source(filetype), keyword))
+
+    if not hosts:
+        fname = f"{filetype.value}_{keyword}.txt"
+        if not utils.already(fname):
+            print(
+                f"no {get_source(filetype)} articles for {keyword} in the article store and no {fname}; "
+                "run `python article_store.py` first to import the json results"
+            )
+            return
+        hosts = set()
+        articles = utils.get_json_from_file(fname)["items"]
+        for article in articles:
+            url = article["url_naver"]
+            host = utils.get_host_from_url(url)
+            hosts.add(host)
 
     with open(f"hosts_{filetype.value}_{keyword}.txt", "wt", encoding="utf-8") as f:
         print(*hosts, sep="\n", file=f)
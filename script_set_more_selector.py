@@ -14,6 +14,7 @@ def main(fname: str) -> None:
     `script_get_unmapped_host.py`에서 수집한 호스트들에 대해,
     수동으로 옆에 기사 본문에 대한 CSS 선택자를 적어준 후,
     실행해서 MATERIALS의 선택자 파일을 갱신해줄 수 있음.
+    갱신한 선택자는 reextract_news_maintext.py로 바뀐 호스트의 기사에만 적용할 수 있음.
 
     Args:
         fname (str): CSS 선택자를 적은 unmapped_hosts 파일 이름.
@@ -0,0 +1,92 @@
+#!python
+
+from typing import List, Dict, Tuple, Optional
+from collections import defaultdict
+import utils
+
+# 호스트별, 셀렉터별 본문 추출 성공(hit), 실패(miss) 횟수를 보관하는 파일.
+# {"호스트": {"셀렉터": [hit, miss], ...}, ...}
+STATS_FNAME = f"{utils.MATERIALS}/news_maintext_selector_stats.txt"
+
+
+class SelectorStats:
+    """
+    호스트의 셀렉터들을 시도할 순서를 정하는 (호스트, 셀렉터)별 성공, 실패 통계.
+    news_maintext_selectors.txt의 셀렉터 리스트는 늘어나기만 하므로(selector_set에서 찾은 셀렉터는 끝에 붙음),
+    파일의 순서 대신 성공률이 높은 셀렉터부터 시도해서 기사마다 시도하는 셀렉터 수를 줄인다.
+
+    Usage:
+        stats = SelectorStats.load()
+        selectors = stats.order(host, maps["selector"][host])
+        stats.update(host, [(selector, True)])
+        stats.save()
+    """
+
+    def __init__(self, stats: Optional[Dict[str, Dict[str, List[int]]]] = None) -> None:
+        """
+        Args:
+            stats (Optional[Dict[str, Dict[str, List[int]]]], optional): 호스트 -> 셀렉터 -> [hit, miss]. 기본값 None(빈 통계).
+        """
+        self.stats: Dict[str, Dict[str, List[int]]] = defaultdict(dict, stats or {})
+
+    @classmethod
+    def load(cls, fname: str = STATS_FNAME) -> "SelectorStats":
+        """
+        통계 파일을 읽는다. 파일이 없으면 빈 통계를 반환한다.
+
+        Args:
+            fname (str, optional): 통계 파일명. 기본값 STATS_FNAME.
+
+        Returns:
+            SelectorStats: 통계 객체.
+        """
+        return cls(utils.get_json_from_file(fname) if utils.already(fname) else None)
+
+    def save(self, fname: str = STATS_FNAME) -> None:
+        """
+        Args:
+            fname (str, optional): 통계 파일명. 기본값 STATS_FNAME.
+        """
+        utils.write_json_on_file(fname, self.stats)
+
+    def update(self, host: str, attempts: List[Tuple[str, bool]]) -> None:
+        """
+        한 기사에서 시도한 셀렉터들의 결과를 더한다.
+
+        Args:
+            host (str): 기사 사이트 호스트.
+            attempts (List[Tuple[str, bool]]): 시도한 순서대로의 (셀렉터, 본문 추출 성공 여부)들.
+        """
+        for selector, hit in attempts:
+            counts = self.stats[host].setdefault(selector, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def get_rank_key(self, host: str, selector: str) -> Tuple[bool, float]:
+        """
+        셀렉터의 정렬 키. 한 번도 성공하지 못하고 실패만 한 셀렉터는 맨 뒤로 가고,
+        나머지는 성공률((hit + 1) / (hit + miss + 2), 시도한 적 없으면 0.5)이 높은 순서다.
+
+        Args:
+            host (str): 기사 사이트 호스트.
+            selector (str): css 셀렉터.
+
+        Returns:
+            Tuple[bool, float]: (실패만 했는지의 여부, -성공률).
+        """
+        hit, miss = self.stats[host].get(selector, (0, 0)) if host in self.stats else (0, 0)
+        return (hit == 0 and miss > 0, -(hit + 1) / (hit + miss + 2))
+
+    def order(self, host: str, selectors: List[str]) -> List[str]:
+        """
+        호스트의 셀렉터들을 시도할 순서대로 정렬한다. 키가 같으면 원래(파일의) 순서를 유지한다.
+
+        Args:
+            host (str): 기사 사이트 호스트.
+            selectors (List[str]): 호스트의 셀렉터들.
+
+        Returns:
+            List[str]: 정렬된 셀렉터들.
+        """
+        if len(selectors) < 2:
+            return selectors
+        return sorted(selectors, key=lambda selector: self.get_rank_key(host, selector))
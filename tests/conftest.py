@@ -0,0 +1,5 @@
+import sys
+from os import path
+
+# 모듈들이 저장소 폴더에 바로 있으므로(패키지가 아님) 어디서 pytest를 실행해도 임포트할 수 있게 한다.
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
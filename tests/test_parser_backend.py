@@ -0,0 +1,112 @@
+"""
+parser_backend의 lxml 백엔드(기본값)가 기준 구현인 bs4 백엔드와 같은 본문을 추출하는지 확인한다.
+fixtures/news/{호스트}/*.html은 셀렉터가 등록된 호스트(fixtures/news/selectors.json)의 기사 페이지이며,
+본문 안에 광고 스크립트, 주석, 닫히지 않은 문단 등 실제 페이지에 흔한 잡음이 들어 있다.
+"""
+
+from typing import Tuple
+from glob import glob
+from os import path
+import pytest
+import utils
+from get_news_maintext import get_news_text_from_html
+from news_rules import NewsRules
+from parser_backend import BACKENDS, SelectorMatcher, parse_selector
+
+FIXTURES = path.join(path.dirname(path.abspath(__file__)), "fixtures", "news")
+SELECTORS = utils.get_json_from_file(path.join(FIXTURES, "selectors.json"))
+PAGES = sorted(glob(path.join(FIXTURES, "*", "*.html")))
+
+# 셀렉터 맵에 없는 결합자, 태그 조합도 확인하기 위한 셀렉터들.
+EXTRA_SELECTORS = [
+    "main h1.headline",
+    "body > main",
+    "aside.related li",
+    "header ul.gnb > li",
+    "main > *",
+    "div",
+    "p",
+    "#no-such-id",
+    "div.no-such-class",
+]
+
+
+def read_page(fname: str) -> Tuple[str, str]:
+    with open(fname, encoding="utf8") as f:
+        return path.basename(path.dirname(fname)), f.read()
+
+
+def get_rules() -> NewsRules:
+    # selector_set 경로는 찾은 셀렉터를 규칙에 등록하므로(learn()) 호출마다 새로 만든다.
+    return NewsRules(SELECTORS, {}, {})
+
+
+def test_fixtures_cover_mapped_hosts():
+    hosts = {read_page(fname)[0] for fname in PAGES}
+    assert hosts == set(SELECTORS)
+
+
+@pytest.mark.parametrize("fname", PAGES, ids=lambda e: path.relpath(e, FIXTURES))
+def test_lxml_extracts_same_text_as_bs4(fname):
+    host, page = read_page(fname)
+    expected = get_news_text_from_html(page, host, get_rules(), "bs4")
+    assert expected[1] == "host"
+    assert len(expected[0]) >= utils.NEWS_MAINTEXT_LOWER_BOUND
+    assert get_news_text_from_html(page, host, get_rules(), "lxml") == expected
+
+
+@pytest.mark.parametrize("fname", PAGES, ids=lambda e: path.relpath(e, FIXTURES))
+def test_lxml_fallback_same_as_bs4(fname):
+    # 셀렉터가 등록되지 않은 호스트는 DEFAULT_SELECTOR 다음에 모든 호스트의 셀렉터(selector_set, SelectorMatcher)로 찾는다.
+    _, page = read_page(fname)
+    results = []
+    for parser in ("bs4", "lxml"):
+        rules = get_rules()
+        text, source = get_news_text_from_html(page, "unmapped.example", rules, parser)
+        results.append((text, source, rules.selector["unmapped.example"]))
+    assert results[0][1] != "miss"
+    assert results[1] == results[0]
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("fname", PAGES, ids=lambda e: path.relpath(e, FIXTURES))
+def test_select_first_same_as_select_one(fname, backend):
+    _, page = read_page(fname)
+    be = BACKENDS[backend]
+    root = be.parse(page)
+    selectors = get_rules().selector_set + EXTRA_SELECTORS
+    candidates = SelectorMatcher(selectors).select_first(be, root)
+    for selector, candidate in zip(selectors, candidates):
+        assert candidate is be.select_one(root, selector), selector
+
+
+def test_mapped_selectors_do_not_target_p():
+    # lxml은 HTML 표준대로 <p> 안에서 블록 요소(<div>, <table> 등)가 시작되면 <p>를 닫지만,
+    # html.parser(bs4)는 닫지 않는다(test_known_divergence 참조). 본문 요소가 <p>면 두 백엔드의 본문이 달라지므로 막는다.
+    for selectors in SELECTORS.values():
+        for selector in selectors:
+            parsed = parse_selector(selector)
+            assert parsed is None or parsed[0][-1][0] != "p", selector
+
+
+# 알려진 두 백엔드의 차이. (html, 셀렉터, bs4의 본문, lxml의 본문).
+# 이 결과가 바뀌면(파서 버전 변경 등) 차이가 없어졌거나 새로 생긴 것이므로 확인한다.
+KNOWN_DIVERGENCES = {
+    # <p> 안의 블록 요소: lxml은 <div>에서 <p>를 닫으므로 "block"과 "more"가 <p> 밖으로 나간다.
+    "block_in_p": ("<p id=x>para<div>block</div>more</p>", "#x", "parablockmore", "para"),
+    "table_in_p": ("<p id=x>x<table><tr><td>t</td></tr></table>y</p>", "#x", "xty", "x"),
+    # HTML 안의 CDATA 구역: html.parser는 내용을 텍스트로, libxml2는 버린다.
+    "cdata": ("<div id=x>a<![CDATA[b]]>c</div>", "#x", "abc", "ac"),
+    # NUL 문자: libxml2는 대체 문자(U+FFFD)로 바꾼다.
+    "nul": ("<div id=x>a\x00b</div>", "#x", "a\x00b", "a�b"),
+}
+
+
+@pytest.mark.parametrize("case", list(KNOWN_DIVERGENCES))
+def test_known_divergence(case):
+    html, selector, bs4_text, lxml_text = KNOWN_DIVERGENCES[case]
+    texts = []
+    for name in ("bs4", "lxml"):
+        be = BACKENDS[name]
+        texts.append(be.get_text(be.select_one(be.parse(html), selector)))
+    assert texts == [bs4_text, lxml_text]
@@ -2,6 +2,9 @@
 
 from typing import List, Tuple, Dict, Optional
 from mecab import MeCab
+import time
+from article_store import ArticleStore
+import metrics
 import utils
 
 
@@ -32,7 +35,11 @@ def get_tokens(
         )
 
 
-def main(files: List[Tuple[utils.FileType, str]], save_file: utils.FileType) -> None:
+def main(
+    files: List[Tuple[utils.FileType, str]],
+    save_file: utils.FileType,
+    force_redo: bool = False,
+) -> None:
     """
     파일들을 병합하고 토큰화하여,
     새로운 파일에 저장함.
@@ -40,30 +47,46 @@ def main(files: List[Tuple[utils.FileType, str]], save_file: utils.FileType) ->
     Args:
         files (List[Tuple[utils.FileType, str]]): FileType과 키워드들의 리스트.
         save_file (utils.FileType): 새로 저장할 파일을 결정하는 utils.FileType Enum 객체.
+        force_redo (bool, optional): 이미 파일이 존재하는 경우에도 다시 토큰화할지의 여부. 기본적으로는 하지 않음.
     """
+    if not force_redo and utils.already(f"{save_file.value}.txt"):
+        return
+
     whole_articles = []
-    for filetype, keyword in files:
-        fname = filetype.value
-        if keyword:
-            fname += f"_{keyword}"
-        fname = utils.validify_fname(f"{fname}.txt")
-        articles = utils.get_json_from_file(fname)["items"]
+    start = time.perf_counter()
+    with ArticleStore() as store:
+        for filetype, keyword in files:
+            fname = filetype.value
+            if keyword:
+                fname += f"_{keyword}"
+            fname = utils.validify_fname(f"{fname}.txt")
+            articles = utils.get_json_from_file(fname)["items"]
 
-        for i, article in enumerate(articles):
-            if i % 100 == 0:
-                print(f"{fname} : {i}'th article end")
-            typestring = utils.get_typestring_from_filetype(filetype)
-            if typestring == "news":
-                article["tokens"], _ = get_tokens(article, typestring)
-            elif typestring == "kin":
-                article["tokens"], article["tokens_answer"] = get_tokens(
-                    article, typestring
-                )
-            article["keyword"] = keyword
-            article["source"] = filetype.value
+            for i, article in enumerate(articles):
+                if i % 100 == 0:
+                    print(f"{fname} : {i}'th article end")
+                typestring = utils.get_typestring_from_filetype(filetype)
+                with metrics.timer("tokenize_seconds", typestring=typestring):
+                    if typestring == "news":
+                        article["tokens"], _ = get_tokens(article, typestring)
+                    elif typestring == "kin":
+                        article["tokens"], article["tokens_answer"] = get_tokens(
+                            article, typestring
+                        )
+                metrics.inc("tokenize_articles_total", typestring=typestring)
+                article["keyword"] = keyword
+                article["source"] = filetype.value
 
-        whole_articles += articles
+            store.set_tokens(filetype, keyword, articles)
+            whole_articles += articles
 
+    elapsed = time.perf_counter() - start
+    if elapsed > 0:
+        metrics.set_gauge(
+            "tokenize_articles_per_second",
+            len(whole_articles) / elapsed,
+            save_file=save_file.name,
+        )
     utils.write_json_on_file(
         f"{save_file.value}.txt",
         {"keyword": None, "items": whole_articles},
@@ -78,4 +101,5 @@ if __name__ == "__main__":
             (utils.FileType.KIN_WT, "환자 의견"),
         ],
         utils.FileType.KIN_PROCESSED,
+        True,
     )
@@ -1,21 +1,25 @@
 #!python
 
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Callable, TYPE_CHECKING
+from functools import cache
 import re
 import time
 import json
+import hashlib
+import threading
 import datetime as dt
 from os import path
 from encodings.aliases import aliases
 from configparser import ConfigParser
 from enum import Enum
 from urllib import parse
-import urllib3
-import requests
-from bs4 import BeautifulSoup
+import metrics
 
-# requests를 이용한 수집 중 경고 해제.
-urllib3.disable_warnings()
+# requests, bs4는 임포트가 느리므로(수백 ms) 실제로 요청하거나 파싱하는 함수 안에서 임포트한다.
+# 덕분에 batch.py, pipeline.py와 작업자 프로세스가 utils만 임포트할 때는 빠르게 시작한다.
+if TYPE_CHECKING:
+    import requests
+    from retry_queue import CircuitBreaker
 
 # MATERIALS: 수집에 필요한 준비물(api 키 등)을 보관하는 디렉토리.
 # RESULTS: 수집 결과를 보관하는 디렉토리.
@@ -24,6 +28,19 @@ MATERIALS = "materials"
 RESULTS = "results"
 VISUALIZATIONS = "visualizations"
 
+# 샘플 모드(profiling.sample_mode() 참조) 설정.
+# SAMPLE_LIMIT: None이 아니면 get_json_from_file()이 "items"의 앞 SAMPLE_LIMIT개만 돌려준다.
+# SAMPLE_ROOT: None이 아니면 현재 폴더에 없는 파일을 이 폴더에서 읽는다.
+# 샘플 모드에서는 작업 폴더를 실행 디렉토리로 옮기므로, 결과는 원래 폴더가 아닌 그곳에 쓰인다.
+SAMPLE_LIMIT: Optional[int] = None
+SAMPLE_ROOT: Optional[str] = None
+
+# 스레드별 requests.Session. get_session() 참조.
+SESSIONS = threading.local()
+
+# 스트리밍으로 받을 때 한 번에 읽는 크기(바이트).
+STREAM_CHUNK_SIZE = 16 << 10
+
 # 뉴스 본문이 제대로 수집되었는지를 판단하기 위한 문서 길이.
 # 글자수가 이 길이보다 적다면 제대로 수집되지 않은 것으로 판단한다.
 NEWS_MAINTEXT_LOWER_BOUND = 300
@@ -68,6 +85,8 @@ class FileType(Enum):
     NEWS_PROCESSED_UNIQUE = RESULTS + "/" + "naver_news_unique"
     KIN_PROCESSED = RESULTS + "/" + "naver_kin_processed"
     KIN_PROCESSED_UNIQUE = RESULTS + "/" + "naver_kin_unique"
+    # 지식IN 답변 단위 중복 제거에서 살아남은 답변들의 (게시글 번호, 답변 번호).
+    KIN_ANSWER_UNIQUE = RESULTS + "/" + "naver_kin_answer_unique"
 
 
 def get_config() -> ConfigParser:
@@ -78,7 +97,7 @@ def get_config() -> ConfigParser:
         ConfigParser: config.ini의 내용을 담고 있는 ConfigParser 객체.
     """
     config = ConfigParser()
-    config.read("materials/config.ini", encoding="utf8")
+    config.read(get_read_path("materials/config.ini"), encoding="utf8")
     return config
 
 
@@ -145,7 +164,7 @@ def get_filetype_from_typestring(typestring: str, additional_info: str) -> FileT
     Args:
         typestring (str): 파일 종류를 나타내는 문자열("news" | "kin" | "").
         additional_info (str): 구체적인 파일 종류를 특정하기 위한 추가 문자열.
-            - "api" | "wt" | "c" | "cwt" | "p" | "u" | "s"
+            - "api" | "wt" | "c" | "cwt" | "p" | "u" | "au" | "s"
 
     Returns:
         FileType: 파일의 종류에 맞는 FileType Enum 객체.
@@ -182,6 +201,8 @@ def get_filetype_from_typestring(typestring: str, additional_info: str) -> FileT
             return FileType.KIN_PROCESSED
         case ("kin", "u"):
             return FileType.KIN_PROCESSED_UNIQUE
+        case ("kin", "au"):
+            return FileType.KIN_ANSWER_UNIQUE
         case ("kin", "s"):
             return FileType.KIN_SIM
 
@@ -219,6 +240,59 @@ def already(fname: str | List[str]) -> bool:
     return all(path.exists(fn) for fn in fname)
 
 
+def get_read_path(fname: str) -> str:
+    """
+    읽을 파일의 실제 경로를 반환한다.
+    샘플 모드에서 현재 폴더에 없는 파일은 SAMPLE_ROOT에서 읽고, 그 외에는 fname을 그대로 반환한다.
+
+    Args:
+        fname (str): 파일명 문자열(확장자 포함).
+
+    Returns:
+        str: 실제로 읽을 파일 경로.
+    """
+    if SAMPLE_ROOT is None or path.exists(fname):
+        return fname
+    return path.join(SAMPLE_ROOT, fname)
+
+
+def get_file_hash(fname: str) -> Optional[str]:
+    """
+    파일 내용의 sha256 해시를 16진수 문자열로 반환한다.
+    파일이 없으면 None을 반환한다.
+
+    Args:
+        fname (str): 파일명 문자열(확장자 포함).
+
+    Returns:
+        Optional[str]: 파일 내용의 sha256 해시 문자열, 파일이 없으면 None.
+    """
+    if not path.exists(fname):
+        return None
+    h = hashlib.sha256()
+    with open(fname, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@cache
+def get_requests():
+    """
+    requests 모듈을 처음 사용할 때 임포트하고, SSL 인증을 끈 요청의 경고를 해제한다.
+    두 번째 호출부터는 캐시된 모듈을 바로 반환한다.
+
+    Returns:
+        module: requests 모듈.
+    """
+    import urllib3
+    import requests
+
+    # requests를 이용한 수집 중 경고 해제.
+    urllib3.disable_warnings()
+    return requests
+
+
 def search(
     base_url: str, query: str, api_id: str, secret: str, total_pages: int
 ) -> List[Dict[str, Optional[str]]]:
@@ -241,6 +315,7 @@ def search(
             ["description"]: 아티클 본문에서 키워드가 등장한 부분의 패시지.
             ["date"]: 뉴스인 경우 뉴스의 날짜, 지식IN이면 None.
     """
+    requests = get_requests()
     query = parse.quote(query)
     url = base_url + f"?query={query}&display=100"
     headers = {"X-Naver-Client-Id": api_id, "X-Naver-Client-Secret": secret}
@@ -277,6 +352,8 @@ def write_json_on_file(fname: str, wrapped: dict | list) -> None:
 def get_json_from_file(fname: str) -> dict | list:
     """
     fname인 json 파일을 읽어서 파이썬 객체로 반환한다.
+    샘플 모드에서는 get_read_path()로 경로를 정하고, 데이터 파일("items"가 있는 딕셔너리)의
+    아티클을 앞에서부터 SAMPLE_LIMIT개만 남긴다.
 
     Args:
         fname (str): 파일명 문자열(확장자 포함).
@@ -284,11 +361,59 @@ def get_json_from_file(fname: str) -> dict | list:
     Returns:
         dict | list: json 파일의 내용물을 파이썬 객체로 변환한 결과.
     """
-    with open(fname, "rt", encoding="utf-8") as f:
+    with open(get_read_path(fname), "rt", encoding="utf-8") as f:
         ret = json.load(f)
+    if SAMPLE_LIMIT is not None and isinstance(ret, dict) and "items" in ret:
+        ret["items"] = ret["items"][:SAMPLE_LIMIT]
     return ret
 
 
+def append_jsonl_on_file(fname: str, obj: dict | list) -> None:
+    """
+    파일명이 fname인 jsonl 파일의 끝에 obj를 한 줄의 json으로 덧붙인다.
+    파일이 없으면 새로 만든다.
+    매 줄마다 flush하므로 프로세스가 중간에 죽어도 이미 쓴 줄은 보존된다.
+    쓰는 도중 죽어서 파일이 줄바꿈 없이 끝나면, 잘린 줄에 이어 쓰지 않도록 줄을 바꾼 뒤에 덧붙인다.
+
+    Args:
+        fname (str): 파일명 문자열(확장자 포함).
+        obj (dict | list): json으로 덤프될 수 있는 딕셔너리, 리스트.
+    """
+    line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+    with open(fname, "a+b") as f:
+        if f.seek(0, 2):
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                line = b"\n" + line
+        f.write(line)
+        f.flush()
+
+
+def get_jsonl_from_file(fname: str) -> Iterator[dict | list]:
+    """
+    fname인 jsonl 파일을 한 줄씩 읽어서 파이썬 객체로 돌려주는 제너레이터.
+    파일이 없으면 아무것도 돌려주지 않는다.
+    쓰는 도중 중단되어 잘린 줄(json으로 파싱할 수 없는 줄)은 건너뛴다.
+
+    Args:
+        fname (str): 파일명 문자열(확장자 포함).
+
+    Yields:
+        dict | list: 각 줄의 json을 파이썬 객체로 변환한 결과.
+    """
+    if not path.exists(fname):
+        return
+    with open(fname, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
 def compare_encoding(a: Optional[str], b: Optional[str]) -> bool:
     """
     두 인코딩 문자열이 같은 인코딩을 지시하는지의 여부.
@@ -329,48 +454,176 @@ def get_host_from_url(url: str) -> str:
     return host
 
 
+def get_session() -> "requests.Session":
+    """
+    현재 스레드의 requests.Session을 반환한다. 처음 부를 때 만든다.
+    같은 호스트에 여러 번 요청할 때 연결(TCP, TLS)을 다시 맺지 않고 재사용한다(keep-alive).
+    Session은 스레드 안전하지 않으므로 요청 스레드마다 하나씩 둔다.
+    응답의 Set-Cookie는 저장하지 않으므로, requests.get()과 같이 요청 사이에 쿠키가 남지 않는다.
+
+    Returns:
+        requests.Session: 현재 스레드의 세션.
+    """
+    session = getattr(SESSIONS, "session", None)
+    if session is None:
+        from http.cookiejar import DefaultCookiePolicy
+
+        session = get_requests().Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        SESSIONS.session = session
+    return session
+
+
+def read_stream(
+    res: "requests.models.Response",
+    max_bytes: Optional[int] = None,
+    watcher: Optional[Callable[[bytes], bool]] = None,
+) -> Optional[str]:
+    """
+    stream=True로 받은 응답의 본문을 청크 단위로 읽어서 res.content에 채움.
+    max_bytes를 넘거나 watcher가 True를 반환하면 나머지는 읽지 않고 연결을 닫음.
+    멈춘 이유(반환값)는 res.truncated에도 남겨서, 보관소가 일부만 받은 응답임을 기록하게 함(html_archive.py 참조).
+
+    Args:
+        res (requests.models.Response): stream=True로 받은 응답 객체.
+        max_bytes (Optional[int], optional): 본문의 최대 크기(바이트). 기본값 None(제한 없음).
+        watcher (Optional[Callable[[bytes], bool]], optional): 청크를 받을 때마다 부르는 함수. True를 반환하면 멈춤.
+
+    Returns:
+        Optional[str]: 끝까지 읽지 않은 이유("max_bytes" | "watcher"). 끝까지 읽었으면 None.
+    """
+    chunks, size, reason = [], 0, None
+    for chunk in res.iter_content(STREAM_CHUNK_SIZE):
+        if max_bytes is not None and size + len(chunk) > max_bytes:
+            chunks.append(chunk[: max_bytes - size])
+            reason = "max_bytes"
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if watcher is not None and watcher(chunk):
+            reason = "watcher"
+            break
+    res._content = b"".join(chunks)
+    res._content_consumed = True
+    res.truncated = reason
+    res.close()
+    return reason
+
+
 def get_response_from_url(
-    url: str, retry: int = 0, cookie: Optional[str] = None
-) -> Optional[requests.models.Response]:
+    url: str,
+    retry: int = 0,
+    cookie: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    get_watcher: Optional[Callable[[str], Optional[Callable[[bytes], bool]]]] = None,
+    breaker: Optional["CircuitBreaker"] = None,
+    session: Optional["requests.Session"] = None,
+    failures: Optional[List[bool]] = None,
+) -> Optional["requests.models.Response"]:
     """
     requests 모듈을 이용해 url에 get 요청을 보냄.
     User-Agent 헤더를 설정하고 올바른 요청을 받지 못하는 경우 None을 반환함.
-    여러 번(기본은 1번만) 시도할 수 있으며, 2 ** (i - 1)초의 백오프가 발생함.
+    여러 번(기본은 1번만) 시도할 수 있으며, 시도 사이에 2 ** (i - 1)초의 백오프가 발생함.
+    호스트별 소요 시간(재시도 포함), 내려받은 바이트 수, 시도 결과를 metrics에 기록함.
     데이터 수집의 용이성을 위해 SSL 인증이 꺼져 있으므로 인지할 것.
 
+    max_bytes나 get_watcher가 주어지면 본문을 스트리밍으로 받아서(read_stream()) 중간에 멈출 수 있음.
+    이때 res.content는 받은 부분까지이고, 멈춘 이유는 fetch_truncated_total에 기록함.
+
+    breaker가 주어지면 회로가 열린 호스트에는 요청하지 않고 바로 None을 반환하며, 시도 결과를 breaker에 기록함.
+    시간 초과, 연결 오류, 5xx는 호스트의 실패이고, 4xx는 호스트가 응답한 것으로 봄.
+    다시 요청해도 결과가 같은 4xx는 retry가 남아 있어도 재시도하지 않음.
+
     Args:
         url (str): get 요청을 보낼 url.
         retry (int, optional): 요청이 실패한 경우 재시도할 횟수. 기본값은 0.
         cookie (Optional[str]): 쿠키를 설정한 경우 헤더에 쿠키를 추가해서 보냄.
+        max_bytes (Optional[int], optional): 본문의 최대 크기(바이트). 기본값 None(제한 없음).
+        get_watcher (Optional[Callable[[str], Optional[Callable[[bytes], bool]]]], optional):
+            (리디렉션이 끝난) 응답 url을 받아서 read_stream()의 watcher를 반환하는 함수. None을 반환하면 끝까지(max_bytes까지) 읽음.
+        breaker (Optional[CircuitBreaker], optional): 호스트별 회로 차단기(retry_queue.py 참조). 기본값 None.
+        session (Optional[requests.Session], optional): 요청에 쓸 세션(get_session() 참조). 기본값 None(연결을 재사용하지 않음).
+        failures (Optional[List[bool]], optional): 주어지면 실패한 시도마다 다시 요청할 만한 실패인지를 덧붙임.
+            시간 초과, 연결 오류, 5xx, 회로가 열린 호스트는 True, 4xx는 False. 기본값 None.
 
     Returns:
         Optional[requests.models.Response]: 응답 결과인 requests 모듈의 response 객체거나, 올바르지 않은 결과인 경우 None.
     """
+    requests = get_requests()
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
     }
     if cookie is not None:
         headers["Cookie"] = cookie
 
+    host = parse.urlparse(url).hostname or ""
+    stream = max_bytes is not None or get_watcher is not None
+    if breaker is not None and not breaker.allow(url):
+        metrics.inc("fetch_requests_total", host=host, outcome="circuit_open")
+        if failures is not None:
+            failures.append(True)
+        return None
+    start = time.perf_counter()
     for i in range(retry + 1):
+        if i and breaker is not None and not breaker.allow(url):
+            break
         try:
-            res = requests.get(
-                url, headers=headers, timeout=5, verify=False, allow_redirects=True
+            res = (session if session is not None else requests).get(
+                url,
+                headers=headers,
+                timeout=5,
+                verify=False,
+                allow_redirects=True,
+                stream=stream,
             )
+            if stream:
+                if not res.ok:
+                    res.close()
+                    res.raise_for_status()
+                watcher = get_watcher(res.url) if get_watcher is not None else None
+                reason = read_stream(res, max_bytes, watcher)
+                if reason is not None:
+                    metrics.inc("fetch_truncated_total", host=host, reason=reason)
+            metrics.inc("fetch_bytes_total", len(res.content), host=host)
             res.raise_for_status()
+            metrics.inc("fetch_requests_total", host=host, outcome="ok")
+            metrics.observe("fetch_seconds", time.perf_counter() - start, host=host)
+            if breaker is not None:
+                breaker.record(url, True)
             return res
         except (
             requests.exceptions.HTTPError,
             requests.exceptions.Timeout,
             requests.exceptions.ConnectionError,
             requests.exceptions.ChunkedEncodingError,
-        ):
-            time.sleep(2 ** (i - 1))
+        ) as err:
+            metrics.inc("fetch_requests_total", host=host, outcome=type(err).__name__)
+            status = err.response.status_code if err.response is not None else 500
+            retryable = not isinstance(err, requests.exceptions.HTTPError) or status >= 500
+            if failures is not None:
+                failures.append(retryable)
+            if breaker is not None:
+                breaker.record(url, not retryable)
+            if not retryable:
+                break
+            if i < retry:
+                time.sleep(2 ** (i - 1))
+        except Exception:
+            # 잘못된 url 등 호스트와 관계없는 오류. half-open 시도가 끝나지 않은 채로 남지 않게 함.
+            if breaker is not None:
+                breaker.record(url, True)
+            raise
+    metrics.observe("fetch_seconds", time.perf_counter() - start, host=host)
     return None
 
 
 def search_crawl(
-    keyword: str, where: str, count: int = 300
+    keyword: str,
+    where: str,
+    count: int = 300,
+    base_url: str = "https://search.naver.com/search.naver",
+    years: Iterable[int] = range(1990, 2024),
+    delay: float = 0.5,
 ) -> List[Dict[str, Optional[str]]]:
     """
     requests와 bs4를 통해 네이버 검색 결과를 직접 수집함.
@@ -381,6 +634,9 @@ def search_crawl(
         keyword (str): 검색 키워드.
         where (str): 수집할 데이터 종류(현재는 뉴스만 가능).
         count (int, optional): 각 년도별 검색결과 개수. 기본적으로는 년도별 300개.
+        base_url (str, optional): 검색 페이지 주소. 벤치마크 등에서 로컬 서버로 바꿀 때 사용.
+        years (Iterable[int], optional): 수집할 년도들. 기본값 1990년 ~ 2023년.
+        delay (float, optional): 검색 페이지 요청 사이의 대기 시간(초). 기본값 0.5.
 
     Returns:
         List[Dict[str, Optional[str]]]: [{아티클 0 정보}, {아티클 1 정보}, ...].
@@ -390,12 +646,14 @@ def search_crawl(
             ["description"]: None.
             ["date"]: 아티클 날짜.
     """
-    base_url = f"https://search.naver.com/search.naver?where={where}&query={keyword}"
+    from bs4 import BeautifulSoup
+
+    base_url = f"{base_url}?where={where}&query={keyword}"
     ret = []
-    for year in range(1990, 2024):
+    for year in years:
         print(f"year {year} is starting...")
         for start in range(1, count, 10):
-            time.sleep(0.5)
+            time.sleep(delay)
             url = base_url + f"&pd=3&ds={year}.01.01&de={year}.12.31&start={start}"
             res = get_response_from_url(url, 8)
 